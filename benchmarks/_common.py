@@ -0,0 +1,82 @@
+"""Shared helpers for the ClassTop benchmark scripts."""
+import sys
+import time
+from pathlib import Path
+from typing import Callable
+
+ROOT = Path(__file__).resolve().parent.parent
+PYTHON_SRC = ROOT / "src-tauri" / "python"
+LMS_SRC = ROOT / "lms"
+
+
+def use_tauri_app() -> None:
+    """Make ``tauri_app`` importable without installing the Tauri package."""
+    if str(PYTHON_SRC) not in sys.path:
+        sys.path.insert(0, str(PYTHON_SRC))
+
+
+def use_lms() -> None:
+    """Make the flat LMS modules (``db``, ``websocket_manager``...) importable."""
+    if str(LMS_SRC) not in sys.path:
+        sys.path.insert(0, str(LMS_SRC))
+
+
+def quiet_logs() -> None:
+    """Silence ClassTop logging so it does not dominate timings.
+
+    ``tauri_app.logger.log_message`` walks the call stack on every call, which
+    costs more than most of the queries being measured, so it is replaced with
+    a no-op for both the "before" and "after" variants.
+    """
+    try:
+        from loguru import logger
+        logger.remove()
+    except ImportError:
+        pass
+    tauri_logger = sys.modules.get("tauri_app.logger")
+    if tauri_logger is not None:
+        tauri_logger.log_message = lambda level, message: None
+
+
+def ops_per_sec(fn: Callable[[int], None], iterations: int) -> float:
+    """Call ``fn(i)`` ``iterations`` times and return calls per second."""
+    start = time.perf_counter()
+    for i in range(iterations):
+        fn(i)
+    elapsed = time.perf_counter() - start
+    return iterations / elapsed if elapsed > 0 else float("inf")
+
+
+def timed(fn: Callable[[], object], repeat: int = 5, number: int = 1) -> float:
+    """Best-of-``repeat`` mean wall time of ``number`` calls to ``fn()``, in milliseconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        best = min(best, (time.perf_counter() - start) / number)
+    return best * 1000
+
+
+def print_table(title: str, rows, headers) -> None:
+    """Print a small fixed-width result table."""
+    print(f"\n{title}")
+    widths = [max(len(str(h)), *(len(str(r[i])) for r in rows)) for i, h in enumerate(headers)]
+    print("  ".join(str(h).ljust(w) for h, w in zip(headers, widths)))
+    print("  ".join("-" * w for w in widths))
+    for row in rows:
+        print("  ".join(str(c).ljust(w) for c, w in zip(row, widths)))
+
+
+def scene_frames(count: int, width: int, height: int) -> list:
+    """BGR frames of smoothed noise, which JPEG-compress roughly like a classroom scene."""
+    import cv2
+    import numpy as np
+
+    rng = np.random.default_rng(0)
+    frames = []
+    for _ in range(count):
+        noise = rng.integers(0, 256, (height // 8, width // 8, 3), dtype=np.uint8)
+        frame = cv2.resize(noise, (width, height), interpolation=cv2.INTER_CUBIC)
+        frames.append(cv2.GaussianBlur(frame, (5, 5), 0))
+    return frames
@@ -0,0 +1,183 @@
+"""Benchmark: camera discovery at startup, and the dshow option parser.
+
+1. Parser: the old inline ``-list_options`` parsing loop vs.
+   ``parse_dshow_options`` on the captured outputs in ``samples/`` (and a
+   check that both give the same resolutions).
+2. Discovery: a simulated machine with the three cameras of
+   ``samples/dshow_devices_ffmpeg6.txt``. DirectShow enumeration is a fake
+   ``FilterGraph`` with a fixed cost, and ffmpeg is a stub script that
+   answers ``-list_devices``/``-list_options`` with the sample outputs
+   after a delay (opening a device to read its options is slow). Compares:
+
+   - legacy: devices probed one after another, ``FilterGraph`` built again
+             for every name lookup
+   - cold:   one enumeration, devices probed in parallel, profiles cached
+   - warm:   second start with the profile cache in place (the refresh
+             runs in the background and is not waited for)
+
+    python benchmarks/bench_camera_discovery.py [--probe-ms 1200] [--enum-ms 60]
+"""
+import argparse
+import os
+import stat
+import subprocess
+import sys
+import tempfile
+import time
+import types
+from pathlib import Path
+
+from _common import use_tauri_app, print_table, timed
+
+use_tauri_app()
+
+SAMPLES = Path(__file__).resolve().parent / "samples"
+
+STUB = '''\
+import sys, time
+args = sys.argv[1:]
+if "-list_devices" in args:
+    time.sleep({list_ms} / 1000)
+    sys.stderr.write(open(r"{samples}/dshow_devices_ffmpeg6.txt", encoding="utf-8").read())
+    sys.exit(1)
+device = args[args.index("-i") + 1]
+time.sleep({probe_ms} / 1000)
+sample = "dshow_options_integrated_ffmpeg4.txt" if "5986" in device or "Integrated" in device \\
+    else "dshow_options_c920_ffmpeg6.txt"
+sys.stderr.write(open(r"{samples}/" + sample, encoding="utf-8").read())
+sys.exit(1)
+'''
+
+
+def legacy_parse(output):
+    """The old CameraDetector._detect_resolutions parsing loop."""
+    resolutions = []
+    current_res = None
+    for line in output.split('\n'):
+        if 'pixel_format=' in line or 'vcodec=' in line:
+            parts = line.strip().split()
+            for i, part in enumerate(parts):
+                if 's=' in part:
+                    res_str = part.split('=')[1]
+                    if 'x' in res_str:
+                        width, height = res_str.split('x')
+                        try:
+                            current_res = {"width": int(width), "height": int(height), "fps": []}
+                        except ValueError:
+                            continue
+                if 'fps=' in part and current_res:
+                    fps_str = part.split('=')[1]
+                    try:
+                        fps = float(fps_str)
+                        if fps not in current_res["fps"]:
+                            current_res["fps"].append(fps)
+                    except ValueError:
+                        continue
+            if current_res and current_res["fps"]:
+                existing = next((r for r in resolutions if r["width"] == current_res["width"]
+                                 and r["height"] == current_res["height"]), None)
+                if existing:
+                    for fps in current_res["fps"]:
+                        if fps not in existing["fps"]:
+                            existing["fps"].append(fps)
+                else:
+                    resolutions.append(current_res.copy())
+                current_res = None
+    return resolutions
+
+
+def bench_parser(number):
+    from tauri_app.camera_monitor.camera_detector import parse_dshow_options
+
+    rows = []
+    for sample in sorted(SAMPLES.glob("dshow_options_*.txt")):
+        output = sample.read_text(encoding="utf-8")
+        legacy = timed(lambda: legacy_parse(output), number=number)
+        new = timed(lambda: parse_dshow_options(output), number=number)
+        same = legacy_parse(output) == parse_dshow_options(output)
+        rows.append((sample.stem, len(parse_dshow_options(output)), f"{legacy * 1000:.1f}",
+                     f"{new * 1000:.1f}", f"{legacy / new:.1f}x", "yes" if same else "NO"))
+    print_table("dshow -list_options parsing (µs per output)", rows,
+                ["sample", "resolutions", "legacy µs", "parse_dshow_options µs", "speedup", "same result"])
+
+
+def install_fake_filtergraph(names, enum_ms):
+    """Stand-in for pygrabber: enumeration returns ``names`` after ``enum_ms``."""
+    class FilterGraph:
+        def get_input_devices(self):
+            time.sleep(enum_ms / 1000)
+            return list(names)
+
+    module = types.ModuleType("pygrabber.dshow_graph")
+    module.FilterGraph = FilterGraph
+    sys.modules["pygrabber"] = types.ModuleType("pygrabber")
+    sys.modules["pygrabber.dshow_graph"] = module
+    return FilterGraph
+
+
+def make_stub(directory, **delays):
+    script = Path(directory) / "ffmpeg_stub.py"
+    script.write_text(STUB.format(samples=SAMPLES.as_posix(), **delays))
+    if sys.platform == "win32":
+        exe = Path(directory) / "ffmpeg.bat"
+        exe.write_text(f'@"{sys.executable}" "{script}" %*\n')
+    else:
+        exe = Path(directory) / "ffmpeg"
+        exe.write_text(f"#!/bin/sh\nexec '{sys.executable}' '{script}' \"$@\"\n")
+        exe.chmod(exe.stat().st_mode | stat.S_IEXEC)
+    return str(exe)
+
+
+def legacy_discover(ffmpeg, FilterGraph):
+    """The old detect_cameras: sequential probes, FilterGraph per name lookup."""
+    cameras = []
+    for index, name in enumerate(FilterGraph().get_input_devices()):
+        lookup = FilterGraph().get_input_devices()
+        result = subprocess.run([ffmpeg, "-f", "dshow", "-list_options", "true", "-i", f"video={lookup[index]}"],
+                                capture_output=True, text=True, timeout=10)
+        cameras.append({"index": index, "name": name, "resolutions": legacy_parse(result.stderr)})
+    return cameras
+
+
+def bench_discovery(repeat, enum_ms, list_ms, probe_ms):
+    from tauri_app.camera_monitor.camera_detector import CameraDetector, parse_dshow_devices
+
+    devices = parse_dshow_devices((SAMPLES / "dshow_devices_ffmpeg6.txt").read_text(encoding="utf-8"))
+    FilterGraph = install_fake_filtergraph([name for name, _ in devices], enum_ms)
+
+    results = {"legacy": [], "cold": [], "warm": []}
+    found = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        ffmpeg = make_stub(tmp, list_ms=list_ms, probe_ms=probe_ms)
+        cache_file = os.path.join(tmp, "camera_profiles.json")
+        for _ in range(repeat):
+            for mode in results:
+                if mode == "cold" and os.path.exists(cache_file):
+                    os.remove(cache_file)
+                start = time.perf_counter()
+                if mode == "legacy":
+                    cameras = legacy_discover(ffmpeg, FilterGraph)
+                else:
+                    detector = CameraDetector(ffmpeg=ffmpeg, cache_file=cache_file)
+                    cameras = detector.detect_cameras()
+                results[mode].append((time.perf_counter() - start) * 1000)
+                if mode != "legacy":
+                    detector.wait_for_refresh()
+                found[mode] = "; ".join(f"{c['name']}: {len(c['resolutions'])}" for c in cameras)
+
+    rows = [(mode, f"{min(t):.0f}", f"{sum(t) / len(t):.0f}", found[mode]) for mode, t in results.items()]
+    print_table(f"{len(devices)} cameras, enumeration {enum_ms} ms, ffmpeg -list_devices {list_ms} ms, "
+                f"-list_options {probe_ms} ms per device (plus process start-up); best/mean of {repeat}",
+                rows, ["mode", "best ms", "mean ms", "cameras (resolutions)"])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--number", type=int, default=2000, help="parses per timing")
+    parser.add_argument("--enum-ms", type=int, default=60)
+    parser.add_argument("--list-ms", type=int, default=150)
+    parser.add_argument("--probe-ms", type=int, default=1200)
+    opts = parser.parse_args()
+    bench_parser(opts.number)
+    bench_discovery(opts.repeat, opts.enum_ms, opts.list_ms, opts.probe_ms)
@@ -0,0 +1,95 @@
+"""Benchmark: conflict detection, per-day scans vs. the interval index and sweep line.
+
+Times single ``check_conflicts`` calls against a stored timetable, and
+validating a whole timetable pairwise vs. ``check_conflicts_bulk``.
+
+    python benchmarks/bench_conflicts.py [--entries 10000] [--timetable 2000]
+"""
+import argparse
+import random
+import tempfile
+from pathlib import Path
+
+from _common import use_tauri_app, quiet_logs, timed, print_table
+from bench_week_index import LegacyScheduleManager, populate
+
+use_tauri_app()
+
+from tauri_app.db_pool import get_pool  # noqa: E402
+from tauri_app.schedule_manager import ScheduleManager  # noqa: E402
+
+
+def pairwise_conflicts(entries):
+    """The O(n^2) validation an import had to do: every entry against every other."""
+    pairs = []
+    for i, a in enumerate(entries):
+        for j in range(i + 1, len(entries)):
+            b = entries[j]
+            if a["day_of_week"] != b["day_of_week"]:
+                continue
+            if a["end_time"] <= b["start_time"] or a["start_time"] >= b["end_time"]:
+                continue
+            if not a["weeks"] or not b["weeks"] or set(a["weeks"]) & set(b["weeks"]):
+                pairs.append((i, j))
+    return pairs
+
+
+def random_timetable(rng, size):
+    entries = []
+    for i in range(size):
+        start = rng.randint(7 * 60, 20 * 60)
+        end = start + rng.choice([45, 90])
+        start_week = rng.randint(1, 36)
+        entries.append({
+            "course_name": f"Course {i % 200}",
+            "day_of_week": rng.randint(1, 7),
+            "start_time": f"{start // 60:02d}:{start % 60:02d}",
+            "end_time": f"{end // 60:02d}:{end % 60:02d}",
+            "weeks": [] if rng.random() < 0.05 else list(range(start_week, start_week + rng.randint(1, 4))),
+        })
+    return entries
+
+
+def run(entries: int, timetable_size: int) -> None:
+    rng = random.Random(7)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "bench.db"
+        populate(path, entries)
+        quiet_logs()
+
+        legacy, indexed = LegacyScheduleManager(path), ScheduleManager(path)
+
+        # Single checks must report the same entries as the per-day scan
+        for _ in range(300):
+            day, hour = rng.randint(1, 7), rng.randint(7, 20)
+            weeks = rng.choice([None, [rng.randint(1, 40)], list(range(1, 10))])
+            args = (day, f"{hour:02d}:30", f"{hour + 1:02d}:10", weeks)
+            assert sorted(row[0] for row in legacy.check_conflicts(*args)) == \
+                sorted(c["id"] for c in indexed.check_conflicts(*args)), args
+
+        rows = []
+        args = (3, "09:00", "09:45", [10])
+        before = timed(lambda: legacy.check_conflicts(*args), repeat=5, number=20)
+        after = timed(lambda: indexed.check_conflicts(*args), repeat=5, number=20)
+        rows.append((f"check_conflicts, {entries} stored", f"{before:.3f}", f"{after:.3f}", f"{before / after:.0f}x"))
+
+        timetable = random_timetable(rng, timetable_size)
+        expected = pairwise_conflicts(timetable)
+        bulk = indexed.check_conflicts_bulk(timetable)
+        assert sorted((p["first"]["index"], p["second"]["index"]) for p in bulk) == sorted(expected)
+
+        before = timed(lambda: pairwise_conflicts(timetable), repeat=3)
+        after = timed(lambda: indexed.check_conflicts_bulk(timetable), repeat=3)
+        rows.append((f"validate {timetable_size}-entry timetable ({len(expected)} pairs)",
+                     f"{before:.3f}", f"{after:.3f}", f"{before / after:.0f}x"))
+
+        print_table("Conflict detection latency (ms)", rows, ["case", "scan / pairwise", "index / sweep", "speedup"])
+        get_pool(path).close_all()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, default=10000)
+    parser.add_argument("--timetable", type=int, default=2000)
+    opts = parser.parse_args()
+    run(opts.entries, opts.timetable)
@@ -0,0 +1,103 @@
+"""Benchmark: per-call sqlite3.connect vs. the shared connection pool.
+
+Measures ops/sec for ``get_setting``, ``get_schedule_by_day`` and
+``add_schedule_entry`` with the legacy "open a connection per call" pattern
+and with the pooled WAL connections from ``tauri_app.db_pool``.
+
+    python benchmarks/bench_db_pool.py [--iterations 2000]
+"""
+import argparse
+import sqlite3
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+
+from _common import use_tauri_app, quiet_logs, ops_per_sec, print_table
+
+use_tauri_app()
+
+from tauri_app import db as _db  # noqa: E402
+from tauri_app.db_pool import get_pool  # noqa: E402
+from tauri_app.schedule_manager import ScheduleManager  # noqa: E402
+from tauri_app.settings_manager import SettingsManager  # noqa: E402
+
+
+class LegacyScheduleManager(ScheduleManager):
+    """ScheduleManager with the original connect-per-call behaviour."""
+
+    @contextmanager
+    def get_connection(self):
+        conn = None
+        try:
+            conn = sqlite3.connect(self.db_path)
+            self.logger.log_message("debug", f"Database connection opened: {self.db_path}")
+            yield conn
+        finally:
+            if conn:
+                conn.close()
+                self.logger.log_message("debug", "Database connection closed")
+
+
+class LegacySettingsManager(SettingsManager):
+    """SettingsManager with the original connect-per-call, uncached reads."""
+
+    def get_connection(self):
+        return sqlite3.connect(self.db_path)
+
+    def get_setting(self, key):
+        with self.get_connection() as conn:
+            cur = conn.cursor()
+            cur.execute("SELECT value FROM settings WHERE key=?", (key,))
+            row = cur.fetchone()
+            return row[0] if row else None
+
+
+def prepare_db(path: Path) -> None:
+    """Create the schema and a small realistic timetable."""
+    _db.DB_PATH = path
+    _db.init_db()
+    manager = ScheduleManager(path)
+    settings = SettingsManager(path, None)
+    settings.initialize_defaults()
+    for i in range(12):
+        course_id = manager.add_course(f"Course {i}", f"Teacher {i}", f"Room {i}")
+        for day in range(1, 6):
+            manager.add_schedule_entry(course_id, day, f"{8 + i % 10:02d}:00", f"{8 + i % 10:02d}:45",
+                                       weeks=list(range(1, 17)))
+
+
+def run(iterations: int) -> None:
+    quiet_logs()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "bench.db"
+        prepare_db(path)
+
+        variants = {
+            "before (connect per call)": (LegacyScheduleManager(path), LegacySettingsManager(path, None)),
+            "after (pooled, WAL, cached settings)": (ScheduleManager(path), SettingsManager(path, None)),
+        }
+
+        rows = []
+        for label, (schedule, settings) in variants.items():
+            course_id = schedule.get_courses()[0]["id"]
+            get_setting = ops_per_sec(lambda i: settings.get_setting("reminder_minutes"), iterations)
+            by_day = ops_per_sec(lambda i: schedule.get_schedule_by_day(i % 7 + 1, 3), iterations)
+            add_entry = ops_per_sec(
+                lambda i: schedule.add_schedule_entry(course_id, 6 + i % 2, "20:00", "20:45", [i % 20 + 1]),
+                max(1, iterations // 4),
+            )
+            rows.append((label, f"{get_setting:,.0f}", f"{by_day:,.0f}", f"{add_entry:,.0f}"))
+
+        print_table(
+            f"ops/sec ({iterations} iterations, {len(schedule.get_schedule())} schedule rows at end)",
+            rows,
+            ["variant", "get_setting", "get_schedule_by_day", "add_schedule_entry"],
+        )
+        print(f"settings cache: {settings.get_cache_stats()}")
+        get_pool(path).close_all()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=2000)
+    run(parser.parse_args().iterations)
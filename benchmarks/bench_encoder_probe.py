@@ -0,0 +1,130 @@
+"""Benchmark: encoder detection at camera-monitor startup.
+
+ffmpeg is replaced by a local stub script that answers ``-version`` and
+``-encoders`` like a build with NVENC, QSV, AMF and x264/x265 compiled in,
+and takes a fixed time per hardware test encode (NVENC works, QSV and AMF
+fail after their driver gives up), on top of its own process start-up.
+Compares:
+
+- legacy: ``ffmpeg -encoders`` once per candidate codec, then the hardware
+          test encodes one after another
+- cold:   encoder list parsed once, test encodes in parallel, results cached
+- warm:   second start with the cache file in place (no probing)
+
+    python benchmarks/bench_encoder_probe.py [--repeat 3] [--nvenc-ms 700]
+"""
+import argparse
+import os
+import stat
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from _common import use_tauri_app, print_table
+
+use_tauri_app()
+
+STUB = '''\
+import sys, time
+args = sys.argv[1:]
+if "-version" in args:
+    print("ffmpeg version 7.1-stub Copyright (c) 2000-2024 the FFmpeg developers")
+    sys.exit(0)
+if "-encoders" in args:
+    time.sleep({list_ms} / 1000)
+    print("Encoders:")
+    print(" V..... = Video")
+    print(" ------")
+    for name in ("libx264", "libx265", "h264_amf", "h264_nvenc", "h264_qsv",
+                 "hevc_amf", "hevc_nvenc", "hevc_qsv", "mjpeg", "aac"):
+        print(" V....D " + name.ljust(20) + " stub encoder")
+    sys.exit(0)
+codec = args[args.index("-c:v") + 1]
+delays = {{"nvenc": {nvenc_ms}, "qsv": {qsv_ms}, "amf": {amf_ms}}}
+for vendor, delay in delays.items():
+    if vendor in codec:
+        time.sleep(delay / 1000)
+        sys.exit(0 if vendor == "nvenc" else 1)
+sys.exit(0)
+'''
+
+
+def make_stub(directory, **delays):
+    """Write the stub as an executable ``ffmpeg`` and return its path."""
+    script = Path(directory) / "ffmpeg_stub.py"
+    script.write_text(STUB.format(**delays))
+    if sys.platform == "win32":
+        exe = Path(directory) / "ffmpeg.bat"
+        exe.write_text(f'@"{sys.executable}" "{script}" %*\n')
+    else:
+        exe = Path(directory) / "ffmpeg"
+        exe.write_text(f"#!/bin/sh\nexec '{sys.executable}' '{script}' \"$@\"\n")
+        exe.chmod(exe.stat().st_mode | stat.S_IEXEC)
+    return str(exe)
+
+
+def legacy_detect(ffmpeg):
+    """The old EncoderDetector.detect_encoders, with the ffmpeg path swapped in."""
+    from tauri_app.camera_monitor.encoder_detector import ENCODER_TYPES
+
+    encoders = []
+    for codec_name, codec_type, description in ENCODER_TYPES:
+        result = subprocess.run([ffmpeg, "-hide_banner", "-encoders"], capture_output=True, text=True, timeout=5)
+        if codec_name not in result.stdout:
+            continue
+        if "lib" not in codec_name:
+            test_cmd = [ffmpeg, "-f", "lavfi", "-i", "nullsrc=s=256x256:d=0.1",
+                        "-c:v", codec_name, "-f", "null", "-"]
+            if subprocess.run(test_cmd, capture_output=True, text=True, timeout=10).returncode != 0:
+                continue
+        encoders.append(codec_name)
+    return encoders
+
+
+def measure(mode, ffmpeg, cache_file):
+    from tauri_app.camera_monitor import EncoderDetector
+
+    start = time.perf_counter()
+    if mode == "legacy":
+        names = legacy_detect(ffmpeg)
+    else:
+        detector = EncoderDetector(ffmpeg=ffmpeg, cache_file=cache_file)
+        names = [e["name"] for e in detector.detect_encoders()]
+    return (time.perf_counter() - start) * 1000, names
+
+
+def run(repeat, list_ms, nvenc_ms, qsv_ms, amf_ms):
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        ffmpeg = make_stub(tmp, list_ms=list_ms, nvenc_ms=nvenc_ms, qsv_ms=qsv_ms, amf_ms=amf_ms)
+        cache_file = os.path.join(tmp, "encoder_cache.json")
+
+        results = {"legacy": [], "cold": [], "warm": []}
+        found = {}
+        for _ in range(repeat):
+            for mode in ("legacy", "cold", "warm"):
+                if mode == "cold" and os.path.exists(cache_file):
+                    os.remove(cache_file)
+                elapsed, names = measure(mode, ffmpeg, cache_file)
+                results[mode].append(elapsed)
+                found[mode] = names
+
+        for mode, times in results.items():
+            rows.append((mode, f"{min(times):.0f}", f"{sum(times) / len(times):.0f}", ", ".join(found[mode])))
+
+    print_table(f"stub ffmpeg: -encoders {list_ms} ms, NVENC test {nvenc_ms} ms, QSV fails after {qsv_ms} ms, "
+                f"AMF fails after {amf_ms} ms (plus process start-up); best/mean of {repeat}", rows,
+                ["mode", "best ms", "mean ms", "encoders found"])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--list-ms", type=int, default=60)
+    parser.add_argument("--nvenc-ms", type=int, default=700)
+    parser.add_argument("--qsv-ms", type=int, default=1500)
+    parser.add_argument("--amf-ms", type=int, default=400)
+    opts = parser.parse_args()
+    run(opts.repeat, opts.list_ms, opts.nvenc_ms, opts.qsv_ms, opts.amf_ms)
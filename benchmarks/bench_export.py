@@ -0,0 +1,108 @@
+"""Benchmark: peak memory of the in-memory export vs. the streaming exporter.
+
+Exports a generated timetable with the original build-everything-then-dumps
+code and with ``iter_export``/``write_export``, and reports tracemalloc
+peaks. The streaming peak should stay flat as the timetable grows.
+
+    python benchmarks/bench_export.py [--entries 2000 10000 40000]
+"""
+import argparse
+import csv
+import gzip
+import io
+import json
+import tempfile
+import tracemalloc
+from pathlib import Path
+
+from _common import use_tauri_app, quiet_logs, print_table
+
+use_tauri_app()
+
+from tauri_app import db as _db  # noqa: E402
+from tauri_app.db_pool import get_pool  # noqa: E402
+from tauri_app.schedule_io import iter_export, parse_import, write_export  # noqa: E402
+from tauri_app.schedule_manager import ScheduleManager  # noqa: E402
+
+
+def legacy_export(manager: ScheduleManager, format: str) -> str:
+    """The original export_schedule_data body (courses + schedule)."""
+    data_dict = {'courses': manager.get_courses(), 'schedule': manager.get_schedule(week=None)}
+    if format == 'json':
+        return json.dumps(data_dict, ensure_ascii=False, indent=2)
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(['course_id', 'course_name', 'teacher', 'location', 'color',
+                     'day_of_week', 'start_time', 'end_time', 'weeks', 'note'])
+    for entry in data_dict['schedule']:
+        writer.writerow([entry.get('course_id', ''), entry.get('course_name', ''), entry.get('teacher', ''),
+                         entry.get('location', ''), entry.get('color', ''), entry.get('day_of_week', ''),
+                         entry.get('start_time', ''), entry.get('end_time', ''),
+                         json.dumps(entry.get('weeks', [])), entry.get('note', '')])
+    return output.getvalue()
+
+
+def populate(manager: ScheduleManager, entries: int) -> None:
+    courses = [{"key": i, "name": f"Course {i}", "teacher": f"Teacher {i % 40}",
+                "location": f"Room {i % 90}", "color": "#6750A4"} for i in range(500)]
+    rows = [{"course_key": i % 500, "day_of_week": i % 7 + 1, "start_time": f"{8 + i % 12:02d}:00",
+             "end_time": f"{8 + i % 12:02d}:45", "weeks": list(range(1, 17)), "note": f"note {i}"}
+            for i in range(entries)]
+    manager.bulk_import(courses, rows, replace_existing=True)
+
+
+def peak_mib(fn) -> float:
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak / 1024 / 1024
+
+
+def check_round_trip(manager: ScheduleManager, out: Path) -> None:
+    """Streamed json/csv exports must import back to the same schedule."""
+    def snapshot():
+        return sorted((e["course_name"], e["day_of_week"], e["start_time"], e["weeks"], e["note"])
+                      for e in manager.get_schedule())
+
+    expected = snapshot()
+    for format in ('json', 'csv'):
+        write_export(out, iter_export(manager, format), compress=True)
+        text = gzip.decompress(out.read_bytes()).decode('utf-8')
+        manager.bulk_import(*parse_import(format, text), replace_existing=True)
+        assert snapshot() == expected, format
+    write_export(out, iter_export(manager, 'jsonl'))
+    lines = [json.loads(line) for line in out.read_text(encoding='utf-8').splitlines()]
+    assert sum(line["type"] == "schedule" for line in lines) == len(expected)
+
+
+def run(sizes) -> None:
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "bench.db"
+        _db.DB_PATH = path
+        _db.init_db()
+        quiet_logs()
+        manager = ScheduleManager(path)
+        out = Path(tmp) / "export.out"
+
+        populate(manager, 200)
+        check_round_trip(manager, out)
+
+        for entries in sizes:
+            populate(manager, entries)
+            for format in ('json', 'csv'):
+                legacy = peak_mib(lambda: out.write_text(legacy_export(manager, format), encoding='utf-8'))
+                streamed = peak_mib(lambda: write_export(out, iter_export(manager, format)))
+                compressed = peak_mib(lambda: write_export(out, iter_export(manager, format), compress=True))
+                rows.append((entries, format, f"{legacy:.1f}", f"{streamed:.2f}", f"{compressed:.2f}"))
+        get_pool(path).close_all()
+
+    print_table("Export to file: peak traced memory (MiB)", rows,
+                ["entries", "format", "in-memory", "streamed", "streamed + gzip"])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, nargs="+", default=[2000, 10000, 40000])
+    run(parser.parse_args().entries)
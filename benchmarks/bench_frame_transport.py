@@ -0,0 +1,186 @@
+"""Benchmark: camera preview throughput, base64-in-JSON vs. binary frame messages.
+
+Starts the LMS app on a local port, connects one synthetic camera client and
+several viewers, and pushes frames through it in three modes:
+
+- legacy:  JSON/base64 client, LMS re-serializing JSON for every viewer, with
+           permessage-deflate negotiated on every connection (old path)
+- compat:  older JSON/base64 client against the current LMS, which converts
+           the frame to binary once and no longer deflates
+- binary:  binary frame client without compression, LMS forwarding the
+           message unchanged
+
+A second run adds one slow viewer (reading 20 frames/s). The old broadcast
+awaited every viewer in turn, so it stalls everyone; the per-viewer queues
+drop frames for the slow viewer only.
+
+    python benchmarks/bench_frame_transport.py [--frames 500] [--viewers 4] [--size 60000]
+"""
+import argparse
+import asyncio
+import base64
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+
+from _common import use_lms, use_tauri_app, print_table
+
+use_lms()
+use_tauri_app()
+
+
+def legacy_manager_class(base):
+    """The original WebSocketManager frame path: receive_json and send_json per viewer, in turn."""
+    from fastapi import WebSocketDisconnect
+
+    class LegacyWebSocketManager(base):
+        async def add_viewer(self, websocket, viewer_id, client_uuid):
+            await websocket.accept()
+            self.viewers[viewer_id] = {'websocket': websocket, 'watching_client': client_uuid}
+
+        def remove_viewer(self, viewer_id):
+            self.viewers.pop(viewer_id, None)
+
+        async def listen_to_client(self, client_uuid):
+            websocket = self.active_connections.get(client_uuid)
+            try:
+                while True:
+                    message = await websocket.receive_json()
+                    if message.get("type") == "camera_frame":
+                        await self.legacy_broadcast(client_uuid, message)
+                    else:
+                        await self.handle_message(client_uuid, message)
+            except WebSocketDisconnect:
+                self.disconnect(client_uuid)
+
+        async def legacy_broadcast(self, client_uuid, frame_message):
+            for viewer_id, viewer_info in list(self.viewers.items()):
+                if viewer_info['watching_client'] == client_uuid:
+                    await viewer_info['websocket'].send_json({
+                        'type': 'camera_frame',
+                        'client_uuid': client_uuid,
+                        'camera_index': frame_message.get('camera_index'),
+                        'frame': frame_message.get('frame')
+                    })
+
+    return LegacyWebSocketManager
+
+
+def import_lms():
+    """Import the LMS app inside a temp directory (it creates lms.db in the cwd)."""
+    os.chdir(tempfile.mkdtemp())
+    os.mkdir("static")
+    import main
+    logging.disable(logging.INFO)
+    return main
+
+
+def serve(app, deflate):
+    """Serve the app on a free local port and return the port."""
+    import uvicorn
+
+    config = uvicorn.Config(app, host="127.0.0.1", port=0, log_level="warning", ws_per_message_deflate=deflate)
+    server = uvicorn.Server(config)
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return server.servers[0].sockets[0].getsockname()[1]
+
+
+async def run_mode(port, mode, frames, viewers, payload, slow_viewers=0, viewer_stats=None):
+    import websockets
+    from tauri_app.frame_protocol import decode_frame, encode_frame
+
+    client_uuid = f"bench-{mode}-{slow_viewers}"
+    base = f"ws://127.0.0.1:{port}"
+    # Viewers offer permessage-deflate like browsers do; the server decides
+    viewer_sockets = [await websockets.connect(f"{base}/ws/viewer/{client_uuid}/v{i}", max_size=None)
+                      for i in range(viewers + slow_viewers)]
+    compression = None if mode == "binary" else "deflate"
+    client = await websockets.connect(f"{base}/ws/{client_uuid}", max_size=None, compression=compression)
+    received = {"frames": 0, "bytes": 0}
+
+    async def drain(ws):
+        # Binary frames may be dropped for a lagging viewer, so read until the last sequence number
+        for count in range(1, frames + 1):
+            message = await ws.recv()
+            received["frames"] += 1
+            received["bytes"] += len(message)
+            last = count if isinstance(message, str) else decode_frame(message)[0].seq + 1
+            if last == frames:
+                return
+
+    async def slow_drain(ws):
+        while True:
+            await ws.recv()
+            await asyncio.sleep(1 / 20)
+
+    sent_bytes = 0
+    start = time.perf_counter()
+    readers = [asyncio.create_task(drain(ws)) for ws in viewer_sockets[:viewers]]
+    slow_readers = [asyncio.create_task(slow_drain(ws)) for ws in viewer_sockets[viewers:]]
+    for seq in range(frames):
+        if mode == "binary":
+            message = encode_frame(0, seq, payload)
+        else:
+            # What the old client did per frame: base64, then json.dumps
+            message = json.dumps({'type': 'camera_frame', 'camera_index': 0,
+                                  'frame': base64.b64encode(payload).decode('utf-8')})
+        sent_bytes += len(message)
+        await client.send(message)
+    await asyncio.wait_for(asyncio.gather(*readers), timeout=300)
+    elapsed = time.perf_counter() - start
+
+    for task in slow_readers:
+        task.cancel()
+    stats = viewer_stats(client_uuid) if viewer_stats else None
+    await client.close()
+    for ws in viewer_sockets:
+        await ws.close()
+    delivered = received["frames"] / viewers
+    return {
+        "delivered_fps": delivered / elapsed,
+        "dropped": 1 - delivered / frames,
+        "upstream": sent_bytes / frames,
+        "downstream": received["bytes"] / received["frames"],
+        "slow_dropped": sum(v["frames_dropped"] for v in stats["viewers"][viewers:]) if stats else 0,
+    }
+
+
+def run(frames, viewers, size):
+    main = import_lms()
+    new_manager = main.manager
+    legacy_manager = legacy_manager_class(type(new_manager))()
+    payload = os.urandom(size)
+    ports = {True: serve(main.app, deflate=True), False: serve(main.app, deflate=False)}
+
+    rows, slow_rows = [], []
+    for mode in ("legacy", "compat", "binary"):
+        main.manager = legacy_manager if mode == "legacy" else new_manager
+        port = ports[mode == "legacy"]
+        result = asyncio.run(run_mode(port, mode, frames, viewers, payload))
+        rows.append((mode, f"{result['delivered_fps']:.0f}", f"{result['dropped']:.0%}",
+                     f"{result['upstream'] / 1024:.1f}", f"{result['downstream'] / 1024:.1f}"))
+        if mode != "compat":
+            stats = None if mode == "legacy" else new_manager.get_viewer_stats
+            result = asyncio.run(run_mode(port, mode, frames, viewers, payload, 1, stats))
+            slow_rows.append((mode, f"{result['delivered_fps']:.0f}", f"{result['dropped']:.0%}",
+                              result["slow_dropped"]))
+
+    print_table(f"{frames} frames of {size / 1024:.0f} KiB pushed as fast as possible to {viewers} viewers "
+                f"through a local LMS", rows,
+                ["mode", "frames/s per viewer", "dropped", "KiB/frame client->LMS", "KiB/frame LMS->viewer"])
+    print_table("Same, plus one viewer reading 20 frames/s", slow_rows,
+                ["mode", "frames/s per fast viewer", "dropped (fast)", "dropped (slow viewer)"])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--frames", type=int, default=500)
+    parser.add_argument("--viewers", type=int, default=4)
+    parser.add_argument("--size", type=int, default=60000, help="JPEG payload size in bytes")
+    opts = parser.parse_args()
+    run(opts.frames, opts.viewers, opts.size)
@@ -0,0 +1,117 @@
+"""Benchmark: schedule import, one add_course/add_schedule_entry per row vs. bulk_import.
+
+    python benchmarks/bench_import.py [--rows 3000]
+"""
+import argparse
+import csv
+import io
+import json
+import random
+import tempfile
+from collections import Counter
+from pathlib import Path
+
+from _common import use_tauri_app, quiet_logs, timed, print_table
+
+use_tauri_app()
+
+from tauri_app import db as _db  # noqa: E402
+from tauri_app.db_pool import get_pool  # noqa: E402
+from tauri_app.schedule_io import parse_import  # noqa: E402
+from tauri_app.schedule_manager import ScheduleManager  # noqa: E402
+
+
+class CountingEvents:
+    """Stand-in for the Tauri event handler that counts emitted events."""
+
+    def __init__(self):
+        self.counts = Counter()
+
+    def __getattr__(self, name):
+        if not name.startswith("emit_"):
+            raise AttributeError(name)
+        return lambda *args, **kwargs: self.counts.update([name])
+
+
+def make_csv(rows: int, courses: int = 300) -> str:
+    rng = random.Random(1)
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(['course_id', 'course_name', 'teacher', 'location', 'color',
+                     'day_of_week', 'start_time', 'end_time', 'weeks', 'note'])
+    for i in range(rows):
+        hour = rng.randint(7, 20)
+        start_week = rng.randint(1, 16)
+        writer.writerow(['', f"Course {i % courses}", f"Teacher {i % 50}", f"Room {i % 80}", '#6750A4',
+                         rng.randint(1, 7), f"{hour:02d}:00", f"{hour:02d}:45",
+                         json.dumps(list(range(start_week, start_week + 4))), ''])
+    return output.getvalue()
+
+
+def legacy_import(data: str) -> None:
+    """The original CSV branch of import_schedule_data (replace_existing=True)."""
+    for course in _db.get_courses():
+        _db.delete_course(course['id'])
+
+    course_map = {}
+    for row in csv.DictReader(io.StringIO(data)):
+        course_name = row.get('course_name', '').strip()
+        if not course_name:
+            continue
+        if course_name not in course_map:
+            course_id = _db.add_course(name=course_name, teacher=row.get('teacher'),
+                                       location=row.get('location'), color=row.get('color'))
+            if course_id > 0:
+                course_map[course_name] = course_id
+        else:
+            course_id = course_map[course_name]
+        weeks_str = row.get('weeks', '[]')
+        weeks = json.loads(weeks_str) if weeks_str else None
+        _db.add_schedule_entry(course_id=course_id, day_of_week=int(row.get('day_of_week', 1)),
+                               start_time=row.get('start_time'), end_time=row.get('end_time'),
+                               weeks=weeks, note=row.get('note'))
+
+
+def bulk_import(manager: ScheduleManager, data: str) -> None:
+    courses, entries = parse_import('csv', data)
+    manager.bulk_import(courses, entries, replace_existing=True)
+
+
+def snapshot(manager: ScheduleManager):
+    return sorted((e["course_name"], e["day_of_week"], e["start_time"], e["end_time"], tuple(e["weeks"]))
+                  for e in manager.get_schedule())
+
+
+def run(rows: int) -> None:
+    data = make_csv(rows)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "bench.db"
+        _db.DB_PATH = path
+        _db.init_db()
+        quiet_logs()
+
+        events = CountingEvents()
+        manager = ScheduleManager(path, events)
+        _db.set_schedule_manager(manager)
+
+        legacy_import(data)
+        expected, legacy_events = snapshot(manager), sum(events.counts.values())
+        events.counts.clear()
+        bulk_import(manager, data)
+        assert snapshot(manager) == expected
+        bulk_events = sum(events.counts.values())
+
+        before = timed(lambda: legacy_import(data), repeat=1)
+        after = timed(lambda: bulk_import(manager, data), repeat=3)
+        print_table(f"CSV import of {rows} rows (replace_existing=True)", [
+            ("per-row add_* calls", f"{before:.0f}", legacy_events),
+            ("bulk_import", f"{after:.0f}", bulk_events),
+        ], ["path", "ms", "events emitted"])
+        print(f"speedup: {before / after:.0f}x")
+        get_pool(path).close_all()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=3000)
+    run(parser.parse_args().rows)
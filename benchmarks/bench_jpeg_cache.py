@@ -0,0 +1,176 @@
+"""Benchmark: JPEG encoding of preview frames with several concurrent readers.
+
+N reader threads each poll ``get_frame()`` at the preview rate while a
+synthetic camera delivers frames. Compares:
+
+- legacy:  every call runs cv2.imencode while holding the frame lock the
+           capture thread needs to publish the next frame
+- cached:  frames carry a sequence number; the first reader encodes outside
+           any lock and the others get the cached bytes
+
+"stall" is how long the capture thread waited for the lock before it could
+publish a frame.
+
+    python benchmarks/bench_jpeg_cache.py [--readers 1 4 8] [--seconds 3]
+"""
+import argparse
+import threading
+import time
+
+import cv2
+
+from _common import use_tauri_app, print_table
+
+use_tauri_app()
+
+
+class TimedLock:
+    """A Lock that records how long the capture thread waited to acquire it."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.capture_thread = None
+        self.waits = []
+
+    def acquire(self, blocking=True, timeout=-1):
+        # Non-blocking attempts are Condition's ownership checks, not waits
+        if not blocking or threading.current_thread() is not self.capture_thread:
+            return self._lock.acquire(blocking, timeout)
+        start = time.perf_counter()
+        acquired = self._lock.acquire(blocking, timeout)
+        self.waits.append(time.perf_counter() - start)
+        return acquired
+
+    def release(self):
+        self._lock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+class LegacyStreamer:
+    """The old VideoStreamer frame path: capture thread plus lock-held encode."""
+
+    def __init__(self, source, quality):
+        self.source = source
+        self.quality = quality
+        self.frame_lock = TimedLock()
+        self.current_frame = None
+        self.is_streaming = False
+        self.encodes = 0
+
+    def start_streaming(self):
+        self.source.open()
+        self.is_streaming = True
+        self.thread = threading.Thread(target=self._capture_frames, daemon=True)
+        self.frame_lock.capture_thread = self.thread
+        self.thread.start()
+
+    def _capture_frames(self):
+        while self.is_streaming:
+            frame = self.source.read()
+            with self.frame_lock:
+                self.current_frame = frame
+
+    def get_frame(self):
+        with self.frame_lock:
+            if self.current_frame is not None:
+                ret, buffer = cv2.imencode('.jpg', self.current_frame, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+                self.encodes += 1
+                if ret:
+                    return buffer.tobytes()
+        return None
+
+    def stop_streaming(self):
+        self.is_streaming = False
+        self.thread.join()
+
+
+def run_readers(get_frame, readers, seconds, rate):
+    calls = [0] * readers
+    stop = time.perf_counter() + seconds
+
+    def reader(i):
+        interval = 1.0 / rate
+        next_at = time.perf_counter()
+        while time.perf_counter() < stop:
+            if get_frame():
+                calls[i] += 1
+            next_at += interval
+            delay = next_at - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+
+    threads = [threading.Thread(target=reader, args=(i,)) for i in range(readers)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return sum(calls)
+
+
+def measure(mode, readers, seconds, width, height, fps, rate):
+    from tauri_app.camera_monitor import MonitorConfig, SyntheticSource, VideoStreamer
+
+    source = SyntheticSource(width, height, fps)
+    config = MonitorConfig.create_default()
+    config.recording.create_dir = False
+    if mode == "legacy":
+        streamer = LegacyStreamer(source, config.streaming.jpeg_quality)
+        streamer.start_streaming()
+        lock = streamer.frame_lock
+    else:
+        streamer = VideoStreamer("synthetic", 0, config=config, source=source)
+        streamer.start_streaming()
+        lock = TimedLock()
+        lock.capture_thread = streamer.hub._thread
+        streamer.hub._lock = lock
+        streamer.hub._frame_ready = threading.Condition(lock)
+
+    time.sleep(0.2)
+    lock.waits.clear()
+    encodes_before = streamer.encodes if mode == "legacy" else streamer.jpeg_cache.encodes
+    calls = run_readers(streamer.get_frame, readers, seconds, rate)
+    encodes = (streamer.encodes if mode == "legacy" else streamer.jpeg_cache.encodes) - encodes_before
+    waits = sorted(lock.waits)
+    captured = len(waits)
+    streamer.stop_streaming()
+
+    return {
+        "calls": calls / seconds,
+        "encodes": encodes / seconds,
+        "captured": captured / seconds,
+        "stall_total": sum(waits) / seconds * 1000,
+        "stall_p99": waits[int(len(waits) * 0.99)] * 1000 if waits else 0.0,
+        "stall_max": waits[-1] * 1000 if waits else 0.0,
+    }
+
+
+def run(readers_list, seconds, width, height, fps, rate):
+    rows = []
+    for readers in readers_list:
+        for mode in ("legacy", "cached"):
+            r = measure(mode, readers, seconds, width, height, fps, rate)
+            rows.append((readers, mode, f"{r['calls']:.0f}", f"{r['encodes']:.0f}", f"{r['captured']:.1f}",
+                         f"{r['stall_total']:.1f}", f"{r['stall_p99']:.2f}", f"{r['stall_max']:.2f}"))
+
+    print_table(f"{width}x{height}@{fps} synthetic camera, each reader calling get_frame() at {rate}/s "
+                f"for {seconds}s", rows,
+                ["readers", "mode", "frames read/s", "encodes/s", "captured fps",
+                 "stall ms/s", "stall p99 ms", "stall max ms"])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--readers", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--seconds", type=float, default=3)
+    parser.add_argument("--width", type=int, default=1280)
+    parser.add_argument("--height", type=int, default=720)
+    parser.add_argument("--fps", type=int, default=30)
+    parser.add_argument("--rate", type=int, default=30, help="get_frame() calls per second per reader")
+    opts = parser.parse_args()
+    run(opts.readers, opts.seconds, opts.width, opts.height, opts.fps, opts.rate)
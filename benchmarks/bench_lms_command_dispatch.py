@@ -0,0 +1,138 @@
+"""Benchmark: dashboard polling through the LMS settings API.
+
+Serves the LMS app on a local port and connects ``--clients`` real
+``WebSocketClient`` instances (in a separate process, with a settings
+manager whose reads take ``--work-ms``). Each round, ``--tabs`` dashboard
+tabs poll every client's ``/api/settings/{uuid}`` and two single settings at
+once; the endpoint handlers run on the server's event loop directly, so
+HTTP parsing does not hide the command round trips. Compares:
+
+- legacy:    every REST call sends its own command frame and the client
+             answers each one
+- coalesced: identical in-flight commands share one request, and the
+             commands for one client go out in one ``batch`` frame
+
+    python benchmarks/bench_lms_command_dispatch.py [--clients 100] [--tabs 5] [--rounds 5]
+"""
+import argparse
+import asyncio
+import functools
+import multiprocessing
+import threading
+import time
+
+from _common import use_lms, use_tauri_app, quiet_logs, print_table
+from bench_frame_transport import import_lms
+
+use_lms()
+
+KEYS = ("theme_mode", "server_url")
+
+
+def run_clients(port, clients, work_ms, ready, stop):
+    """Connect ``clients`` ClassTop WebSocket clients and serve commands until ``stop`` is set."""
+    use_tauri_app()
+    from tauri_app.websocket_client import WebSocketClient
+    quiet_logs()
+
+    class Settings:
+        def get_all_settings(self):
+            time.sleep(work_ms / 1000)  # a SQLite read on the client
+            return {key: "value" for key in KEYS}
+
+        def get_setting(self, key):
+            time.sleep(work_ms / 1000)
+            return "value"
+
+    async def main():
+        instances = [WebSocketClient(f"http://127.0.0.1:{port}", f"client-{i:04d}", Settings(), None)
+                     for i in range(clients)]
+        for client in instances:
+            client.heartbeat_interval = 3600
+            await client.start()
+        ready.set()
+        await asyncio.get_running_loop().run_in_executor(None, stop.wait)
+        for client in instances:
+            await client.stop()
+
+    asyncio.run(main())
+
+
+def serve(app):
+    """Serve the app on a free local port; return the port and the server's event loop."""
+    import uvicorn
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=0, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    listener = server.servers[0]
+    return listener.sockets[0].getsockname()[1], listener.get_loop()
+
+
+async def poll(uuids, tabs, rounds):
+    from api import settings
+
+    latencies = []
+    for _ in range(rounds):
+        calls = [settings.get_settings(uuid) for uuid in uuids for _ in range(tabs)]
+        calls += [settings.get_setting(uuid, key) for uuid in uuids for key in KEYS for _ in range(tabs)]
+        start = time.perf_counter()
+        await asyncio.gather(*calls)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def run(clients, tabs, rounds, work_ms):
+    main = import_lms()
+    manager = main.manager
+    port, loop = serve(main.app)
+    send_command = manager.send_command
+
+    ready, stop = multiprocessing.Event(), multiprocessing.Event()
+    process = multiprocessing.Process(target=run_clients, args=(port, clients, work_ms, ready, stop))
+    process.start()
+    ready.wait()
+    while sum(1 for info in manager.get_online_clients().values() if info.capabilities) < clients:
+        time.sleep(0.05)
+    uuids = sorted(manager.active_connections)
+    capabilities = {uuid: manager.clients[uuid].capabilities for uuid in uuids}
+
+    rows = []
+    for mode in ("legacy", "coalesced"):
+        if mode == "legacy":
+            # What send_command did before: no sharing, one frame per command
+            manager.send_command = functools.partial(send_command, coalesce=False)
+            for uuid in uuids:
+                manager.clients[uuid].capabilities = []
+        else:
+            manager.send_command = send_command
+            for uuid in uuids:
+                manager.clients[uuid].capabilities = capabilities[uuid]
+
+        before = manager.get_command_stats()
+        latencies = asyncio.run_coroutine_threadsafe(poll(uuids, tabs, rounds), loop).result()
+        after = manager.get_command_stats()
+        delta = {key: after[key] - before[key] for key in before}
+        frames = delta["sent"] - delta["batched_commands"] + delta["batches"]
+        calls = len(uuids) * (1 + len(KEYS)) * tabs * rounds
+        latencies.sort()
+        rows.append((mode, calls, delta["sent"], frames, delta["coalesced"],
+                     f"{latencies[len(latencies) // 2] * 1000:.0f}", f"{latencies[-1] * 1000:.0f}"))
+
+    stop.set()
+    process.join()
+    print_table(f"{tabs} tabs polling {clients} clients ({1 + len(KEYS)} settings calls each, "
+                f"{work_ms} ms per client read), {rounds} rounds", rows,
+                ["mode", "API calls", "commands run on clients", "command frames", "coalesced",
+                 "round p50 ms", "round max ms"])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=100)
+    parser.add_argument("--tabs", type=int, default=5)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--work-ms", type=float, default=2.0)
+    opts = parser.parse_args()
+    run(opts.clients, opts.tabs, opts.rounds, opts.work_ms)
@@ -0,0 +1,141 @@
+"""Benchmark: pushing a setting to every classroom through the LMS.
+
+Serves the LMS app on a local port and connects ``--clients`` real
+``WebSocketClient`` instances in a separate process. Each client answers a
+command after ``--rtt-ms`` (network and client-side latency); the
+``--stragglers`` slowest never answer in time. Compares:
+
+- per-client: ``POST /api/settings/{uuid}/batch`` once per client, one
+              after another (what pushing to every classroom took before)
+- fleet:      one ``POST /api/fleet/command`` with the online selector,
+              results streamed back as NDJSON
+
+    python benchmarks/bench_lms_fleet_command.py [--clients 500] [--rtt-ms 50] [--stragglers 5]
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import time
+
+from _common import use_lms, use_tauri_app, quiet_logs, print_table
+from bench_frame_transport import import_lms
+from bench_lms_command_dispatch import serve
+
+use_lms()
+
+STRAGGLER_DELAY = 30.0
+# Timeout of a per-client settings call (the send_command default)
+PER_CLIENT_TIMEOUT = 30.0
+SETTINGS = {"theme_mode": "dark"}
+
+
+def run_clients(port, clients, rtt, stragglers, ready, stop):
+    """Connect ``clients`` ClassTop WebSocket clients that answer after ``rtt`` seconds."""
+    use_tauri_app()
+    from tauri_app.websocket_client import WebSocketClient
+    quiet_logs()
+
+    class Settings:
+        def get_all_settings(self):
+            return dict(SETTINGS)
+
+        def update_multiple(self, settings):
+            return True
+
+    class SlowClient(WebSocketClient):
+        delay = rtt
+
+        async def _run_command(self, data):
+            await asyncio.sleep(self.delay)
+            return await super()._run_command(data)
+
+    async def main():
+        instances = [SlowClient(f"http://127.0.0.1:{port}", f"client-{i:04d}", Settings(), None)
+                     for i in range(clients)]
+        for client in instances[:stragglers]:
+            client.delay = STRAGGLER_DELAY
+        for client in instances:
+            client.heartbeat_interval = 3600
+            await client.start()
+        ready.set()
+        await asyncio.get_running_loop().run_in_executor(None, stop.wait)
+        for client in instances:
+            await client.stop()
+
+    asyncio.run(main())
+
+
+async def per_client(port, uuids, timeout):
+    import httpx
+
+    start = time.perf_counter()
+    first = None
+    ok = 0
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=timeout + 5) as client:
+        for uuid in uuids:
+            response = await client.post(f"/api/settings/{uuid}/batch", json={"settings": SETTINGS})
+            first = first or time.perf_counter() - start
+            ok += response.status_code == 200
+    return first, time.perf_counter() - start, ok
+
+
+async def fleet(port, timeout):
+    import httpx
+
+    body = {"command": "update_settings_batch", "params": {"settings": SETTINGS},
+            "selector": {"type": "online"}, "timeout": timeout}
+    start = time.perf_counter()
+    first = None
+    ok = 0
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=timeout + 5) as client:
+        async with client.stream("POST", "/api/fleet/command", json=body) as response:
+            async for line in response.aiter_lines():
+                record = json.loads(line)
+                if record["type"] == "result":
+                    first = first or time.perf_counter() - start
+                    ok += record["success"]
+    return first, time.perf_counter() - start, ok
+
+
+def run(clients, rtt_ms, stragglers, timeout, sequential_sample):
+    main = import_lms()
+    manager = main.manager
+    port, _ = serve(main.app)
+
+    ready, stop = multiprocessing.Event(), multiprocessing.Event()
+    process = multiprocessing.Process(target=run_clients,
+                                      args=(port, clients, rtt_ms / 1000, stragglers, ready, stop))
+    process.start()
+    ready.wait()
+    while len(manager.get_online_clients()) < clients:
+        time.sleep(0.05)
+    # Per-client pushes are timed on the healthy clients only (a straggler would cost a full timeout each)
+    healthy = sorted(manager.active_connections)[stragglers:]
+
+    rows = []
+    sample = healthy[:sequential_sample]
+    first, total, ok = asyncio.run(per_client(port, sample, timeout))
+    estimate = total / len(sample) * (clients - stragglers) + stragglers * PER_CLIENT_TIMEOUT
+    rows.append(("per-client", f"{len(sample)} of {clients}", f"{first * 1000:.0f}", f"{total * 1000:.0f}",
+                 f"{estimate:.1f}", ok))
+    first, total, ok = asyncio.run(fleet(port, timeout))
+    rows.append(("fleet", clients, f"{first * 1000:.0f}", f"{total * 1000:.0f}", f"{total:.1f}", ok))
+
+    stop.set()
+    process.join()
+    print_table(f"update_settings_batch to {clients} clients ({rtt_ms} ms RTT, {stragglers} stragglers, "
+                f"{timeout}s per-client timeout)", rows,
+                ["mode", "clients pushed", "first result ms", "elapsed ms", "all clients s (est.)", "succeeded"])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=500)
+    parser.add_argument("--rtt-ms", type=float, default=50)
+    parser.add_argument("--stragglers", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=2.0, help="per-client timeout of the fleet command")
+    parser.add_argument("--sequential-sample", type=int, default=50,
+                        help="clients pushed one by one; the rest is extrapolated")
+    opts = parser.parse_args()
+    run(opts.clients, opts.rtt_ms, opts.stragglers, opts.timeout, opts.sequential_sample)
@@ -0,0 +1,125 @@
+"""Benchmark: LMS /health latency during a flood of client connects and disconnects.
+
+Serves the LMS app on a local port. Flood workers in a separate process
+connect a client WebSocket, close it and reconnect at a fixed total rate
+(each connect and disconnect writes client status and a connection log),
+while a poller requests ``/health`` every few milliseconds. Compares:
+
+- legacy: handlers call the database directly on the event loop; every
+          write commits there and every read shares one connection
+- async:  handlers await ``LMSRepository``: reads on reader threads,
+          writes through the write queue's single writer thread
+
+    python benchmarks/bench_lms_health_latency.py [--rate 150] [--workers 50] [--seconds 5]
+"""
+import argparse
+import asyncio
+import multiprocessing
+import time
+
+from _common import use_lms, print_table
+from bench_frame_transport import import_lms, serve
+from bench_lms_write_queue import legacy_database
+
+use_lms()
+
+
+class LegacyRepository:
+    """The old handlers' behaviour behind the repository interface: blocking calls on the loop."""
+
+    def __init__(self, db):
+        self.db = db
+
+    async def get_config(self, key):
+        return self.db.get_config(key)
+
+    async def register_client(self, uuid, name, ip, metadata=None):
+        self.db.register_client(uuid, name, ip, metadata)
+
+    async def update_client_status(self, uuid, status):
+        self.db.update_client_status(uuid, status)
+
+    async def log_connection(self, uuid, event_type, ip):
+        self.db.log_connection(uuid, event_type, ip)
+
+    def get_write_stats(self):
+        return {"depth": 0}
+
+
+def flood(port, workers, rate, seconds, result):
+    """Connect and close client WebSockets, ``rate`` times a second in total."""
+    import websockets
+
+    async def worker(i, stop, cycles):
+        interval = workers / rate
+        next_at = time.perf_counter() + i * interval / workers
+        while time.perf_counter() < stop:
+            await asyncio.sleep(max(0.0, next_at - time.perf_counter()))
+            next_at += interval
+            ws = await websockets.connect(f"ws://127.0.0.1:{port}/ws/flood-{i:04d}")
+            await ws.close()
+            cycles[0] += 1
+
+    async def main():
+        cycles = [0]
+        stop = time.perf_counter() + seconds
+        await asyncio.gather(*(worker(i, stop, cycles) for i in range(workers)))
+        return cycles[0]
+
+    result.put(asyncio.run(main()))
+
+
+async def poll(port, seconds, poll_interval):
+    import httpx
+
+    latencies = []
+    stop = time.perf_counter() + seconds
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}") as client:
+        while time.perf_counter() < stop:
+            start = time.perf_counter()
+            response = await client.get("/health")
+            response.raise_for_status()
+            latencies.append(time.perf_counter() - start)
+            await asyncio.sleep(poll_interval)
+    return sorted(latencies)
+
+
+def flood_and_poll(port, workers, rate, seconds, poll_interval):
+    # The flood runs in another process so its handshakes do not compete
+    # with the server for this interpreter
+    result = multiprocessing.Queue()
+    flooder = multiprocessing.Process(target=flood, args=(port, workers, rate, seconds, result))
+    flooder.start()
+    latencies = asyncio.run(poll(port, seconds, poll_interval))
+    cycles = result.get()
+    flooder.join()
+    return cycles, latencies
+
+
+def run(workers, rate, seconds, poll_interval):
+    main = import_lms()
+    port = serve(main.app, deflate=False)
+    new_repo = main.repo
+    legacy_repo = LegacyRepository(legacy_database("legacy.db"))
+
+    rows = []
+    for mode in ("legacy", "async"):
+        main.repo = legacy_repo if mode == "legacy" else new_repo
+        cycles, latencies = flood_and_poll(port, workers, rate, seconds, poll_interval)
+        pct = lambda p: latencies[min(int(len(latencies) * p), len(latencies) - 1)] * 1000
+        rows.append((mode, f"{cycles / seconds:.0f}", len(latencies), f"{pct(0.5):.1f}",
+                     f"{pct(0.99):.1f}", f"{latencies[-1] * 1000:.1f}"))
+
+    print_table(f"/health every {poll_interval * 1000:.0f} ms while {workers} clients connect and disconnect "
+                f"(target {rate}/s) for {seconds}s", rows,
+                ["mode", "connect+disconnect/s", "/health requests", "p50 ms", "p99 ms", "max ms"])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=50)
+    parser.add_argument("--rate", type=float, default=150, help="connect+disconnect cycles per second")
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--poll-interval", type=float, default=0.005)
+    opts = parser.parse_args()
+    run(opts.workers, opts.rate, opts.seconds, opts.poll_interval)
@@ -0,0 +1,192 @@
+"""Benchmark: LMS log queries and retention on a large log history.
+
+Fills ``command_logs``, ``connection_logs`` and ``cctv_logs`` with 60 days of
+synthetic rows for a few hundred clients, then compares:
+
+- legacy: the old schema (no indexes, no rollups); ``get_client_stats``
+          aggregates ``command_logs`` and retention is one big DELETE
+- indexed: ``LMSDatabase`` on the same data after upgrade (client/time
+          indexes, backfilled rollups, chunked ``prune``)
+
+Also reports the one-off upgrade time and the cost of the rollup trigger on
+``log_command`` writes.
+
+    python benchmarks/bench_lms_log_queries.py [--commands 500000] [--clients 300]
+"""
+import argparse
+import os
+import random
+import shutil
+import sqlite3
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+from _common import use_lms, timed, print_table
+
+use_lms()
+
+DAYS = 60
+CLEANUP_SQL = """
+    DROP TRIGGER IF EXISTS trg_command_logs_rollup;
+    DROP TABLE IF EXISTS command_stats_hourly;
+    DROP TABLE IF EXISTS command_stats_daily;
+    DROP TABLE IF EXISTS command_stats;
+    DROP INDEX IF EXISTS idx_connection_logs_client_time;
+    DROP INDEX IF EXISTS idx_connection_logs_time;
+    DROP INDEX IF EXISTS idx_command_logs_client_time;
+    DROP INDEX IF EXISTS idx_command_logs_time;
+    DROP INDEX IF EXISTS idx_cctv_logs_client_time;
+    DROP INDEX IF EXISTS idx_cctv_logs_time;
+"""
+LEGACY_STATS_SQL = """
+    SELECT
+        COUNT(*) as total_commands,
+        SUM(CASE WHEN success = 1 THEN 1 ELSE 0 END) as successful_commands,
+        MAX(executed_at) as last_command_time
+    FROM command_logs
+    WHERE client_uuid = ?
+"""
+HISTORY_SQL = """
+    SELECT command, params, response, success, executed_at
+    FROM command_logs WHERE client_uuid = ? ORDER BY executed_at DESC LIMIT 50
+"""
+CCTV_SQL = """
+    SELECT event_type, camera_id, details, created_at
+    FROM cctv_logs WHERE client_uuid = ? ORDER BY created_at DESC LIMIT 100
+"""
+
+
+def build_legacy(path, commands, clients):
+    """A database with the old schema and ``commands`` command log rows."""
+    from db import LMSDatabase
+
+    db = LMSDatabase(path)
+    db.close()
+    conn = sqlite3.connect(path)
+    conn.executescript(CLEANUP_SQL)
+
+    rng = random.Random(1)
+    now = datetime.now(timezone.utc)
+    uuids = [f"client-{i:04d}" for i in range(clients)]
+
+    def stamps(count):
+        # Logs are appended as they happen, so rowid order follows time order
+        offsets = sorted((rng.uniform(0, DAYS * 86400) for _ in range(count)), reverse=True)
+        return [(now - timedelta(seconds=s)).strftime("%Y-%m-%d %H:%M:%S") for s in offsets]
+
+    with conn:
+        conn.executemany(
+            "INSERT INTO command_logs (client_uuid, command, params, response, success, executed_at) "
+            "VALUES (?, 'get_all_settings', '{}', '{}', ?, ?)",
+            ((rng.choice(uuids), rng.random() < 0.95, ts) for ts in stamps(commands)))
+        conn.executemany(
+            "INSERT INTO connection_logs (client_uuid, event_type, ip_address, connected_at) "
+            "VALUES (?, 'connected', '10.0.0.1', ?)",
+            ((rng.choice(uuids), ts) for ts in stamps(commands // 2)))
+        conn.executemany(
+            "INSERT INTO cctv_logs (client_uuid, event_type, camera_id, details, created_at) "
+            "VALUES (?, 'recording_started', '0', '{}', ?)",
+            ((rng.choice(uuids), ts) for ts in stamps(commands // 2)))
+    conn.close()
+    return uuids
+
+
+def query_times(conn, uuids, stats):
+    rng = random.Random(2)
+    sample = [rng.choice(uuids) for _ in range(20)]
+    per = lambda fn: timed(lambda: [fn(u) for u in sample], repeat=3) / len(sample)
+    return (
+        per(stats),
+        per(lambda u: conn.execute(HISTORY_SQL, (u,)).fetchall()),
+        per(lambda u: conn.execute(CCTV_SQL, (u,)).fetchall()),
+    )
+
+
+def write_times(db_factory, rows):
+    """ms per ``command_logs`` insert, committed in one transaction."""
+    directory = tempfile.mkdtemp()
+    try:
+        conn = db_factory(os.path.join(directory, "w.db"))
+        start = time.perf_counter()
+        with conn:
+            conn.executemany(
+                "INSERT INTO command_logs (client_uuid, command, params, response, success, executed_at) "
+                "VALUES (?, 'ping', '{}', '{}', 1, ?)",
+                ((f"client-{i % 300:04d}", "2026-01-01 10:00:00") for i in range(rows)))
+        elapsed = time.perf_counter() - start
+        conn.close()
+        return elapsed / rows * 1000
+    finally:
+        shutil.rmtree(directory)
+
+
+def run(commands, clients):
+    from db import LMSDatabase
+
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_path = os.path.join(tmp, "legacy.db")
+        new_path = os.path.join(tmp, "lms.db")
+        uuids = build_legacy(legacy_path, commands, clients)
+        shutil.copy(legacy_path, new_path)
+
+        # Old schema, old queries
+        legacy = sqlite3.connect(legacy_path)
+        legacy_q = query_times(legacy, uuids, lambda u: legacy.execute(LEGACY_STATS_SQL, (u,)).fetchone())
+
+        # Upgrade: indexes + rollup backfill on first open
+        start = time.perf_counter()
+        db = LMSDatabase(new_path)
+        upgrade = (time.perf_counter() - start) * 1000
+        new_q = query_times(db.conn, uuids, db.get_client_stats)
+
+        # Retention of the older half: one DELETE per table vs. chunked prune
+        cutoff = (datetime.now(timezone.utc) - timedelta(days=30)).strftime("%Y-%m-%d %H:%M:%S")
+        start = time.perf_counter()
+        with legacy:
+            for table, column in (("connection_logs", "connected_at"), ("command_logs", "executed_at"),
+                                  ("cctv_logs", "created_at")):
+                legacy.execute(f"DELETE FROM {table} WHERE {column} < ?", (cutoff,))
+        legacy_prune = (time.perf_counter() - start) * 1000
+        legacy.close()
+
+        db.retention = {"connection_logs": 30, "command_logs": 30, "cctv_logs": 30,
+                        "command_stats_hourly": 14, "command_stats_daily": 400}
+        start = time.perf_counter()
+        deleted = db.prune()
+        new_prune = (time.perf_counter() - start) * 1000
+        stats = db.get_write_stats()
+        db.close()
+
+    rows = [
+        ("legacy", *(f"{ms:.2f}" for ms in legacy_q), "-", f"{legacy_prune:.0f}", f"{legacy_prune:.0f}"),
+        ("indexed", *(f"{ms:.3f}" for ms in new_q), f"{upgrade:.0f}", f"{new_prune:.0f}",
+         f"{stats['commit_ms_max']:.0f}"),
+    ]
+    print_table(f"{commands} command logs, {clients} clients, {DAYS} days "
+                f"(prune deleted {sum(deleted.values())} rows)", rows,
+                ["schema", "get_client_stats ms", "get_command_history ms", "get_cctv_events ms",
+                 "upgrade ms", "prune ms", "longest writer transaction ms"])
+
+    def legacy_factory(path):
+        conn = sqlite3.connect(path)
+        conn.execute("CREATE TABLE command_logs (id INTEGER PRIMARY KEY AUTOINCREMENT, client_uuid TEXT, "
+                     "command TEXT, params TEXT, response TEXT, success BOOLEAN, executed_at TIMESTAMP)")
+        return conn
+
+    def new_factory(path):
+        LMSDatabase(path).close()
+        return sqlite3.connect(path)
+
+    print_table("command_logs insert cost (20k rows, one transaction)", [
+        ("legacy", f"{write_times(legacy_factory, 20000) * 1000:.1f}"),
+        ("indexed + rollup trigger", f"{write_times(new_factory, 20000) * 1000:.1f}"),
+    ], ["schema", "us/row"])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--commands", type=int, default=500000)
+    parser.add_argument("--clients", type=int, default=300)
+    opts = parser.parse_args()
+    run(opts.commands, opts.clients)
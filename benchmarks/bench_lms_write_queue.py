@@ -0,0 +1,156 @@
+"""Benchmark: LMS database writes when 2,000 clients connect at once.
+
+Every client runs what ``main.websocket_endpoint`` does on connect
+(``register_client`` + ``log_connection``) as a task on one event loop,
+while a ticker task measures how late the loop wakes it up (the stall all
+other WebSocket traffic sees). Compares:
+
+- legacy: each call runs its statement and commits on the event loop
+          (rollback journal, one fsync per commit)
+- queued: calls go to the write queue; a writer thread commits them in
+          batches (WAL)
+
+"durable" is the time until every write is committed (after ``flush()``).
+Use ``--dir`` to put the database on the disk the LMS would use; a tmpfs
+/tmp hides most of the fsync cost.
+
+    python benchmarks/bench_lms_write_queue.py [--clients 2000] [--dir .]
+"""
+import argparse
+import asyncio
+import os
+import sqlite3
+import tempfile
+import time
+
+from _common import use_lms, print_table
+
+use_lms()
+
+TICK = 0.001
+
+
+def legacy_database(db_path):
+    """LMSDatabase with the old commit-per-call write methods."""
+    from db import LMSDatabase
+
+    class LegacyDatabase(LMSDatabase):
+        conn = None  # one shared connection instead of one per thread
+
+        def __init__(self, path):
+            self.db_path = path
+            self.conn = sqlite3.connect(path, check_same_thread=False)
+            self.conn.row_factory = sqlite3.Row
+            self.init_db()
+
+        def register_client(self, uuid, name, ip, metadata=None):
+            cursor = self.conn.cursor()
+            cursor.execute("""
+                INSERT OR REPLACE INTO clients (uuid, name, ip_address, last_seen, status, metadata)
+                VALUES (?, ?, ?, CURRENT_TIMESTAMP, 'online', ?)
+            """, (uuid, name, ip, None))
+            self.conn.commit()
+
+        def log_connection(self, uuid, event_type, ip):
+            cursor = self.conn.cursor()
+            cursor.execute("""
+                INSERT INTO connection_logs (client_uuid, event_type, ip_address)
+                VALUES (?, ?, ?)
+            """, (uuid, event_type, ip))
+            self.conn.commit()
+
+        def update_client_status(self, uuid, status):
+            cursor = self.conn.cursor()
+            cursor.execute("""
+                UPDATE clients SET status = ?, last_seen = CURRENT_TIMESTAMP
+                WHERE uuid = ?
+            """, (status, uuid))
+            self.conn.commit()
+
+        def flush(self, timeout=None):
+            return True
+
+        def get_write_stats(self):
+            return {}
+
+        def close(self):
+            self.conn.close()
+
+    return LegacyDatabase(db_path)
+
+
+async def connect_storm(db, clients):
+    lags = []
+    done = asyncio.Event()
+
+    async def ticker():
+        while not done.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(TICK)
+            lags.append(time.perf_counter() - start - TICK)
+
+    async def client(i):
+        uuid = f"client-{i:05d}"
+        ip = f"10.0.{i // 250}.{i % 250}"
+        db.register_client(uuid, f"Client-{uuid[:8]}", ip)
+        db.log_connection(uuid, "connected", ip)
+        await asyncio.sleep(0)  # manager.connect() awaits the WebSocket accept
+
+    tick_task = asyncio.create_task(ticker())
+    await asyncio.sleep(0.05)
+    lags.clear()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client(i) for i in range(clients)))
+    handled = time.perf_counter() - start
+    await asyncio.to_thread(db.flush)
+    durable = time.perf_counter() - start
+
+    done.set()
+    await tick_task
+    return handled, durable, sorted(lags)
+
+
+def measure(mode, clients, directory):
+    from db import LMSDatabase
+
+    with tempfile.TemporaryDirectory(dir=directory) as tmp:
+        path = os.path.join(tmp, "lms.db")
+        db = legacy_database(path) if mode == "legacy" else LMSDatabase(path)
+        handled, durable, lags = asyncio.run(connect_storm(db, clients))
+        stats = db.get_write_stats()
+        db.close()
+
+        check = sqlite3.connect(path)
+        rows = check.execute("SELECT COUNT(*) FROM connection_logs").fetchone()[0]
+        check.close()
+
+    return {
+        "handled": handled * 1000,
+        "durable": durable * 1000,
+        "lag_p99": lags[int(len(lags) * 0.99)] * 1000 if lags else 0.0,
+        "lag_max": lags[-1] * 1000 if lags else 0.0,
+        "batches": stats.get("batches", clients * 2),
+        "max_depth": stats.get("max_depth", 0),
+        "rows": rows,
+    }
+
+
+def run(clients, directory):
+    rows = []
+    for mode in ("legacy", "queued"):
+        r = measure(mode, clients, directory)
+        rows.append((mode, f"{r['handled']:.0f}", f"{r['durable']:.0f}", f"{r['lag_p99']:.1f}",
+                     f"{r['lag_max']:.1f}", r["batches"], r["max_depth"], r["rows"]))
+
+    print_table(f"{clients} clients connecting at once (database in {directory or tempfile.gettempdir()})", rows,
+                ["mode", "all handled ms", "durable ms", "loop lag p99 ms", "loop lag max ms",
+                 "commits", "max queue depth", "connection_logs rows"])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=2000)
+    parser.add_argument("--dir", default=None, help="directory for the temporary database")
+    opts = parser.parse_args()
+    run(opts.clients, opts.dir)
@@ -0,0 +1,191 @@
+"""Benchmark: a classroom of clients previewing at once over one shared link.
+
+Simulates N clients (default 60) sending preview frames to the LMS through a
+bottleneck link shared fairly between them (default 50 Mbit/s). Each client
+is modelled like the real preview path: the preview loop hands frames to a
+one-slot mailbox, the sender paces to its measured send time, and, in
+adaptive mode, a real ``PreviewController`` picks the tier from the sender's
+stats. Frame sizes per tier come from encoding camera-sized scene frames.
+
+Reported per mode:
+- frames/s and KiB per frame each client delivers
+- frame send time (how stale a frame is when it reaches the LMS)
+- command delay: how long a command response waits behind the frame that
+  is being sent when it is ready (what makes LMS commands time out)
+
+    python benchmarks/bench_preview_adaptive.py [--clients 60] [--mbps 50] [--seconds 60]
+"""
+import argparse
+import random
+from collections import Counter
+
+from _common import use_tauri_app, print_table, scene_frames
+
+use_tauri_app()
+
+STEP = 0.005
+
+
+class SimClock:
+    """Stands in for the ``time`` module inside preview_controller."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def monotonic(self):
+        return self.now
+
+
+class SimClient:
+    """One client's preview loop, frame sender and (optionally) controller."""
+
+    def __init__(self, controller, options, fps, frame_bytes, start):
+        from tauri_app.websocket_client import PREVIEW_SEND_BUDGET, MIN_PREVIEW_FPS, SEND_TIME_SMOOTHING
+
+        self.budget, self.min_fps, self.smoothing = PREVIEW_SEND_BUDGET, MIN_PREVIEW_FPS, SEND_TIME_SMOOTHING
+        self.controller = controller
+        self.options, self.fps = options, fps
+        self.frame_bytes = frame_bytes
+        self.next_offer = start
+        self.mailbox = None          # (bytes, queued_at)
+        self.sending = None          # [remaining bytes, size, started_at]
+        self.last_send = -1.0
+        self.stats = {"frames_in": 0, "frames_sent": 0, "frames_dropped": 0, "bytes_sent": 0,
+                      "send_time_avg_ms": 0.0, "queue_latency_avg_ms": 0.0, "write_buffer": 0}
+        self.send_times = []
+
+    @property
+    def min_interval(self):
+        return min(self.stats["send_time_avg_ms"] / 1000 / self.budget, 1.0 / self.min_fps)
+
+    def tick(self, now):
+        # Preview loop: offer a frame, let the controller decide, pace the next one
+        if now >= self.next_offer:
+            self.stats["frames_in"] += 1
+            if self.mailbox is not None:
+                self.stats["frames_dropped"] += 1
+            self.mailbox = (self.frame_bytes(self.options), now)
+            if self.controller and self.controller.update(self.stats):
+                self.options, self.fps = self.controller.current()
+            self.next_offer = now + max(1.0 / self.fps, self.min_interval)
+
+        # Sender: start the mailbox frame once paced
+        if self.sending is None and self.mailbox and now >= self.last_send + self.min_interval:
+            size, queued_at = self.mailbox
+            self.mailbox = None
+            self.sending = [size, size, now]
+            self.last_send = now
+            a = self.smoothing
+            self.stats["queue_latency_avg_ms"] = (1 - a) * self.stats["queue_latency_avg_ms"] + a * (now - queued_at) * 1000
+
+    def finish(self, now):
+        _, size, started = self.sending
+        self.sending = None
+        a = self.smoothing
+        self.stats["send_time_avg_ms"] = (1 - a) * self.stats["send_time_avg_ms"] + a * (now - started) * 1000
+        self.stats["frames_sent"] += 1
+        self.stats["bytes_sent"] += size
+        self.send_times.append(now - started)
+
+
+def frame_size_table(width, height, default_quality):
+    """Encoded bytes for a set of preview options (memoised)."""
+    from tauri_app.camera_monitor.capture import EncodedFrameCache
+
+    frames = scene_frames(3, width, height)
+    sizes = {}
+
+    def frame_bytes(options):
+        key = (options.width, options.height, options.quality or default_quality)
+        if key not in sizes:
+            cache = EncodedFrameCache()
+            encoded = [len(cache.get(f, seq, key[2], options.size)) for seq, f in enumerate(frames)]
+            sizes[key] = sum(encoded) // len(encoded)
+        return sizes[key]
+
+    return frame_bytes
+
+
+def simulate(adaptive, clients, link_bytes, seconds, fps, width, height, quality):
+    from tauri_app import preview_controller
+    from tauri_app.camera_monitor import PreviewOptions
+
+    clock = SimClock()
+    preview_controller.time = clock
+    frame_bytes = frame_size_table(width, height, quality)
+    rng = random.Random(1)
+
+    sims = []
+    for _ in range(clients):
+        options = PreviewOptions(quality=quality)
+        controller = preview_controller.PreviewController(options, fps, (width, height), quality) \
+            if adaptive else None
+        current = controller.current() if controller else (options, fps)
+        sims.append(SimClient(controller, current[0], current[1], frame_bytes, rng.random() / fps))
+
+    command_delays = []
+    next_probe = [rng.random() for _ in sims]
+    while clock.now < seconds:
+        now = clock.now
+        for i, sim in enumerate(sims):
+            sim.tick(now)
+        active = [sim for sim in sims if sim.sending]
+        share = link_bytes * STEP / len(active) if active else 0
+
+        # A command response becomes ready once a second per client and waits for the current frame
+        for i, sim in enumerate(sims):
+            if now >= next_probe[i]:
+                next_probe[i] += 1.0
+                if sim.sending:
+                    command_delays.append(sim.sending[0] / (link_bytes / len(active)))
+                else:
+                    command_delays.append(0.0)
+
+        for sim in active:
+            sim.sending[0] -= share
+            if sim.sending[0] <= 0:
+                sim.finish(now + STEP)
+        clock.now += STEP
+
+    # Report the second half, after the controllers settled
+    sent = sum(sim.stats["frames_sent"] for sim in sims)
+    send_times = sorted(t for sim in sims for t in sim.send_times[len(sim.send_times) // 2:])
+    delays = sorted(command_delays)
+    tiers = Counter(sim.controller.tier for sim in sims) if adaptive else Counter({0: clients})
+    return {
+        "fps": sent / clients / seconds,
+        "kib": sum(sim.stats["bytes_sent"] for sim in sims) / max(sent, 1) / 1024,
+        "send_p50": send_times[len(send_times) // 2] * 1000 if send_times else 0,
+        "send_p95": send_times[int(len(send_times) * 0.95)] * 1000 if send_times else 0,
+        "cmd_p95": delays[int(len(delays) * 0.95)] * 1000,
+        "cmd_max": delays[-1] * 1000,
+        "tiers": ", ".join(f"{tier}:{count}" for tier, count in sorted(tiers.items())),
+    }
+
+
+def run(clients, mbps, seconds, fps, width, height, quality):
+    link_bytes = mbps * 1e6 / 8
+    rows = []
+    for adaptive in (False, True):
+        r = simulate(adaptive, clients, link_bytes, seconds, fps, width, height, quality)
+        rows.append(("adaptive" if adaptive else "fixed", f"{r['fps']:.2f}", f"{r['kib']:.1f}",
+                     f"{r['send_p50']:.0f}", f"{r['send_p95']:.0f}", f"{r['cmd_p95']:.0f}",
+                     f"{r['cmd_max']:.0f}", r["tiers"]))
+
+    print_table(f"{clients} clients previewing {width}x{height} at up to {fps} fps, quality {quality}, "
+                f"over a shared {mbps} Mbit/s link for {seconds}s", rows,
+                ["mode", "frames/s per client", "KiB/frame", "send p50 ms", "send p95 ms",
+                 "command delay p95 ms", "command delay max ms", "final tiers (tier:clients)"])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=60)
+    parser.add_argument("--mbps", type=float, default=50)
+    parser.add_argument("--seconds", type=float, default=60)
+    parser.add_argument("--fps", type=int, default=10)
+    parser.add_argument("--width", type=int, default=1280)
+    parser.add_argument("--height", type=int, default=1080)
+    parser.add_argument("--quality", type=int, default=80)
+    opts = parser.parse_args()
+    run(opts.clients, opts.mbps, opts.seconds, opts.fps, opts.width, opts.height, opts.quality)
@@ -0,0 +1,60 @@
+"""Benchmark: preview frame size and encode time per preview-session options.
+
+Encodes camera-sized frames (default 1280x1080) with the preview pipeline
+(ROI crop, INTER_AREA scaling, grayscale, JPEG) for the settings a dashboard
+would use, from full-resolution frames down to a wall of thumbnails. The
+frames are smoothed noise, which compresses roughly like a classroom scene
+rather than like a flat test pattern.
+
+    python benchmarks/bench_preview_options.py [--frames 50]
+"""
+import argparse
+import time
+
+from _common import use_tauri_app, print_table, scene_frames
+
+use_tauri_app()
+
+
+def run(count, width, height, quality):
+    from tauri_app.camera_monitor import PreviewOptions
+    from tauri_app.camera_monitor.capture import EncodedFrameCache
+
+    frames = scene_frames(count, width, height)
+    cases = [
+        ("full frame", None),
+        ("width=640", PreviewOptions(width=640)),
+        ("width=320, quality=60", PreviewOptions(width=320, quality=60)),
+        ("width=320, quality=60, grayscale", PreviewOptions(width=320, quality=60, grayscale=True)),
+        ("roi=centre quarter, width=320", PreviewOptions(width=320, roi=(0.25, 0.25, 0.5, 0.5))),
+    ]
+
+    rows = []
+    baseline = None
+    for name, opts in cases:
+        cache = EncodedFrameCache()
+        encoding = (quality, None, None, False) if opts is None else \
+            (opts.quality or quality, opts.size, opts.roi, opts.grayscale)
+        total_bytes = 0
+        start = time.perf_counter()
+        for seq, frame in enumerate(frames):
+            total_bytes += len(cache.get(frame, seq, *encoding))
+        elapsed = (time.perf_counter() - start) / count
+        size = total_bytes / count
+        if baseline is None:
+            baseline = (size, elapsed)
+        rows.append((name, f"{size / 1024:.1f}", f"{elapsed * 1000:.2f}",
+                     f"{baseline[0] / size:.1f}x", f"{baseline[1] / elapsed:.1f}x"))
+
+    print_table(f"{count} frames of {width}x{height}, default JPEG quality {quality}", rows,
+                ["preview options", "KiB/frame", "encode ms/frame", "bytes saved", "CPU saved"])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--frames", type=int, default=50)
+    parser.add_argument("--width", type=int, default=1280)
+    parser.add_argument("--height", type=int, default=1080)
+    parser.add_argument("--quality", type=int, default=80)
+    opts = parser.parse_args()
+    run(opts.frames, opts.width, opts.height, opts.quality)
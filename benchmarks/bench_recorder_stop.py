@@ -0,0 +1,102 @@
+"""Benchmark: stopping a pipe recording, with ffmpeg alive and after it died.
+
+Records a ``SyntheticSource`` through ``FFmpegPipeRecorder`` into a stub
+ffmpeg that reads raw frames from stdin. Compares:
+
+- healthy: the stub reads until stdin closes, as ffmpeg finalizing a file
+- died:    the stub exits ``--die-after`` seconds into the recording (a
+           crashed encoder or an unplugged disk)
+
+and reports how long ``stop()`` takes. ``stop()`` used to block forever in
+the second case: the writer thread had exited on the broken pipe, the frame
+queue filled up, and nothing took the stop sentinel off it. The script exits
+non-zero if ``stop()`` does not return within ``--limit`` seconds.
+
+    python benchmarks/bench_recorder_stop.py [--record 3] [--die-after 1]
+"""
+import argparse
+import os
+import stat
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from _common import use_tauri_app, print_table
+
+use_tauri_app()
+
+STUB = '''\
+import sys, time
+die_after = {die_after}
+start = time.monotonic()
+while sys.stdin.buffer.read(1 << 20):
+    if die_after and time.monotonic() - start > die_after:
+        sys.exit(1)
+'''
+
+
+def make_stub(directory, die_after):
+    """Write the stub as an executable ``ffmpeg`` and return its path."""
+    script = Path(directory) / f"ffmpeg_stub_{die_after}.py"
+    script.write_text(STUB.format(die_after=die_after))
+    if sys.platform == "win32":
+        exe = Path(directory) / f"ffmpeg_{die_after}.bat"
+        exe.write_text(f'@"{sys.executable}" "{script}" %*\n')
+    else:
+        exe = Path(directory) / f"ffmpeg_{die_after}"
+        exe.write_text(f"#!/bin/sh\nexec '{sys.executable}' '{script}' \"$@\"\n")
+        exe.chmod(exe.stat().st_mode | stat.S_IEXEC)
+    return str(exe)
+
+
+def measure(ffmpeg, output, record, limit):
+    """Record for ``record`` seconds, then time ``stop()`` (None if it did not return)."""
+    from tauri_app.camera_monitor.capture import CaptureHub, FFmpegPipeRecorder, SyntheticSource
+
+    hub = CaptureHub(SyntheticSource(640, 480, 30))
+    hub.start()
+    recorder = FFmpegPipeRecorder(hub, output, [], ffmpeg=ffmpeg)
+    try:
+        if not recorder.start():
+            raise SystemExit("stub ffmpeg did not start")
+        time.sleep(record)
+        writer_alive = recorder._writer.is_alive()
+
+        stopper = threading.Thread(target=recorder.stop, daemon=True)
+        start = time.perf_counter()
+        stopper.start()
+        stopper.join(limit)
+        elapsed = None if stopper.is_alive() else time.perf_counter() - start
+        return elapsed, writer_alive, recorder.get_stats()
+    finally:
+        hub.stop()
+
+
+def run(record, die_after, limit):
+    rows = []
+    hung = False
+    with tempfile.TemporaryDirectory() as tmp:
+        output = os.path.join(tmp, "out.mp4")
+        for mode, delay in (("healthy", 0), ("died", die_after)):
+            elapsed, writer_alive, stats = measure(make_stub(tmp, delay), output, record, limit)
+            hung = hung or elapsed is None
+            rows.append((mode, "yes" if writer_alive else "no",
+                         f"> {limit * 1000:.0f} (hung)" if elapsed is None else f"{elapsed * 1000:.0f}",
+                         stats["frames_written"], stats["frames_dropped"], stats["queued"]))
+
+    print_table(f"640x480 @ 30 fps recorded for {record} s into a stub ffmpeg "
+                f"(the died case exits after {die_after} s)", rows,
+                ["mode", "writer alive at stop", "stop() ms", "frames written", "frames dropped", "queued after"])
+    if hung:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--record", type=float, default=3.0, help="seconds recorded before stop()")
+    parser.add_argument("--die-after", type=float, default=1.0, help="seconds until the stub exits")
+    parser.add_argument("--limit", type=float, default=15.0, help="seconds stop() may take")
+    opts = parser.parse_args()
+    run(opts.record, opts.die_after, opts.limit)
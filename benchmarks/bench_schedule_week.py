@@ -0,0 +1,78 @@
+"""Benchmark: get_schedule_for_week as seven per-day queries vs. one query.
+
+    python benchmarks/bench_schedule_week.py [--entries 40]
+"""
+import argparse
+import sqlite3
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+
+from _common import use_tauri_app, quiet_logs, timed, print_table
+
+use_tauri_app()
+
+from tauri_app import db as _db  # noqa: E402
+from tauri_app.db_pool import get_pool  # noqa: E402
+from tauri_app.schedule_manager import ScheduleManager  # noqa: E402
+
+
+class LegacyScheduleManager(ScheduleManager):
+    """Original loop: one get_schedule_by_day round trip per day."""
+
+    def get_schedule_for_week(self, week=None, group_by_day=False):
+        all_classes = []
+        for day in range(1, 8):
+            all_classes.extend(self.get_schedule_by_day(day, week))
+        return all_classes
+
+
+class LegacyConnectScheduleManager(LegacyScheduleManager):
+    """Per-day loop with the original connect-per-call connections."""
+
+    @contextmanager
+    def get_connection(self):
+        conn = sqlite3.connect(self.db_path)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+
+def run(entries: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "bench.db"
+        _db.DB_PATH = path
+        _db.init_db()
+        quiet_logs()
+
+        manager = ScheduleManager(path)
+        course_ids = [manager.add_course(f"Course {i}") for i in range(20)]
+        for i in range(entries):
+            hour = 8 + i % 12
+            manager.add_schedule_entry(course_ids[i % 20], i % 7 + 1, f"{hour:02d}:00", f"{hour:02d}:45",
+                                       weeks=[w for w in range(1, 21) if w % 2 == i % 2])
+
+        legacy = LegacyScheduleManager(path)
+        legacy_connect = LegacyConnectScheduleManager(path)
+        assert legacy.get_schedule_for_week(3) == manager.get_schedule_for_week(3)
+
+        rows = []
+        for week in (None, 3):
+            original = timed(lambda: legacy_connect.get_schedule_for_week(week), repeat=5, number=50)
+            before = timed(lambda: legacy.get_schedule_for_week(week), repeat=5, number=50)
+            after = timed(lambda: manager.get_schedule_for_week(week), repeat=5, number=50)
+            grouped = timed(lambda: manager.get_schedule_for_week(week, group_by_day=True), repeat=5, number=50)
+            rows.append((str(week), f"{original:.3f}", f"{before:.3f}", f"{after:.3f}", f"{grouped:.3f}",
+                         f"{original / after:.1f}x", f"{before / after:.1f}x"))
+
+        print_table(f"get_schedule_for_week latency, {entries} entries (ms per call)", rows,
+                    ["week", "7 queries (connect/call)", "7 queries (pooled)", "1 query", "1 query grouped",
+                     "vs connect/call", "vs pooled"])
+        get_pool(path).close_all()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, default=40)
+    run(parser.parse_args().entries)
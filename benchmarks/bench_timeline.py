@@ -0,0 +1,113 @@
+"""Benchmark: current/next/last class lookups, per-call queries vs. ScheduleTimeline.
+
+    python benchmarks/bench_timeline.py [--entries 200]
+"""
+import argparse
+import random
+import tempfile
+from pathlib import Path
+
+from _common import use_tauri_app, quiet_logs, timed, print_table
+
+use_tauri_app()
+
+from tauri_app import db as _db  # noqa: E402
+from tauri_app.db_pool import get_pool  # noqa: E402
+from tauri_app.schedule_manager import ScheduleManager  # noqa: E402
+
+
+# The original db.get_current_class/get_next_class/get_last_class bodies,
+# with the clock passed in instead of read from datetime.now()
+def legacy_current(manager, day, now, week):
+    for cls in manager.get_schedule_by_day(day, week):
+        if cls["start_time"] <= now <= cls["end_time"]:
+            return cls
+    return None
+
+
+def legacy_next(manager, day, now, week):
+    for cls in manager.get_schedule_by_day(day, week):
+        if cls["start_time"] > now:
+            return cls
+    for day_offset in range(1, 8):
+        next_day = ((day - 1 + day_offset) % 7) + 1
+        classes = manager.get_schedule_by_day(next_day, week)
+        if classes:
+            return classes[0]
+    return None
+
+
+def legacy_last(manager, day, now, week):
+    last_class = None
+    for cls in manager.get_schedule_by_day(day, week):
+        if cls["end_time"] <= now:
+            last_class = cls
+        else:
+            break
+    return last_class
+
+
+def _id(cls):
+    return cls["id"] if cls else None
+
+
+def verify(manager, rng, samples=500):
+    """Check the timeline agrees with the original linear scans."""
+    timeline = manager.timeline
+    for _ in range(samples):
+        day, week = rng.randint(1, 7), rng.choice([None, 1, 2, 3])
+        now = f"{rng.randint(6, 23):02d}:{rng.randint(0, 59):02d}"
+        assert _id(timeline.current_class(day, now, week)) == _id(legacy_current(manager, day, now, week))
+        assert _id(timeline.next_class(day, now, week)) == _id(legacy_next(manager, day, now, week))
+        assert _id(timeline.last_class(day, now, week)) == _id(legacy_last(manager, day, now, week))
+
+
+def run(entries: int) -> None:
+    rng = random.Random(42)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "bench.db"
+        _db.DB_PATH = path
+        _db.init_db()
+        quiet_logs()
+
+        manager = ScheduleManager(path)
+        course_ids = [manager.add_course(f"Course {i}") for i in range(20)]
+        # Days 6-7 stay empty (mostly) so get_next_class has to walk forward
+        for i in range(entries):
+            start = rng.randint(8 * 60, 20 * 60)
+            end = start + rng.choice([45, 90, 120])
+            manager.add_schedule_entry(course_ids[i % 20], rng.randint(1, 5),
+                                       f"{start // 60:02d}:{start % 60:02d}",
+                                       f"{min(end, 23 * 60 + 59) // 60:02d}:{end % 60:02d}",
+                                       weeks=[w for w in range(1, 21) if w % 2 == i % 2] if i % 3 else None)
+
+        verify(manager, rng)
+        # Incremental updates must keep the timeline in sync
+        entry_ids = [cls["id"] for cls in manager.get_schedule()]
+        for entry_id in rng.sample(entry_ids, 10):
+            manager.delete_schedule_entry(entry_id)
+        manager.add_schedule_entry(course_ids[0], 6, "09:00", "10:00")
+        manager.update_course(course_ids[1], name="Renamed")
+        verify(manager, rng)
+
+        rows = []
+        cases = [
+            ("current_class", legacy_current, manager.timeline.current_class, (3, "10:30", 2)),
+            ("next_class (same day)", legacy_next, manager.timeline.next_class, (3, "10:30", 2)),
+            ("next_class (walk days)", legacy_next, manager.timeline.next_class, (5, "23:30", 2)),
+            ("last_class", legacy_last, manager.timeline.last_class, (3, "18:00", 2)),
+        ]
+        for name, legacy, fast, args in cases:
+            before = timed(lambda: legacy(manager, *args), repeat=5, number=200)
+            after = timed(lambda: fast(*args), repeat=5, number=200)
+            rows.append((name, f"{before * 1000:.1f}", f"{after * 1000:.1f}", f"{before / after:.0f}x"))
+
+        print_table(f"Class lookup latency, {entries} entries (us per call)", rows,
+                    ["lookup", "query + scan", "timeline", "speedup"])
+        get_pool(path).close_all()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, default=200)
+    run(parser.parse_args().entries)
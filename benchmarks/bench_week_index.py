@@ -0,0 +1,126 @@
+"""Benchmark: week filtering in Python (JSON weeks column) vs. the schedule_weeks index.
+
+Builds a 10k-entry timetable, backfills the week index through the normal
+``init_db`` migration, then times week-filtered ``get_schedule``,
+``get_schedule_by_day`` and ``check_conflicts``.
+
+    python benchmarks/bench_week_index.py [--entries 10000]
+"""
+import argparse
+import json
+import random
+import tempfile
+from pathlib import Path
+
+from _common import use_tauri_app, quiet_logs, timed, print_table
+
+use_tauri_app()
+
+from tauri_app import db as _db  # noqa: E402
+from tauri_app.db_pool import get_pool  # noqa: E402
+from tauri_app.schedule_manager import ScheduleManager  # noqa: E402
+
+
+class LegacyScheduleManager(ScheduleManager):
+    """Original implementations that parse every row's JSON weeks in Python."""
+
+    def get_schedule(self, week=None):
+        with self.get_connection() as conn:
+            cur = conn.execute("""
+                SELECT s.id, s.course_id, c.name, c.teacher, c.location, c.color,
+                       s.day_of_week, s.start_time, s.end_time, s.weeks, s.note
+                FROM schedule s JOIN courses c ON s.course_id = c.id
+                ORDER BY s.day_of_week, s.start_time
+            """)
+            result = []
+            for row in cur.fetchall():
+                weeks_list = json.loads(row[9]) if row[9] else []
+                if week is not None and weeks_list and week not in weeks_list:
+                    continue
+                result.append(row)
+            return result
+
+    def get_schedule_by_day(self, day_of_week, week=None):
+        with self.get_connection() as conn:
+            cur = conn.execute("""
+                SELECT s.id, c.name, c.teacher, c.location, s.day_of_week,
+                       s.start_time, s.end_time, s.weeks, c.color
+                FROM schedule s JOIN courses c ON s.course_id = c.id
+                WHERE s.day_of_week = ? ORDER BY s.start_time
+            """, (day_of_week,))
+            result = []
+            for row in cur.fetchall():
+                weeks_list = json.loads(row[7]) if row[7] else []
+                if week is not None and weeks_list and week not in weeks_list:
+                    continue
+                result.append(row)
+            return result
+
+    def check_conflicts(self, day_of_week, start_time, end_time, weeks=None, exclude_entry_id=None):
+        with self.get_connection() as conn:
+            cur = conn.execute("""
+                SELECT s.id, s.start_time, s.end_time, s.weeks
+                FROM schedule s JOIN courses c ON s.course_id = c.id
+                WHERE s.day_of_week = ?
+            """, (day_of_week,))
+            conflicts = []
+            for row in cur.fetchall():
+                existing_weeks = json.loads(row[3]) if row[3] else []
+                if not (end_time <= row[1] or start_time >= row[2]):
+                    if not weeks or not existing_weeks or set(weeks) & set(existing_weeks):
+                        conflicts.append(row)
+            return conflicts
+
+
+def populate(path: Path, entries: int) -> None:
+    """Insert ``entries`` schedule rows spread over 40 weeks, then run the migration."""
+    rng = random.Random(42)
+    _db.DB_PATH = path
+    _db.init_db()
+    with get_pool(path).connection() as conn:
+        conn.executemany("INSERT INTO courses (name) VALUES (?)", [(f"Course {i}",) for i in range(200)])
+        rows = []
+        for _ in range(entries):
+            hour = rng.randint(7, 20)
+            start_week = rng.randint(1, 36)
+            weeks = [] if rng.random() < 0.05 else list(range(start_week, start_week + rng.randint(1, 4)))
+            rows.append((rng.randint(1, 200), rng.randint(1, 7), f"{hour:02d}:00", f"{hour:02d}:45",
+                         json.dumps(weeks) if weeks else None))
+        conn.executemany(
+            "INSERT INTO schedule (course_id, day_of_week, start_time, end_time, weeks) VALUES (?, ?, ?, ?, ?)",
+            rows,
+        )
+        conn.commit()
+    # Second init_db run backfills schedule_weeks from the JSON column
+    _db.init_db()
+
+
+def run(entries: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "bench.db"
+        populate(path, entries)
+        quiet_logs()
+
+        legacy, indexed = LegacyScheduleManager(path), ScheduleManager(path)
+        cases = {
+            "get_schedule(week=10)": lambda m: m.get_schedule(10),
+            "get_schedule_by_day(3, week=10)": lambda m: m.get_schedule_by_day(3, 10),
+            "check_conflicts(3, 09:00-09:45, [10])": lambda m: m.check_conflicts(3, "09:00", "09:45", [10]),
+        }
+
+        rows = []
+        for label, case in cases.items():
+            assert len(case(legacy)) == len(case(indexed)), label
+            before = timed(lambda: case(legacy))
+            after = timed(lambda: case(indexed))
+            rows.append((label, len(case(indexed)), f"{before:.2f}", f"{after:.2f}", f"{before / after:.1f}x"))
+
+        print_table(f"week-filtered query latency, {entries} entries (ms, best of 5)", rows,
+                    ["query", "rows", "JSON filter", "week index", "speedup"])
+        get_pool(path).close_all()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, default=10000)
+    run(parser.parse_args().entries)
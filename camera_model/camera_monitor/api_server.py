@@ -4,7 +4,6 @@ from fastapi.responses import StreamingResponse, HTMLResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from typing import Optional, List
-import time
 import config
 
 
@@ -139,14 +138,15 @@ async def stream_video(camera_index: int):
     if not streamer.is_streaming:
         raise HTTPException(status_code=400, detail="Stream not active. Start streaming first.")
 
-    def generate():
-        """Generate MJPEG frames."""
+    async def generate():
+        """Generate MJPEG frames, one per captured frame, as each frame arrives."""
+        seq = -1
         while streamer.is_streaming:
-            frame = streamer.get_frame()
+            # The timeout only bounds how long a stopped stream keeps the response open
+            seq, frame = await streamer.wait_for_frame_async(seq, timeout=1.0)
             if frame:
                 yield (b'--frame\r\n'
                        b'Content-Type: image/jpeg\r\n\r\n' + frame + b'\r\n')
-            time.sleep(0.033)  # ~30 fps
 
     return StreamingResponse(
         generate(),
@@ -1,134 +1,312 @@
 """Camera detection using DirectShow."""
+import json
+import os
+import re
 import subprocess
-from typing import List, Dict
-from pygrabber.dshow_graph import FilterGraph
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import List, Dict, Optional, Tuple
+
+# Probed device profiles, reused on the next start and refreshed in the background
+DEFAULT_CACHE_FILE = Path.home() / ".classtop" / "camera_profiles.json"
+CACHE_VERSION = 1
+
+PROBE_TIMEOUT = 10
+MAX_PROBE_WORKERS = 4
+
+# Used when a device's options cannot be read
+DEFAULT_RESOLUTIONS = [
+    {"width": 1920, "height": 1080, "fps": [30.0]},
+    {"width": 1280, "height": 720, "fps": [30.0]},
+    {"width": 640, "height": 480, "fps": [30.0]},
+]
+
+_NO_WINDOW = subprocess.CREATE_NO_WINDOW if hasattr(subprocess, 'CREATE_NO_WINDOW') else 0
+
+# "s=1280x720 fps=30" (older builds: "fps=30.0003")
+_MODE_RE = re.compile(r"\bs=(\d+)x(\d+)\s+fps=([\d.]+)")
+# '"HD Pro Webcam C920" (video)' or, in older builds, '"HD Pro Webcam C920"' under a section heading
+_DEVICE_RE = re.compile(r'^\s*"(.+)"(?:\s+\(([^)]*)\))?\s*$')
+_ALT_NAME_RE = re.compile(r'^\s*Alternative name\s+"(.+)"\s*$')
+
+
+def _strip_log_prefix(line: str) -> str:
+    """Drop the ``[dshow @ 000001f0]`` prefix ffmpeg puts on log lines."""
+    if line.startswith("["):
+        end = line.find("]")
+        if end != -1:
+            return line[end + 1:]
+    return line
+
+
+def parse_dshow_options(output: str) -> List[Dict]:
+    """Parse ``ffmpeg -f dshow -list_options true`` output into resolutions.
+
+    Each mode line (``vcodec=mjpeg  min s=1280x720 fps=5 max s=1280x720 fps=30``)
+    contributes its maximum size and frame rate; modes of the same size are
+    merged, keeping the order in which sizes first appear.
+
+    Returns:
+        List of {"width", "height", "fps": [float, ...]}; empty if no modes were found.
+    """
+    resolutions = []
+    by_size = {}
+    for line in output.splitlines():
+        if 'pixel_format=' not in line and 'vcodec=' not in line:
+            continue
+        modes = _MODE_RE.findall(line)
+        if not modes:
+            continue
+        width, height, fps = modes[-1]
+        try:
+            size = (int(width), int(height))
+            fps = float(fps)
+        except ValueError:
+            continue
+        entry = by_size.get(size)
+        if entry is None:
+            entry = {"width": size[0], "height": size[1], "fps": []}
+            by_size[size] = entry
+            resolutions.append(entry)
+        if fps not in entry["fps"]:
+            entry["fps"].append(fps)
+    return resolutions
+
+
+def parse_dshow_devices(output: str) -> List[Tuple[str, str]]:
+    """Parse ``ffmpeg -f dshow -list_devices true`` output into video devices.
+
+    Returns:
+        List of (name, device path) in enumeration order; the path is
+        ffmpeg's "alternative name" (``@device_pnp_...``), or "" if not shown.
+    """
+    devices = []
+    section_is_video = False
+    current_is_video = False
+    for raw in output.splitlines():
+        line = _strip_log_prefix(raw)
+        if "DirectShow video devices" in line:
+            section_is_video = True
+            continue
+        if "DirectShow audio devices" in line:
+            section_is_video = False
+            continue
+
+        alt = _ALT_NAME_RE.match(line)
+        if alt:
+            if current_is_video and devices and not devices[-1][1]:
+                devices[-1] = (devices[-1][0], alt.group(1))
+            continue
+
+        device = _DEVICE_RE.match(line)
+        if device:
+            kind = device.group(2)
+            current_is_video = "video" in kind if kind is not None else section_is_video
+            if current_is_video:
+                devices.append((device.group(1), ""))
+    return devices
 
 
 class CameraDetector:
     """Detects available cameras and their configurations."""
 
-    def __init__(self):
+    def __init__(
+        self,
+        ffmpeg: str = "ffmpeg",
+        cache_file: Optional[str] = None,
+        use_cache: bool = True,
+        background_refresh: bool = True,
+        max_workers: int = MAX_PROBE_WORKERS
+    ):
+        """
+        Args:
+            ffmpeg: FFmpeg executable (name on PATH or full path)
+            cache_file: Where device profiles are kept (None = ~/.classtop/camera_profiles.json)
+            use_cache: Use profiles from earlier runs for known devices
+            background_refresh: Re-probe cached devices in the background after detection
+            max_workers: Devices probed at once
+        """
+        self.ffmpeg = ffmpeg
+        self.cache_file = Path(cache_file) if cache_file else DEFAULT_CACHE_FILE
+        self.use_cache = use_cache
+        self.background_refresh = background_refresh
+        self.max_workers = max_workers
         self.cameras = []
 
+        self._cache_lock = threading.Lock()
+        self.refresh_thread: Optional[threading.Thread] = None
+
+        # Stats
+        self.last_detection: Dict = {}
+
     def detect_cameras(self) -> List[Dict]:
-        """Detect all available cameras using DirectShow."""
-        graph = FilterGraph()
-        devices = graph.get_input_devices()
+        """Detect all available cameras using DirectShow.
+
+        Devices with a cached profile are returned straight away (and
+        re-probed in the background); the others are probed in parallel.
+        """
+        start = time.perf_counter()
+        devices = self._list_devices()
+        profiles = self._load_cache() if self.use_cache else {}
 
         cameras = []
-        for index, device_name in enumerate(devices):
+        to_probe = []
+        cached_cameras = []
+        for index, (device_name, device_path) in enumerate(devices):
+            cached = profiles.get(self._profile_key(device_name, device_path))
             camera_info = {
                 "index": index,
                 "name": device_name,
-                "resolutions": self._detect_resolutions(index)
+                "path": device_path,
+                "resolutions": cached["resolutions"] if cached else None
             }
             cameras.append(camera_info)
+            (cached_cameras if cached else to_probe).append(camera_info)
+
+        self._probe_into(to_probe)
 
         self.cameras = cameras
+        self.last_detection = {
+            "cameras": len(cameras),
+            "cached": len(cached_cameras),
+            "probed": len(to_probe),
+            "duration_ms": round((time.perf_counter() - start) * 1000, 1),
+        }
+
+        if cached_cameras and self.background_refresh:
+            self.refresh_thread = threading.Thread(
+                target=self._probe_into, args=(cached_cameras,), daemon=True
+            )
+            self.refresh_thread.start()
         return cameras
 
-    def _detect_resolutions(self, camera_index: int) -> List[Dict]:
-        """Detect available resolutions and FPS for a camera using FFmpeg."""
-        resolutions = []
+    def wait_for_refresh(self, timeout: Optional[float] = None) -> bool:
+        """Wait for a background profile refresh; True if none is running."""
+        if self.refresh_thread is not None:
+            self.refresh_thread.join(timeout)
+            return not self.refresh_thread.is_alive()
+        return True
+
+    def _list_devices(self) -> List[Tuple[str, str]]:
+        """Enumerate video input devices once: (name, device path) in DirectShow order."""
+        try:
+            from pygrabber.dshow_graph import FilterGraph
+        except ImportError as e:
+            print(f"DirectShow camera detection is not available: {e}")
+            return []
+
+        # Device paths tell apart cameras with the same name; ffmpeg lists them
+        # while DirectShow enumerates, and they are matched by name in order
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            listing = pool.submit(self._list_device_paths)
+            names = FilterGraph().get_input_devices()
+            paths: Dict[str, List[str]] = {}
+            for name, path in listing.result():
+                paths.setdefault(name, []).append(path)
+        return [(name, paths[name].pop(0) if paths.get(name) else "") for name in names]
 
-        # Use ffmpeg to list formats
+    def _list_device_paths(self) -> List[Tuple[str, str]]:
+        cmd = [self.ffmpeg, "-hide_banner", "-f", "dshow", "-list_devices", "true", "-i", "dummy"]
+        try:
+            result = subprocess.run(
+                cmd,
+                capture_output=True,
+                encoding="utf-8",
+                errors="replace",
+                timeout=PROBE_TIMEOUT,
+                creationflags=_NO_WINDOW
+            )
+            return parse_dshow_devices(result.stderr)
+        except Exception as e:
+            print(f"Error listing camera device paths: {e}")
+            return []
+
+    def _probe_into(self, cameras: List[Dict]):
+        """Probe cameras in parallel, fill in their resolutions and save the profiles."""
+        if not cameras:
+            return
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(cameras))) as pool:
+            results = list(pool.map(self._detect_resolutions, cameras))
+
+        profiles = {}
+        for camera, resolutions in zip(cameras, results):
+            if resolutions:
+                camera["resolutions"] = resolutions
+                profiles[self._profile_key(camera["name"], camera["path"])] = {
+                    "name": camera["name"],
+                    "path": camera["path"],
+                    "resolutions": resolutions,
+                    "probed_at": time.time(),
+                }
+            elif camera["resolutions"] is None:
+                camera["resolutions"] = [dict(r, fps=list(r["fps"])) for r in DEFAULT_RESOLUTIONS]
+
+        if profiles and self.use_cache:
+            self._save_cache(profiles)
+
+    def _detect_resolutions(self, camera: Dict) -> Optional[List[Dict]]:
+        """Detect available resolutions and FPS for a camera using FFmpeg.
+
+        Returns:
+            Parsed resolutions, or None if the device's options could not be read.
+        """
+        # The device path also works as the device name and is unique
+        device = camera["path"] or camera["name"]
         cmd = [
-            "ffmpeg",
+            self.ffmpeg,
+            "-hide_banner",
             "-f", "dshow",
             "-list_options", "true",
-            "-i", f"video={self._get_camera_name(camera_index)}",
+            "-i", f"video={device}",
         ]
 
         try:
             result = subprocess.run(
                 cmd,
                 capture_output=True,
-                text=True,
-                timeout=10
+                encoding="utf-8",
+                errors="replace",
+                timeout=PROBE_TIMEOUT,
+                creationflags=_NO_WINDOW
             )
-
-            # Parse ffmpeg output
-            output = result.stderr
-            current_res = None
-
-            for line in output.split('\n'):
-                # Look for resolution lines like "1920x1080"
-                if 'pixel_format=' in line or 'vcodec=' in line:
-                    parts = line.strip().split()
-                    for i, part in enumerate(parts):
-                        if 's=' in part:
-                            # Extract resolution
-                            res_str = part.split('=')[1]
-                            if 'x' in res_str:
-                                width, height = res_str.split('x')
-                                try:
-                                    current_res = {
-                                        "width": int(width),
-                                        "height": int(height),
-                                        "fps": []
-                                    }
-                                except ValueError:
-                                    continue
-
-                        if 'fps=' in part and current_res:
-                            # Extract FPS
-                            fps_str = part.split('=')[1]
-                            try:
-                                fps = float(fps_str)
-                                if fps not in current_res["fps"]:
-                                    current_res["fps"].append(fps)
-                            except ValueError:
-                                continue
-
-                    # Add resolution if we have complete info
-                    if current_res and current_res["fps"]:
-                        # Check if this resolution already exists
-                        existing = next(
-                            (r for r in resolutions
-                             if r["width"] == current_res["width"]
-                             and r["height"] == current_res["height"]),
-                            None
-                        )
-                        if existing:
-                            # Merge FPS values
-                            for fps in current_res["fps"]:
-                                if fps not in existing["fps"]:
-                                    existing["fps"].append(fps)
-                        else:
-                            resolutions.append(current_res.copy())
-                        current_res = None
-
-            # If no resolutions detected, add common defaults
-            if not resolutions:
-                resolutions = [
-                    {"width": 1920, "height": 1080, "fps": [30.0]},
-                    {"width": 1280, "height": 720, "fps": [30.0]},
-                    {"width": 640, "height": 480, "fps": [30.0]},
-                ]
+            return parse_dshow_options(result.stderr) or None
 
         except subprocess.TimeoutExpired:
-            # Fallback to common resolutions
-            resolutions = [
-                {"width": 1920, "height": 1080, "fps": [30.0]},
-                {"width": 1280, "height": 720, "fps": [30.0]},
-                {"width": 640, "height": 480, "fps": [30.0]},
-            ]
+            return None
         except Exception as e:
-            print(f"Error detecting resolutions for camera {camera_index}: {e}")
-            resolutions = [
-                {"width": 1920, "height": 1080, "fps": [30.0]},
-                {"width": 1280, "height": 720, "fps": [30.0]},
-            ]
-
-        return resolutions
-
-    def _get_camera_name(self, camera_index: int) -> str:
-        """Get camera name by index."""
-        graph = FilterGraph()
-        devices = graph.get_input_devices()
-        if camera_index < len(devices):
-            return devices[camera_index]
-        return ""
+            print(f"Error detecting resolutions for camera {camera['index']}: {e}")
+            return None
+
+    @staticmethod
+    def _profile_key(device_name: str, device_path: str) -> str:
+        return f"{device_name}|{device_path}"
+
+    def _load_cache(self) -> Dict[str, Dict]:
+        try:
+            with open(self.cache_file, "r", encoding="utf-8") as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if cached.get("cache_version") != CACHE_VERSION:
+            return {}
+        return cached.get("profiles", {})
+
+    def _save_cache(self, profiles: Dict[str, Dict]):
+        """Merge profiles into the cache file (other devices' profiles are kept)."""
+        with self._cache_lock:
+            merged = self._load_cache()
+            merged.update(profiles)
+            data = {"cache_version": CACHE_VERSION, "profiles": merged}
+            tmp = self.cache_file.with_suffix(".tmp")
+            try:
+                self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+                with open(tmp, "w", encoding="utf-8") as f:
+                    json.dump(data, f, indent=2, ensure_ascii=False)
+                os.replace(tmp, self.cache_file)
+            except OSError as e:
+                print(f"Error saving camera profiles: {e}")
 
     def get_camera_info(self, camera_index: int) -> Dict:
         """Get information for a specific camera."""
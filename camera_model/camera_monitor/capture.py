@@ -0,0 +1,661 @@
+"""Shared frame capture: one camera read feeding preview, streaming and recording."""
+import asyncio
+import os
+import queue
+import subprocess
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+# Subscriber callback: (frame, seq, timestamp). Frames are shared, not copied:
+# subscribers must treat them as read-only and return quickly.
+FrameCallback = Callable[[np.ndarray, int, float], None]
+
+# Back-off between failed reads, so a lost camera does not spin a core
+READ_RETRY_MIN = 0.01
+READ_RETRY_MAX = 0.5
+
+
+class FrameSource:
+    """Where a CaptureHub reads frames from.
+
+    Subclasses open a device, file or generator and return BGR frames from
+    ``read()``; ``read()`` may block until the next frame is available.
+    """
+
+    def __init__(self, width: int, height: int, fps: int):
+        self.width = width
+        self.height = height
+        self.fps = fps
+
+    def open(self) -> bool:
+        return True
+
+    def read(self) -> Optional[np.ndarray]:
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class OpenCVSource(FrameSource):
+    """A camera opened through cv2.VideoCapture (DirectShow on Windows)."""
+
+    def __init__(self, camera_index: int, width: int, height: int, fps: int):
+        super().__init__(width, height, fps)
+        self.camera_index = camera_index
+        self.cap: Optional[cv2.VideoCapture] = None
+
+    def open(self) -> bool:
+        backend = cv2.CAP_DSHOW if os.name == 'nt' else cv2.CAP_ANY
+        self.cap = cv2.VideoCapture(self.camera_index, backend)
+        if not self.cap.isOpened():
+            self.cap = None
+            return False
+
+        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.width)
+        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.height)
+        self.cap.set(cv2.CAP_PROP_FPS, self.fps)
+        return True
+
+    def read(self) -> Optional[np.ndarray]:
+        if not self.cap:
+            return None
+        ret, frame = self.cap.read()
+        return frame if ret else None
+
+    def close(self):
+        if self.cap:
+            self.cap.release()
+            self.cap = None
+
+
+class _PacedSource(FrameSource):
+    """Base for sources that produce frames as fast as asked and must be held to ``fps``."""
+
+    def __init__(self, width: int, height: int, fps: int):
+        super().__init__(width, height, fps)
+        self._next_frame_at = 0.0
+
+    def _pace(self):
+        now = time.monotonic()
+        if self._next_frame_at > now:
+            time.sleep(self._next_frame_at - now)
+        self._next_frame_at = max(self._next_frame_at, now) + 1.0 / self.fps
+
+
+class SyntheticSource(_PacedSource):
+    """Generated frames (moving bar over a gradient) for testing without a camera."""
+
+    def __init__(self, width: int = 640, height: int = 480, fps: int = 30):
+        super().__init__(width, height, fps)
+        self._count = 0
+        gradient = np.linspace(0, 255, width, dtype=np.uint8)
+        self._background = np.dstack([np.tile(gradient, (height, 1))] * 3)
+
+    def read(self) -> Optional[np.ndarray]:
+        self._pace()
+        frame = self._background.copy()
+        bar = self._count * 8 % self.width
+        frame[:, bar:bar + 16] = (0, 0, 255)
+        self._count += 1
+        return frame
+
+
+class FileSource(_PacedSource):
+    """Frames from a video file, played back at the file's frame rate (looping by default)."""
+
+    def __init__(self, path: str, loop: bool = True):
+        super().__init__(0, 0, 30)
+        self.path = path
+        self.loop = loop
+        self.cap: Optional[cv2.VideoCapture] = None
+
+    def open(self) -> bool:
+        self.cap = cv2.VideoCapture(self.path)
+        if not self.cap.isOpened():
+            self.cap = None
+            return False
+        self.width = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        self.height = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS) or 30
+        return True
+
+    def read(self) -> Optional[np.ndarray]:
+        if not self.cap:
+            return None
+        self._pace()
+        ret, frame = self.cap.read()
+        if not ret and self.loop:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ret, frame = self.cap.read()
+        return frame if ret else None
+
+    def close(self):
+        if self.cap:
+            self.cap.release()
+            self.cap = None
+
+
+class CaptureHub:
+    """Reads frames from one source on a single thread and fans them out to subscribers.
+
+    Each frame is read once; subscribers and ``latest()`` get the same array.
+    Consumers that pull frames wait with ``wait_for_frame()`` (threads) or
+    ``wait_for_frame_async()`` (asyncio) and are woken when a newer frame is
+    published, instead of polling on a timer.
+    """
+
+    def __init__(self, source: FrameSource, first_seq: int = 0):
+        """
+        Args:
+            source: Where frames are read from
+            first_seq: Sequence number of the first frame
+        """
+        self.source = source
+        self.is_running = False
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._frame_ready = threading.Condition(self._lock)
+        self._async_waiters: List[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = []
+        self._subscribers: Dict[int, FrameCallback] = {}
+        self._next_token = 0
+        self._frame: Optional[np.ndarray] = None
+        self._seq = first_seq - 1
+        self._timestamp = 0.0
+        self._first_frame = threading.Event()
+
+        # Stats
+        self.frames_captured = 0
+        self.read_failures = 0
+        self.subscriber_errors = 0
+        self._started_at = 0.0
+
+    def start(self) -> bool:
+        """Open the source and start the capture thread."""
+        if self.is_running:
+            return True
+        if not self.source.open():
+            return False
+
+        self.is_running = True
+        self._first_frame.clear()
+        self._started_at = time.monotonic()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self):
+        """Stop capturing and close the source."""
+        if not self.is_running:
+            return
+        self.is_running = False
+        self._wake_waiters()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout=2)
+        self._thread = None
+        self.source.close()
+
+    def subscribe(self, callback: FrameCallback) -> int:
+        """Register a callback for every captured frame; returns a token for unsubscribe()."""
+        with self._lock:
+            token = self._next_token
+            self._next_token += 1
+            self._subscribers[token] = callback
+        return token
+
+    def unsubscribe(self, token: int):
+        with self._lock:
+            self._subscribers.pop(token, None)
+
+    @property
+    def next_seq(self) -> int:
+        """Sequence number the next captured frame will get."""
+        return self._seq + 1
+
+    def latest(self) -> Tuple[Optional[np.ndarray], int, float]:
+        """Most recent (frame, seq, timestamp); frame is None before the first capture."""
+        with self._lock:
+            return self._frame, self._seq, self._timestamp
+
+    def wait_first_frame(self, timeout: float) -> bool:
+        """Block until a frame has been captured since start()."""
+        return self._first_frame.wait(timeout)
+
+    def wait_for_frame(self, after_seq: int,
+                       timeout: Optional[float] = None) -> Optional[Tuple[np.ndarray, int, float]]:
+        """Block until a frame newer than ``after_seq`` is available.
+
+        Returns:
+            (frame, seq, timestamp), or None on timeout or when capture stops
+        """
+        with self._frame_ready:
+            self._frame_ready.wait_for(
+                lambda: (self._seq > after_seq and self._frame is not None) or not self.is_running,
+                timeout
+            )
+            if self._seq > after_seq and self._frame is not None and self.is_running:
+                return self._frame, self._seq, self._timestamp
+        return None
+
+    async def wait_for_frame_async(self, after_seq: int,
+                                   timeout: Optional[float] = None) -> Optional[Tuple[np.ndarray, int, float]]:
+        """Await a frame newer than ``after_seq`` without tying up a thread.
+
+        Returns:
+            (frame, seq, timestamp), or None on timeout or when capture stops
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if not self.is_running:
+                return None
+            if self._seq > after_seq and self._frame is not None:
+                return self._frame, self._seq, self._timestamp
+            waiter = (loop, loop.create_future())
+            self._async_waiters.append(waiter)
+
+        try:
+            await asyncio.wait_for(waiter[1], timeout)
+        except asyncio.TimeoutError:
+            return None
+        finally:
+            with self._lock:
+                if waiter in self._async_waiters:
+                    self._async_waiters.remove(waiter)
+
+        with self._lock:
+            if self._seq > after_seq and self._frame is not None and self.is_running:
+                return self._frame, self._seq, self._timestamp
+        return None
+
+    def _wake_waiters(self):
+        """Wake every thread and coroutine waiting for a frame."""
+        with self._frame_ready:
+            async_waiters = self._notify_locked()
+        self._resolve_async(async_waiters)
+
+    def _notify_locked(self) -> list:
+        """Wake waiting threads; returns the async waiters to resolve once the lock is released."""
+        self._frame_ready.notify_all()
+        async_waiters, self._async_waiters = self._async_waiters, []
+        return async_waiters
+
+    @staticmethod
+    def _resolve_async(async_waiters: list):
+        for loop, future in async_waiters:
+            try:
+                loop.call_soon_threadsafe(_resolve_waiter, future)
+            except RuntimeError:
+                # The waiter's event loop is already closed
+                pass
+
+    def _run(self):
+        retry_delay = READ_RETRY_MIN
+        while self.is_running:
+            frame = self.source.read()
+            if frame is None:
+                self.read_failures += 1
+                time.sleep(retry_delay)
+                retry_delay = min(retry_delay * 2, READ_RETRY_MAX)
+                continue
+            retry_delay = READ_RETRY_MIN
+
+            timestamp = time.time()
+            with self._lock:
+                self._seq += 1
+                seq = self._seq
+                self._frame = frame
+                self._timestamp = timestamp
+                subscribers = list(self._subscribers.values())
+                async_waiters = self._notify_locked()
+            self.frames_captured += 1
+            self._first_frame.set()
+            self._resolve_async(async_waiters)
+
+            for callback in subscribers:
+                try:
+                    callback(frame, seq, timestamp)
+                except Exception as e:
+                    self.subscriber_errors += 1
+                    print(f"[Capture] Subscriber error: {e}")
+
+    def get_stats(self) -> dict:
+        elapsed = time.monotonic() - self._started_at if self.is_running else 0
+        return {
+            "is_running": self.is_running,
+            "frames_captured": self.frames_captured,
+            "capture_fps": round(self.frames_captured / elapsed, 1) if elapsed > 0 else 0.0,
+            "read_failures": self.read_failures,
+            "subscribers": len(self._subscribers),
+            "subscriber_errors": self.subscriber_errors,
+        }
+
+
+def _resolve_waiter(future: asyncio.Future):
+    if not future.done():
+        future.set_result(None)
+
+
+def prepare_frame(frame: np.ndarray,
+                  size: Optional[Tuple[Optional[int], Optional[int]]] = None,
+                  roi: Optional[Tuple[float, float, float, float]] = None,
+                  grayscale: bool = False) -> np.ndarray:
+    """Crop, scale and convert a captured frame before encoding.
+
+    Args:
+        frame: BGR frame (not modified)
+        size: (width, height) to scale to; a None side follows the aspect ratio
+        roi: (x, y, width, height) as fractions of the frame
+        grayscale: Convert to single-channel grayscale
+
+    Returns:
+        The processed frame (the input itself if nothing was requested)
+    """
+    if roi:
+        frame_h, frame_w = frame.shape[:2]
+        x0, y0 = int(roi[0] * frame_w), int(roi[1] * frame_h)
+        x1 = max(x0 + 1, int((roi[0] + roi[2]) * frame_w))
+        y1 = max(y0 + 1, int((roi[1] + roi[3]) * frame_h))
+        # Slicing is a view; the crop is only copied by resize/encode
+        frame = frame[y0:y1, x0:x1]
+
+    if size:
+        frame_h, frame_w = frame.shape[:2]
+        width, height = size
+        if width is None:
+            width = max(1, round(frame_w * height / frame_h))
+        elif height is None:
+            height = max(1, round(frame_h * width / frame_w))
+        # INTER_AREA is much faster for an exact 2x reduction than for larger
+        # factors, so halve first while the target is at most half the size
+        while width * 2 <= frame_w and height * 2 <= frame_h:
+            frame_w, frame_h = frame_w // 2, frame_h // 2
+            frame = cv2.resize(frame, (frame_w, frame_h), interpolation=cv2.INTER_AREA)
+        if (width, height) != (frame_w, frame_h):
+            # Scale before converting colour so the conversion runs on the small image
+            frame = cv2.resize(frame, (width, height), interpolation=cv2.INTER_AREA)
+
+    if grayscale and frame.ndim == 3:
+        frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    return frame
+
+
+class EncodedFrameCache:
+    """JPEG bytes of the latest frame, encoded once per (seq, quality, size, roi, grayscale).
+
+    The first reader of a frame encodes it outside the lock; readers asking for
+    the same encoding meanwhile wait for that result instead of encoding again.
+    Entries of older frames are dropped as soon as a newer frame is encoded.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._seq = -1
+        self._entries: Dict[tuple, bytes] = {}
+        # (seq, *encoding) -> [done event, encoded bytes]
+        self._pending: Dict[tuple, list] = {}
+
+        # Stats
+        self.encodes = 0
+        self.hits = 0
+        self.waits = 0
+        self.encode_time = 0.0
+
+    def get(self, frame: np.ndarray, seq: int, quality: int,
+            size: Optional[Tuple[Optional[int], Optional[int]]] = None,
+            roi: Optional[Tuple[float, float, float, float]] = None,
+            grayscale: bool = False) -> Optional[bytes]:
+        """JPEG bytes of ``frame`` (sequence ``seq``) processed by prepare_frame()."""
+        key = (quality, size, roi, grayscale)
+        with self._lock:
+            if seq > self._seq:
+                self._seq = seq
+                self._entries.clear()
+            if seq == self._seq and key in self._entries:
+                self.hits += 1
+                return self._entries[key]
+
+            pending = self._pending.get((seq, *key))
+            if pending is None:
+                pending = [threading.Event(), None]
+                self._pending[(seq, *key)] = pending
+                owner = True
+            else:
+                self.waits += 1
+                owner = False
+
+        if not owner:
+            pending[0].wait()
+            return pending[1]
+
+        data = None
+        try:
+            data = self._encode(frame, quality, size, roi, grayscale)
+        finally:
+            pending[1] = data
+            pending[0].set()
+            with self._lock:
+                self._pending.pop((seq, *key), None)
+                if data is not None and seq == self._seq:
+                    self._entries[key] = data
+        return data
+
+    def peek(self, seq: int, quality: int,
+             size: Optional[Tuple[Optional[int], Optional[int]]] = None,
+             roi: Optional[Tuple[float, float, float, float]] = None,
+             grayscale: bool = False) -> Optional[bytes]:
+        """Cached bytes for this encoding, or None if it has not been encoded yet."""
+        with self._lock:
+            if seq == self._seq:
+                data = self._entries.get((quality, size, roi, grayscale))
+                if data is not None:
+                    self.hits += 1
+                return data
+        return None
+
+    def _encode(self, frame: np.ndarray, quality: int, size, roi, grayscale) -> Optional[bytes]:
+        start = time.perf_counter()
+        frame = prepare_frame(frame, size, roi, grayscale)
+        ret, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
+        self.encode_time += time.perf_counter() - start
+        self.encodes += 1
+        return buffer.tobytes() if ret else None
+
+    def get_stats(self) -> dict:
+        return {
+            "encodes": self.encodes,
+            "hits": self.hits,
+            "waits": self.waits,
+            "encode_ms_avg": round(self.encode_time / self.encodes * 1000, 2) if self.encodes else 0.0,
+        }
+
+
+class FFmpegPipeRecorder:
+    """Records frames from a CaptureHub by piping raw BGR frames into ffmpeg's stdin.
+
+    Frames are written by a separate thread through a bounded queue, so a slow
+    encoder drops frames instead of stalling the capture thread.
+    """
+
+    def __init__(self, hub: CaptureHub, filepath: str, output_args: List[str],
+                 output_size: Optional[Tuple[int, int]] = None,
+                 ffmpeg: str = "ffmpeg", queue_size: int = 60):
+        """
+        Args:
+            hub: Capture hub to record from
+            filepath: Output file
+            output_args: Encoder arguments placed between the input and the output file
+            output_size: (width, height) to scale to if the camera delivers another size
+            ffmpeg: ffmpeg executable
+            queue_size: Frames buffered between the capture thread and ffmpeg
+        """
+        self.hub = hub
+        self.filepath = filepath
+        self.output_args = output_args
+        self.output_size = output_size
+        self.ffmpeg = ffmpeg
+        self.process: Optional[subprocess.Popen] = None
+        self.frame_size: Optional[Tuple[int, int]] = None
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._token: Optional[int] = None
+        self._writer: Optional[threading.Thread] = None
+        # Set once the writer thread has exited (stop() or ffmpeg closed its input)
+        self._writer_done = threading.Event()
+        self._stderr_tail: List[str] = []
+
+        # Stats
+        self.frames_written = 0
+        self.frames_dropped = 0
+
+    def build_command(self, width: int, height: int) -> List[str]:
+        # Wall-clock timestamps keep the duration right when the camera delivers
+        # fewer frames than its nominal rate
+        cmd = [
+            self.ffmpeg,
+            "-use_wallclock_as_timestamps", "1",
+            "-f", "rawvideo",
+            "-pix_fmt", "bgr24",
+            "-video_size", f"{width}x{height}",
+            "-i", "-",
+        ]
+        if self.output_size and self.output_size != (width, height):
+            cmd.extend(["-vf", f"scale={self.output_size[0]}:{self.output_size[1]}"])
+        cmd.extend(self.output_args)
+        cmd.extend(["-y", self.filepath])
+        return cmd
+
+    def start(self, first_frame_timeout: float = 5.0) -> bool:
+        """Start ffmpeg once the hub has a frame (its size sets the input size)."""
+        if not self.hub.wait_first_frame(first_frame_timeout):
+            print("[Recording] ERROR: No frames from camera")
+            return False
+        frame, _, _ = self.hub.latest()
+        height, width = frame.shape[:2]
+        self.frame_size = (width, height)
+
+        cmd = self.build_command(width, height)
+        print(f"\n[Recording] FFmpeg command: {' '.join(cmd)}\n")
+
+        # Use CREATE_NO_WINDOW on Windows to avoid console window
+        creation_flags = subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0
+        self.process = subprocess.Popen(
+            cmd,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            creationflags=creation_flags
+        )
+
+        # Wait a moment and check if process is still running
+        time.sleep(0.5)
+        if self.process.poll() is not None:
+            stderr = self.process.stderr.read().decode('utf-8', errors='ignore')
+            print(f"[Recording] ERROR: FFmpeg process terminated immediately!")
+            print(f"[Recording] stderr: {stderr}")
+            self.process = None
+            return False
+
+        threading.Thread(target=self._read_stderr, daemon=True).start()
+        self._writer = threading.Thread(target=self._write_frames, daemon=True)
+        self._writer.start()
+        self._token = self.hub.subscribe(self._on_frame)
+        return True
+
+    def _on_frame(self, frame: np.ndarray, seq: int, timestamp: float):
+        if self._writer_done.is_set():
+            # ffmpeg went away; nothing would ever take the frame off the queue
+            self.frames_dropped += 1
+            return
+        try:
+            self._queue.put_nowait(frame)
+        except queue.Full:
+            self.frames_dropped += 1
+
+    def _write_frames(self):
+        stdin = self.process.stdin
+        try:
+            while True:
+                frame = self._queue.get()
+                if frame is None:
+                    break
+                try:
+                    stdin.write(memoryview(np.ascontiguousarray(frame)).cast('B'))
+                    self.frames_written += 1
+                except (BrokenPipeError, OSError, ValueError):
+                    print("[Recording] FFmpeg input closed")
+                    break
+        finally:
+            self._writer_done.set()
+
+    def _read_stderr(self):
+        """Keep the stderr pipe drained; print warnings and keep the tail for stop()."""
+        try:
+            for line in self.process.stderr:
+                line_str = line.decode('utf-8', errors='ignore').strip()
+                if not line_str:
+                    continue
+                self._stderr_tail = (self._stderr_tail + [line_str])[-10:]
+                if 'error' in line_str.lower() or 'warning' in line_str.lower():
+                    print(f"[Recording] FFmpeg: {line_str}")
+        except (ValueError, OSError):
+            # stderr was closed, exit gracefully
+            pass
+
+    def stop(self, timeout: float = 10) -> bool:
+        """Stop feeding frames, close ffmpeg's stdin and wait for it to finalize the file."""
+        if self._token is not None:
+            self.hub.unsubscribe(self._token)
+            self._token = None
+        if not self.process:
+            return True
+
+        # Let the writer flush what is queued, then close stdin (EOF ends the recording).
+        # No frames arrive after unsubscribe, so the queue drains unless the writer
+        # has exited (ffmpeg died); then there is nobody to hand the sentinel to.
+        deadline = time.monotonic() + timeout
+        while not self._writer_done.is_set() and time.monotonic() < deadline:
+            try:
+                self._queue.put(None, timeout=0.1)
+                break
+            except queue.Full:
+                continue
+        if self._writer:
+            self._writer.join(timeout=timeout)
+        self._drain_queue()
+        try:
+            self.process.stdin.close()
+        except OSError:
+            pass
+
+        try:
+            self.process.wait(timeout=timeout)
+            print("[Recording] FFmpeg stopped gracefully")
+        except subprocess.TimeoutExpired:
+            print("[Recording] Timeout waiting for FFmpeg, forcing kill...")
+            self.process.kill()
+            self.process.wait(timeout=2)
+
+        if self._stderr_tail:
+            print("[Recording] Last FFmpeg output:")
+            for line in self._stderr_tail:
+                print(f"  {line}")
+        self.process = None
+        return True
+
+    def _drain_queue(self):
+        """Drop frames left behind by a writer that exited early."""
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                return
+
+    def get_stats(self) -> dict:
+        return {
+            "frames_written": self.frames_written,
+            "frames_dropped": self.frames_dropped,
+            "queued": self._queue.qsize(),
+        }
@@ -18,6 +18,10 @@ class CameraConfig:
     # Encoder type preference: 'hardware' or 'software'
     encoder_preference: str = 'hardware'
 
+    # Reuse probed device resolutions on the next start (refreshed in the background)
+    profile_cache: bool = True
+    profile_cache_file: Optional[str] = None  # None = ~/.classtop/camera_profiles.json
+
     def __post_init__(self):
         """Validate configuration."""
         if self.width <= 0 or self.height <= 0:
@@ -51,6 +55,10 @@ class EncoderConfig:
     # General settings
     pixel_format: str = 'yuv420p'
 
+    # Reuse encoder probe results until ffmpeg or the GPU driver changes
+    probe_cache: bool = True
+    probe_cache_file: Optional[str] = None  # None = ~/.classtop/encoder_cache.json
+
     def __post_init__(self):
         """Validate configuration."""
         valid_nvenc_presets = ['ultrafast', 'superfast', 'fast', 'medium', 'slow']
@@ -144,6 +152,50 @@ class StreamingConfig:
             raise ValueError("jpeg_quality must be between 1 and 100")
 
 
+@dataclass
+class PreviewOptions:
+    """Runtime options for a preview session (how its frames are encoded)."""
+
+    # Output size; if only one is given, the other follows the aspect ratio
+    width: Optional[int] = None
+    height: Optional[int] = None
+
+    # JPEG quality (1-100), None = StreamingConfig.jpeg_quality
+    quality: Optional[int] = None
+
+    # Encode single-channel grayscale
+    grayscale: bool = False
+
+    # Region of interest (x, y, width, height) as fractions (0-1) of the frame
+    roi: Optional[Tuple[float, float, float, float]] = None
+
+    def __post_init__(self):
+        """Validate options."""
+        if self.width is not None and self.width <= 0:
+            raise ValueError("width must be positive")
+
+        if self.height is not None and self.height <= 0:
+            raise ValueError("height must be positive")
+
+        if self.quality is not None and (self.quality < 1 or self.quality > 100):
+            raise ValueError("quality must be between 1 and 100")
+
+        if self.roi is not None:
+            if len(self.roi) != 4:
+                raise ValueError("roi must be (x, y, width, height)")
+            self.roi = tuple(float(v) for v in self.roi)
+            x, y, w, h = self.roi
+            if x < 0 or y < 0 or w <= 0 or h <= 0 or x + w > 1 or y + h > 1:
+                raise ValueError("roi must lie within the frame (fractions between 0 and 1)")
+
+    @property
+    def size(self) -> Optional[Tuple[Optional[int], Optional[int]]]:
+        """Requested (width, height), either of which may be None; None if no scaling."""
+        if self.width is None and self.height is None:
+            return None
+        return self.width, self.height
+
+
 @dataclass
 class APIConfig:
     """Configuration for HTTP API server."""
@@ -1,23 +1,36 @@
 """Video streaming and recording using OpenCV and FFmpeg."""
-import subprocess
+import asyncio
 import os
-import cv2
 import threading
 from datetime import datetime
-from typing import Optional
-from .config import MonitorConfig, CameraConfig, EncoderConfig, RecordingConfig, RecordingOptions, StreamingConfig
+from typing import Optional, Tuple
+from .capture import CaptureHub, EncodedFrameCache, FFmpegPipeRecorder, FrameSource, OpenCVSource
+from .config import MonitorConfig, CameraConfig, EncoderConfig, RecordingConfig, RecordingOptions, PreviewOptions, StreamingConfig
 
 
 class VideoStreamer:
-    """Handles video streaming and recording."""
+    """Handles video streaming and recording.
+
+    Streaming and recording share one CaptureHub, so the camera is opened and
+    read once no matter how many consumers are active.
+    """
 
     def __init__(
         self,
         camera_name: str,
         camera_index: int,
         encoder: str = "libx264",
-        config: Optional[MonitorConfig] = None
+        config: Optional[MonitorConfig] = None,
+        source: Optional[FrameSource] = None
     ):
+        """
+        Args:
+            camera_name: Camera device name
+            camera_index: Camera index
+            encoder: Default recording encoder
+            config: Monitor configuration
+            source: Frame source; defaults to the camera opened through OpenCV
+        """
         self.camera_name = camera_name
         self.camera_index = camera_index
         self.encoder = encoder
@@ -27,12 +40,13 @@ class VideoStreamer:
         self.height = self.config.camera.height
         self.fps = self.config.camera.fps
 
-        self.cap: Optional[cv2.VideoCapture] = None
-        self.record_process: Optional[subprocess.Popen] = None
+        self.source = source
+        self.hub: Optional[CaptureHub] = None
+        self.recorder: Optional[FFmpegPipeRecorder] = None
         self.is_streaming = False
         self.is_recording = False
-        self.current_frame = None
-        self.frame_lock = threading.Lock()
+        self.hub_lock = threading.Lock()
+        self.jpeg_cache = EncodedFrameCache()
 
         # Create recordings directory
         if self.config.recording.create_dir:
@@ -44,53 +58,113 @@ class VideoStreamer:
         self.height = height
         self.fps = fps
 
+    def _acquire_hub(self) -> bool:
+        """Start the shared capture if it is not running yet."""
+        with self.hub_lock:
+            if self.hub and self.hub.is_running:
+                return True
+            source = self.source or OpenCVSource(self.camera_index, self.width, self.height, self.fps)
+            # Continue the previous capture's numbering so cached frames are never mistaken for new ones
+            hub = CaptureHub(source, first_seq=self.hub.next_seq if self.hub else 0)
+            if not hub.start():
+                return False
+            self.hub = hub
+            return True
+
+    def _release_hub(self):
+        """Stop the shared capture once neither streaming nor recording uses it."""
+        with self.hub_lock:
+            if self.hub and not self.is_streaming and not self.is_recording:
+                self.hub.stop()
+
     def start_streaming(self) -> bool:
         """Start video capture for streaming."""
         if self.is_streaming:
             return True
 
         try:
-            # Open camera using DirectShow
-            self.cap = cv2.VideoCapture(self.camera_index, cv2.CAP_DSHOW)
-
-            if not self.cap.isOpened():
+            if not self._acquire_hub():
                 return False
-
-            # Set camera properties
-            self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.width)
-            self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.height)
-            self.cap.set(cv2.CAP_PROP_FPS, self.fps)
-
             self.is_streaming = True
-
-            # Start frame capture thread
-            self.capture_thread = threading.Thread(target=self._capture_frames, daemon=True)
-            self.capture_thread.start()
-
             return True
 
         except Exception as e:
             print(f"Error starting stream: {e}")
             return False
 
-    def _capture_frames(self):
-        """Continuously capture frames from camera."""
-        while self.is_streaming and self.cap:
-            ret, frame = self.cap.read()
-            if ret:
-                with self.frame_lock:
-                    self.current_frame = frame
-
-    def get_frame(self):
-        """Get current frame as JPEG bytes."""
-        with self.frame_lock:
-            if self.current_frame is not None:
-                # Encode frame as JPEG with configured quality
-                jpeg_quality = self.config.streaming.jpeg_quality
-                ret, buffer = cv2.imencode('.jpg', self.current_frame, [cv2.IMWRITE_JPEG_QUALITY, jpeg_quality])
-                if ret:
-                    return buffer.tobytes()
-        return None
+    def get_frame(self, options: Optional[PreviewOptions] = None):
+        """Get current frame as JPEG bytes.
+
+        Args:
+            options: Size, quality, ROI and colour of the encoded frame;
+                None encodes the full frame at the configured streaming quality
+
+        Returns:
+            JPEG bytes, or None if no frame is available
+        """
+        return self.get_frame_with_seq(options)[1]
+
+    def get_frame_with_seq(self, options: Optional[PreviewOptions] = None) -> Tuple[int, Optional[bytes]]:
+        """Get current frame as (sequence number, JPEG bytes).
+
+        Each frame is encoded at most once per distinct set of options, however
+        many consumers read it; the sequence number tells consumers whether the
+        frame is new. Returns (-1, None) if no frame is available.
+        """
+        hub = self.hub
+        if not self.is_streaming or not hub:
+            return -1, None
+        frame, seq, _ = hub.latest()
+        if frame is None:
+            return -1, None
+        return seq, self.jpeg_cache.get(frame, seq, *self._encoding(options))
+
+    def wait_for_frame(self, after_seq: int = -1, timeout: Optional[float] = None,
+                       options: Optional[PreviewOptions] = None) -> Tuple[int, Optional[bytes]]:
+        """Block until a frame newer than ``after_seq`` is captured and return it as JPEG.
+
+        Pass the sequence number of the last frame consumed to never get the
+        same frame twice.
+
+        Returns:
+            (seq, JPEG bytes); (after_seq, None) on timeout or if streaming stops
+        """
+        hub = self.hub
+        if not self.is_streaming or not hub:
+            return after_seq, None
+        result = hub.wait_for_frame(after_seq, timeout)
+        if result is None:
+            return after_seq, None
+        frame, seq, _ = result
+        return seq, self.jpeg_cache.get(frame, seq, *self._encoding(options))
+
+    async def wait_for_frame_async(self, after_seq: int = -1, timeout: Optional[float] = None,
+                                   options: Optional[PreviewOptions] = None) -> Tuple[int, Optional[bytes]]:
+        """Async variant of wait_for_frame(); waits without occupying a thread.
+
+        Only a frame's first encoding runs in a worker thread; readers served
+        from the cache return without leaving the event loop.
+        """
+        hub = self.hub
+        if not self.is_streaming or not hub:
+            return after_seq, None
+        result = await hub.wait_for_frame_async(after_seq, timeout)
+        if result is None:
+            return after_seq, None
+        frame, seq, _ = result
+        encoding = self._encoding(options)
+        data = self.jpeg_cache.peek(seq, *encoding)
+        if data is None:
+            data = await asyncio.to_thread(self.jpeg_cache.get, frame, seq, *encoding)
+        return seq, data
+
+    def _encoding(self, options: Optional[PreviewOptions]) -> tuple:
+        """(quality, size, roi, grayscale) for the frame cache, filling in configured defaults."""
+        # Encode frame as JPEG with configured quality
+        if not options:
+            return self.config.streaming.jpeg_quality, None, None, False
+        quality = options.quality or self.config.streaming.jpeg_quality
+        return quality, options.size, options.roi, options.grayscale
 
     def stop_streaming(self) -> bool:
         """Stop video streaming."""
@@ -99,11 +173,7 @@ class VideoStreamer:
 
         try:
             self.is_streaming = False
-
-            if self.cap:
-                self.cap.release()
-                self.cap = None
-
+            self._release_hub()
             return True
         except Exception as e:
             print(f"Error stopping stream: {e}")
@@ -156,66 +226,33 @@ class VideoStreamer:
         print(f"  Output file: {filepath}")
 
         try:
-            # FFmpeg command for recording - correct DirectShow usage
-            cmd = [
-                "ffmpeg",
-                "-f", "dshow",
-                "-video_size", f"{width}x{height}",
-                "-framerate", str(fps),
-            ]
-
-            # Try to use MJPEG input format for better compatibility
-            cmd.extend(["-vcodec", "mjpeg"])
-            cmd.extend(["-i", f"video={self.camera_name}"])
+            # Frames come from the shared capture and are piped to FFmpeg as raw video,
+            # so recording no longer opens the camera a second time
+            if not self._acquire_hub():
+                print("[Recording] ERROR: Could not open camera")
+                return False
 
             # Add encoder
-            cmd.extend(["-c:v", encoder])
+            output_args = ["-r", str(fps), "-c:v", encoder]
 
             # Build encoder parameters
             encoder_params = self._build_encoder_params(encoder, opts)
-            cmd.extend(encoder_params)
+            output_args.extend(encoder_params)
 
             # Add custom FFmpeg arguments if provided
             if opts.custom_args:
-                cmd.extend(opts.custom_args)
+                output_args.extend(opts.custom_args)
                 print(f"  Custom args: {' '.join(opts.custom_args)}")
 
-            cmd.extend(["-y", filepath])
-
-            print(f"\n[Recording] FFmpeg command: {' '.join(cmd)}\n")
-
-            # Use CREATE_NO_WINDOW on Windows to avoid console window
-            creation_flags = 0
-            if os.name == 'nt':
-                creation_flags = subprocess.CREATE_NO_WINDOW
-
-            self.record_process = subprocess.Popen(
-                cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                stdin=subprocess.PIPE,
-                creationflags=creation_flags
-            )
-
-            # Wait a moment and check if process is still running
-            import time
-            time.sleep(0.5)
-
-            if self.record_process.poll() is not None:
-                # Process has already terminated - error occurred
-                stdout, stderr = self.record_process.communicate()
-                print(f"[Recording] ERROR: FFmpeg process terminated immediately!")
-                print(f"[Recording] stdout: {stdout.decode('utf-8', errors='ignore')}")
-                print(f"[Recording] stderr: {stderr.decode('utf-8', errors='ignore')}")
+            recorder = FFmpegPipeRecorder(self.hub, filepath, output_args, output_size=(width, height))
+            if not recorder.start():
+                self._release_hub()
                 return False
 
+            self.recorder = recorder
             self.is_recording = True
             self.current_recording = filepath
 
-            # Start monitoring thread
-            self.monitor_thread = threading.Thread(target=self._monitor_recording, daemon=True)
-            self.monitor_thread.start()
-
             print(f"[Recording] Successfully started recording!\n")
             return True
 
@@ -223,67 +260,25 @@ class VideoStreamer:
             print(f"[Recording] Exception while starting recording: {e}")
             import traceback
             traceback.print_exc()
+            self._release_hub()
             return False
 
-    def _monitor_recording(self):
-        """Monitor recording process for errors."""
-        try:
-            while self.is_recording and self.record_process:
-                try:
-                    line = self.record_process.stderr.readline()
-                    if not line:
-                        break
-                    line_str = line.decode('utf-8', errors='ignore').strip()
-                    if line_str and ('error' in line_str.lower() or 'warning' in line_str.lower()):
-                        print(f"[Recording] FFmpeg: {line_str}")
-                except (ValueError, OSError):
-                    # stderr was closed, exit gracefully
-                    break
-        except Exception as e:
-            # Silently exit if any unexpected error occurs
-            pass
-
     def stop_recording(self) -> bool:
         """Stop recording video."""
-        if not self.is_recording or not self.record_process:
+        if not self.is_recording or not self.recorder:
             print("[Recording] No active recording to stop")
             return True
 
         print(f"\n[Recording] Stopping recording: {self.current_recording}")
 
         try:
-            # Send 'q' command to FFmpeg stdin to gracefully stop
-            # This is the proper way to stop FFmpeg
-            print("[Recording] Sending 'q' command to FFmpeg...")
-            try:
-                self.record_process.stdin.write(b'q\n')
-                self.record_process.stdin.flush()
-            except Exception as e:
-                print(f"[Recording] Could not write to stdin: {e}")
-                print("[Recording] Trying terminate instead...")
-                self.record_process.terminate()
-
-            # Wait for process to finish and finalize the video file
+            # Closing FFmpeg's input ends the stream; FFmpeg then finalizes the file
             print("[Recording] Waiting for FFmpeg to finalize the file...")
-            try:
-                stdout, stderr = self.record_process.communicate(timeout=10)
-                print("[Recording] FFmpeg stopped gracefully")
-
-                # Print last few lines of stderr for debugging
-                stderr_lines = stderr.decode('utf-8', errors='ignore').strip().split('\n')
-                if stderr_lines:
-                    print("[Recording] Last FFmpeg output:")
-                    for line in stderr_lines[-10:]:
-                        if line.strip():
-                            print(f"  {line}")
-
-            except subprocess.TimeoutExpired:
-                print("[Recording] Timeout waiting for FFmpeg, forcing kill...")
-                self.record_process.kill()
-                self.record_process.wait(timeout=2)
+            self.recorder.stop()
 
             self.is_recording = False
-            self.record_process = None
+            self.recorder = None
+            self._release_hub()
 
             # Check if file was created
             if os.path.exists(self.current_recording):
@@ -300,9 +295,11 @@ class VideoStreamer:
             import traceback
             traceback.print_exc()
             try:
-                self.record_process.kill()
+                if self.recorder.process:
+                    self.recorder.process.kill()
                 self.is_recording = False
-                self.record_process = None
+                self.recorder = None
+                self._release_hub()
             except:
                 pass
             return False
@@ -316,7 +313,10 @@ class VideoStreamer:
             "resolution": f"{self.width}x{self.height}@{self.fps}fps",
             "is_streaming": self.is_streaming,
             "is_recording": self.is_recording,
-            "current_recording": getattr(self, 'current_recording', None) if self.is_recording else None
+            "current_recording": getattr(self, 'current_recording', None) if self.is_recording else None,
+            "capture": self.hub.get_stats() if self.hub else None,
+            "recorder": self.recorder.get_stats() if self.recorder else None,
+            "jpeg_cache": self.jpeg_cache.get_stats()
         }
 
     def _select_encoder(self, opts: RecordingOptions) -> str:
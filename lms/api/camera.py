@@ -1,7 +1,7 @@
 """Camera API endpoints."""
 import logging
-from fastapi import APIRouter, HTTPException
-from typing import Dict, List
+from fastapi import APIRouter, HTTPException, Query
+from typing import Dict, List, Optional
 from models import RecordingRequest, CameraCommandRequest
 from websocket_manager import manager
 
@@ -136,13 +136,63 @@ async def stop_streaming(client_uuid: str, request: CameraCommandRequest):
     return response.data
 
 
+def parse_roi(roi: Optional[str]) -> Optional[List[float]]:
+    """Parse an ROI query value "x,y,w,h" (fractions of the frame, 0-1)."""
+    if not roi:
+        return None
+    try:
+        x, y, w, h = (float(v) for v in roi.split(","))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="roi must be 'x,y,w,h'")
+    if x < 0 or y < 0 or w <= 0 or h <= 0 or x + w > 1 or y + h > 1:
+        raise HTTPException(status_code=400, detail="roi must lie within the frame (fractions between 0 and 1)")
+    return [x, y, w, h]
+
+
 @router.post("/{client_uuid}/preview/start")
-async def start_preview(client_uuid: str, camera_index: int = 0, fps: int = 10):
-    """Start camera preview (sends frames via WebSocket)."""
+async def start_preview(
+    client_uuid: str,
+    camera_index: int = 0,
+    fps: int = Query(10, gt=0),
+    width: Optional[int] = Query(None, gt=0, description="Preview width; height follows the aspect ratio if omitted"),
+    height: Optional[int] = Query(None, gt=0, description="Preview height; width follows the aspect ratio if omitted"),
+    quality: Optional[int] = Query(None, ge=1, le=100, description="JPEG quality, default: client streaming config"),
+    grayscale: bool = False,
+    roi: Optional[str] = Query(None, description="Crop region 'x,y,w,h' as fractions of the frame (0-1)"),
+    adaptive: bool = Query(True, description="Lower size, quality and fps under congestion, down to the minimums"),
+    min_fps: Optional[float] = Query(None, gt=0),
+    min_quality: Optional[int] = Query(None, ge=1, le=100)
+):
+    """Start camera preview (sends frames via WebSocket).
+
+    Frames are cropped, scaled and converted on the client before encoding,
+    so small previews cost proportionally less bandwidth and CPU. With
+    ``adaptive`` the given size, quality and fps are upper bounds that the
+    client lowers while its uplink or the viewers fall behind.
+    """
+    params = {"camera_index": camera_index, "fps": fps}
+    roi_values = parse_roi(roi)
+    if width is not None:
+        params["width"] = width
+    if height is not None:
+        params["height"] = height
+    if quality is not None:
+        params["quality"] = quality
+    if grayscale:
+        params["grayscale"] = True
+    if roi_values:
+        params["roi"] = roi_values
+    if not adaptive:
+        params["adaptive"] = False
+    if min_fps is not None:
+        params["min_fps"] = min_fps
+    if min_quality is not None:
+        params["min_quality"] = min_quality
+
     response = await manager.send_command(
         client_uuid,
         "camera_start_preview",
-        {"camera_index": camera_index, "fps": fps}
+        params
     )
 
     if not response.success:
@@ -164,3 +214,24 @@ async def stop_preview(client_uuid: str, camera_index: int = 0):
         raise HTTPException(status_code=500, detail=response.error or "Failed to stop preview")
 
     return response.data
+
+
+@router.get("/{client_uuid}/preview/stats")
+async def get_preview_stats(client_uuid: str):
+    """Get the client's preview sender stats (frames sent/dropped, send time, latency)."""
+    response = await manager.send_command(
+        client_uuid,
+        "camera_get_preview_stats",
+        {}
+    )
+
+    if not response.success:
+        raise HTTPException(status_code=500, detail=response.error or "Failed to get preview stats")
+
+    return response.data
+
+
+@router.get("/{client_uuid}/preview/viewers")
+async def get_preview_viewers(client_uuid: str):
+    """Get frame fan-out metrics (sent/dropped frames, latency) for the client's preview viewers."""
+    return manager.get_viewer_stats(client_uuid)
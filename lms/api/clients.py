@@ -1,5 +1,5 @@
 """Client management API endpoints."""
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
 from typing import Dict, List
 from models import ClientInfo, CommandRequest, CommandResponse
 from websocket_manager import manager
@@ -44,6 +44,29 @@ async def send_command(client_uuid: str, request: CommandRequest):
     return response
 
 
+@router.post("/{client_uuid}/commands", response_model=List[CommandResponse])
+async def send_commands(client_uuid: str, requests: List[CommandRequest]):
+    """Send several commands to a client in one frame; responses are in request order."""
+    client = manager.get_client_info(client_uuid)
+    if not client:
+        raise HTTPException(status_code=404, detail="Client not found")
+
+    return await manager.send_commands(client_uuid, requests)
+
+
+@router.get("/{client_uuid}/tags", response_model=List[str])
+async def get_client_tags(client_uuid: str, request: Request):
+    """Get a client's tags (used by fleet command selectors)."""
+    return await request.app.state.repo.get_client_tags(client_uuid)
+
+
+@router.put("/{client_uuid}/tags", response_model=List[str])
+async def set_client_tags(client_uuid: str, tags: List[str], request: Request):
+    """Replace a client's tags."""
+    await request.app.state.repo.set_client_tags(client_uuid, tags)
+    return sorted(set(tags))
+
+
 @router.post("/{client_uuid}/refresh")
 async def refresh_client_state(client_uuid: str):
     """Request client to send updated state."""
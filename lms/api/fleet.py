@@ -0,0 +1,97 @@
+"""Fleet API endpoints: one command to many clients at once."""
+import asyncio
+import json
+import logging
+import time
+from typing import AsyncIterator, Dict, List, Any
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from models import FleetCommandRequest, FleetSelector
+from websocket_manager import manager
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/api/fleet", tags=["fleet"])
+
+
+async def resolve_selector(selector: FleetSelector, request: Request) -> List[str]:
+    """UUIDs of the clients a selector matches."""
+    repo = request.app.state.repo
+
+    if selector.type == "online":
+        return sorted(manager.get_online_clients())
+
+    if selector.type == "all":
+        registered = await repo.get_all_clients()
+        return sorted(set(manager.get_all_clients()) | {client["uuid"] for client in registered})
+
+    if selector.type == "tag":
+        if not selector.tag:
+            raise HTTPException(status_code=400, detail="selector.tag is required")
+        return await repo.get_clients_by_tag(selector.tag)
+
+    if selector.type == "uuids":
+        if not selector.uuids:
+            raise HTTPException(status_code=400, detail="selector.uuids is required")
+        return list(dict.fromkeys(selector.uuids))
+
+    raise HTTPException(status_code=400, detail=f"Unknown selector type: {selector.type}")
+
+
+def _line(record: Dict[str, Any]) -> bytes:
+    return (json.dumps(record, default=str) + "\n").encode()
+
+
+async def fan_out(request: FleetCommandRequest, uuids: List[str]) -> AsyncIterator[bytes]:
+    """Send the command to every client concurrently and yield NDJSON lines as results arrive."""
+    start = time.perf_counter()
+    results: asyncio.Queue = asyncio.Queue()
+    limit = asyncio.Semaphore(request.concurrency)
+
+    async def send(uuid: str):
+        async with limit:
+            sent_at = time.perf_counter()
+            response = await manager.send_command(uuid, request.command, request.params, timeout=request.timeout)
+        await results.put({
+            "type": "result",
+            "client_uuid": uuid,
+            "success": response.success,
+            "data": response.data,
+            "error": response.error,
+            "elapsed_ms": round((time.perf_counter() - sent_at) * 1000, 1)
+        })
+
+    task = asyncio.ensure_future(asyncio.gather(*(send(uuid) for uuid in uuids)))
+    succeeded = 0
+    try:
+        yield _line({"type": "start", "command": request.command, "targets": len(uuids)})
+        for _ in uuids:
+            result = await results.get()
+            succeeded += result["success"]
+            yield _line(result)
+        await task
+    finally:
+        # Stops outstanding sends if the caller goes away mid-stream
+        task.cancel()
+
+    elapsed_ms = round((time.perf_counter() - start) * 1000, 1)
+    logger.info(f"Fleet command {request.command}: {succeeded}/{len(uuids)} succeeded in {elapsed_ms} ms")
+    yield _line({
+        "type": "summary",
+        "targets": len(uuids),
+        "succeeded": succeeded,
+        "failed": len(uuids) - succeeded,
+        "elapsed_ms": elapsed_ms
+    })
+
+
+@router.post("/command")
+async def fleet_command(body: FleetCommandRequest, request: Request):
+    """Send a command to every client the selector matches.
+
+    Results stream back as NDJSON: a ``start`` line with the target count,
+    one ``result`` line per client as it answers (or times out after
+    ``timeout`` seconds), then a ``summary`` line.
+    """
+    uuids = await resolve_selector(body.selector, request)
+    return StreamingResponse(fan_out(body, uuids), media_type="application/x-ndjson")
@@ -1,23 +1,92 @@
 """SQLite database layer for LMS."""
 import sqlite3
 import json
-from datetime import datetime
+import threading
+from datetime import datetime, timedelta, timezone
 from typing import List, Dict, Optional
 import logging
 
+from write_queue import WriteQueue, connect, FLUSH_INTERVAL, BATCH_ROWS
+
 logger = logging.getLogger(__name__)
 
 
+# 各表保留天数（0 表示永久保留）及其时间列
+RETENTION_DAYS = {
+    "connection_logs": 30,
+    "command_logs": 30,
+    "cctv_logs": 90,
+    "command_stats_hourly": 14,
+    "command_stats_daily": 400,
+}
+RETENTION_COLUMNS = {
+    "connection_logs": "connected_at",
+    "command_logs": "executed_at",
+    "cctv_logs": "created_at",
+    "command_stats_hourly": "hour",
+    "command_stats_daily": "day",
+}
+
+# 清理时每个事务最多删除的行数，避免长时间占用写线程
+RETENTION_CHUNK_ROWS = 2000
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def _now() -> str:
+    """Current UTC time in CURRENT_TIMESTAMP format (writes are committed later)."""
+    return datetime.now(timezone.utc).strftime(TIMESTAMP_FORMAT)
+
+
+def parse_retention(spec: str) -> Dict[str, float]:
+    """解析保留天数配置，如 command_logs=7,cctv_logs=30"""
+    retention = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        table, _, days = item.partition("=")
+        table = table.strip()
+        if table not in RETENTION_DAYS:
+            raise ValueError(f"Unknown table in retention config: {table}")
+        retention[table] = float(days)
+    return retention
+
+
 class LMSDatabase:
     """LMS 本地数据库"""
 
-    def __init__(self, db_path: str = "lms.db"):
+    def __init__(self, db_path: str = "lms.db", flush_interval: float = FLUSH_INTERVAL, batch_rows: int = BATCH_ROWS,
+                 retention: Optional[Dict[str, float]] = None):
+        """
+        Args:
+            db_path: 数据库文件路径
+            flush_interval: 日志和状态写入最长延迟（秒），到时合并为一个事务提交
+            batch_rows: 积压达到该条数时立即提交
+            retention: 覆盖默认保留天数，如 {"command_logs": 7}
+        """
         self.db_path = db_path
-        self.conn = sqlite3.connect(db_path, check_same_thread=False)
-        self.conn.row_factory = sqlite3.Row  # 返回字典格式
+        self.retention = {**RETENTION_DAYS, **(retention or {})}
+
+        # 每个线程使用自己的读连接（WAL 下读写互不阻塞）
+        self._local = threading.local()
+        self._read_conns: List[sqlite3.Connection] = []
+        self._read_conns_lock = threading.Lock()
         self.init_db()
+
+        # 所有写入都经由唯一的写线程串行提交；状态和日志写入批量提交，不阻塞事件循环
+        self.writer = WriteQueue(db_path, flush_interval=flush_interval, batch_rows=batch_rows)
         logger.info(f"LMS database initialized at {db_path}")
 
+    @property
+    def conn(self) -> sqlite3.Connection:
+        """当前线程的数据库连接"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = connect(self.db_path, check_same_thread=False)
+            conn.row_factory = sqlite3.Row  # 返回字典格式
+            self._local.conn = conn
+            with self._read_conns_lock:
+                self._read_conns.append(conn)
+        return conn
+
     def init_db(self):
         """初始化数据库"""
         cursor = self.conn.cursor()
@@ -43,6 +112,16 @@ class LMSDatabase:
             )
         """)
 
+        # 客户端标签（用于按标签批量下发命令）
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS client_tags (
+                client_uuid TEXT NOT NULL,
+                tag TEXT NOT NULL,
+                PRIMARY KEY (client_uuid, tag)
+            )
+        """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_client_tags_tag ON client_tags (tag)")
+
         # 连接历史
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS connection_logs (
@@ -64,9 +143,14 @@ class LMSDatabase:
                 params TEXT,
                 response TEXT,
                 success BOOLEAN,
-                executed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                executed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                coalesced BOOLEAN NOT NULL DEFAULT 0
             )
         """)
+        # 旧库补充 coalesced 列：共享了其他调用方在途请求的调用记为 1
+        cursor.execute("PRAGMA table_info(command_logs)")
+        if "coalesced" not in {row[1] for row in cursor.fetchall()}:
+            cursor.execute("ALTER TABLE command_logs ADD COLUMN coalesced BOOLEAN NOT NULL DEFAULT 0")
 
         # CCTV 事件日志
         cursor.execute("""
@@ -80,9 +164,88 @@ class LMSDatabase:
             )
         """)
 
+        # 按客户端和时间查询、按时间清理用的索引
+        cursor.executescript("""
+            CREATE INDEX IF NOT EXISTS idx_connection_logs_client_time ON connection_logs (client_uuid, connected_at);
+            CREATE INDEX IF NOT EXISTS idx_connection_logs_time ON connection_logs (connected_at);
+            CREATE INDEX IF NOT EXISTS idx_command_logs_client_time ON command_logs (client_uuid, executed_at, success);
+            CREATE INDEX IF NOT EXISTS idx_command_logs_time ON command_logs (executed_at);
+            CREATE INDEX IF NOT EXISTS idx_cctv_logs_client_time ON cctv_logs (client_uuid, created_at);
+            CREATE INDEX IF NOT EXISTS idx_cctv_logs_time ON cctv_logs (created_at);
+        """)
+
+        self._init_rollups(cursor)
+
         self.conn.commit()
         logger.info("Database tables created successfully")
 
+    def _init_rollups(self, cursor: sqlite3.Cursor):
+        """命令统计汇总表：按小时、按天及累计，由触发器在写入命令日志时维护"""
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'command_stats'")
+        backfill = cursor.fetchone() is None
+
+        cursor.executescript("""
+            CREATE TABLE IF NOT EXISTS command_stats_hourly (
+                client_uuid TEXT NOT NULL,
+                hour TEXT NOT NULL,
+                total INTEGER NOT NULL DEFAULT 0,
+                successful INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (client_uuid, hour)
+            );
+            CREATE INDEX IF NOT EXISTS idx_command_stats_hourly_hour ON command_stats_hourly (hour);
+
+            CREATE TABLE IF NOT EXISTS command_stats_daily (
+                client_uuid TEXT NOT NULL,
+                day TEXT NOT NULL,
+                total INTEGER NOT NULL DEFAULT 0,
+                successful INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (client_uuid, day)
+            );
+            CREATE INDEX IF NOT EXISTS idx_command_stats_daily_day ON command_stats_daily (day);
+
+            CREATE TABLE IF NOT EXISTS command_stats (
+                client_uuid TEXT PRIMARY KEY,
+                total INTEGER NOT NULL DEFAULT 0,
+                successful INTEGER NOT NULL DEFAULT 0,
+                last_command_time TIMESTAMP
+            );
+
+            CREATE TRIGGER IF NOT EXISTS trg_command_logs_rollup AFTER INSERT ON command_logs
+            BEGIN
+                INSERT INTO command_stats_hourly (client_uuid, hour, total, successful)
+                VALUES (NEW.client_uuid, substr(NEW.executed_at, 1, 13) || ':00:00', 1, NEW.success = 1)
+                ON CONFLICT (client_uuid, hour) DO UPDATE SET
+                    total = total + 1, successful = successful + excluded.successful;
+
+                INSERT INTO command_stats_daily (client_uuid, day, total, successful)
+                VALUES (NEW.client_uuid, substr(NEW.executed_at, 1, 10), 1, NEW.success = 1)
+                ON CONFLICT (client_uuid, day) DO UPDATE SET
+                    total = total + 1, successful = successful + excluded.successful;
+
+                INSERT INTO command_stats (client_uuid, total, successful, last_command_time)
+                VALUES (NEW.client_uuid, 1, NEW.success = 1, NEW.executed_at)
+                ON CONFLICT (client_uuid) DO UPDATE SET
+                    total = total + 1, successful = successful + excluded.successful,
+                    last_command_time = max(coalesce(last_command_time, ''), excluded.last_command_time);
+            END;
+        """)
+
+        if backfill:
+            # 升级前已有的命令日志
+            cursor.executescript("""
+                INSERT INTO command_stats_hourly (client_uuid, hour, total, successful)
+                SELECT client_uuid, substr(executed_at, 1, 13) || ':00:00', COUNT(*), SUM(success = 1)
+                FROM command_logs GROUP BY 1, 2;
+
+                INSERT INTO command_stats_daily (client_uuid, day, total, successful)
+                SELECT client_uuid, substr(executed_at, 1, 10), COUNT(*), SUM(success = 1)
+                FROM command_logs GROUP BY 1, 2;
+
+                INSERT INTO command_stats (client_uuid, total, successful, last_command_time)
+                SELECT client_uuid, COUNT(*), SUM(success = 1), MAX(executed_at)
+                FROM command_logs GROUP BY 1;
+            """)
+
     def get_config(self, key: str) -> Optional[str]:
         """获取配置"""
         cursor = self.conn.cursor()
@@ -91,59 +254,49 @@ class LMSDatabase:
         return result[0] if result else None
 
     def set_config(self, key: str, value: str):
-        """设置配置"""
-        cursor = self.conn.cursor()
-        cursor.execute("""
+        """设置配置（等待写入完成）"""
+        self.writer.submit("""
             INSERT OR REPLACE INTO lms_config (key, value, updated_at)
-            VALUES (?, ?, CURRENT_TIMESTAMP)
-        """, (key, value))
-        self.conn.commit()
+            VALUES (?, ?, ?)
+        """, (key, value, _now()))
+        self.writer.flush()
 
     def register_client(self, uuid: str, name: str, ip: str, metadata: dict = None):
-        """注册客户端"""
-        cursor = self.conn.cursor()
-        cursor.execute("""
+        """注册客户端（异步写入）"""
+        self.writer.submit("""
             INSERT OR REPLACE INTO clients (uuid, name, ip_address, last_seen, status, metadata)
-            VALUES (?, ?, ?, CURRENT_TIMESTAMP, 'online', ?)
-        """, (uuid, name, ip, json.dumps(metadata) if metadata else None))
-        self.conn.commit()
+            VALUES (?, ?, ?, ?, 'online', ?)
+        """, (uuid, name, ip, _now(), json.dumps(metadata) if metadata else None))
         logger.info(f"Client registered: {uuid} ({name}) from {ip}")
 
     def update_client_status(self, uuid: str, status: str):
-        """更新客户端状态"""
-        cursor = self.conn.cursor()
-        cursor.execute("""
-            UPDATE clients SET status = ?, last_seen = CURRENT_TIMESTAMP
+        """更新客户端状态（异步写入）"""
+        self.writer.submit("""
+            UPDATE clients SET status = ?, last_seen = ?
             WHERE uuid = ?
-        """, (status, uuid))
-        self.conn.commit()
+        """, (status, _now(), uuid))
 
     def log_connection(self, uuid: str, event_type: str, ip: str):
-        """记录连接事件"""
-        cursor = self.conn.cursor()
-        cursor.execute("""
-            INSERT INTO connection_logs (client_uuid, event_type, ip_address)
-            VALUES (?, ?, ?)
-        """, (uuid, event_type, ip))
-        self.conn.commit()
+        """记录连接事件（异步写入）"""
+        self.writer.submit("""
+            INSERT INTO connection_logs (client_uuid, event_type, connected_at, ip_address)
+            VALUES (?, ?, ?, ?)
+        """, (uuid, event_type, _now(), ip))
 
-    def log_command(self, uuid: str, command: str, params: dict, response: dict, success: bool):
-        """记录命令执行"""
-        cursor = self.conn.cursor()
-        cursor.execute("""
-            INSERT INTO command_logs (client_uuid, command, params, response, success)
-            VALUES (?, ?, ?, ?, ?)
-        """, (uuid, command, json.dumps(params), json.dumps(response), success))
-        self.conn.commit()
+    def log_command(self, uuid: str, command: str, params: dict, response: dict, success: bool,
+                    coalesced: bool = False):
+        """记录一次命令调用（异步写入）；coalesced 表示与相同的在途命令共享了响应、未单独下发"""
+        self.writer.submit("""
+            INSERT INTO command_logs (client_uuid, command, params, response, success, executed_at, coalesced)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, (uuid, command, json.dumps(params), json.dumps(response), success, _now(), coalesced))
 
     def log_cctv_event(self, uuid: str, event_type: str, camera_id: str = None, details: dict = None):
-        """记录 CCTV 事件"""
-        cursor = self.conn.cursor()
-        cursor.execute("""
-            INSERT INTO cctv_logs (client_uuid, event_type, camera_id, details)
-            VALUES (?, ?, ?, ?)
-        """, (uuid, event_type, camera_id, json.dumps(details) if details else None))
-        self.conn.commit()
+        """记录 CCTV 事件（异步写入）"""
+        self.writer.submit("""
+            INSERT INTO cctv_logs (client_uuid, event_type, camera_id, details, created_at)
+            VALUES (?, ?, ?, ?, ?)
+        """, (uuid, event_type, camera_id, json.dumps(details) if details else None, _now()))
 
     def get_online_clients(self) -> List[Dict]:
         """获取在线客户端"""
@@ -166,32 +319,82 @@ class LMSDatabase:
         """)
         return [dict(row) for row in cursor.fetchall()]
 
+    def get_client_tags(self, uuid: str) -> List[str]:
+        """获取客户端标签"""
+        cursor = self.conn.cursor()
+        cursor.execute("SELECT tag FROM client_tags WHERE client_uuid = ? ORDER BY tag", (uuid,))
+        return [row[0] for row in cursor.fetchall()]
+
+    def get_clients_by_tag(self, tag: str) -> List[str]:
+        """获取带有指定标签的客户端 UUID"""
+        cursor = self.conn.cursor()
+        cursor.execute("SELECT client_uuid FROM client_tags WHERE tag = ? ORDER BY client_uuid", (tag,))
+        return [row[0] for row in cursor.fetchall()]
+
+    def set_client_tags(self, uuid: str, tags: List[str]):
+        """替换客户端标签（等待写入完成）"""
+        def replace_tags(conn):
+            conn.execute("DELETE FROM client_tags WHERE client_uuid = ?", (uuid,))
+            conn.executemany("INSERT OR IGNORE INTO client_tags (client_uuid, tag) VALUES (?, ?)",
+                             [(uuid, tag) for tag in tags])
+
+        self.writer.call(replace_tags)
+
     def get_client_stats(self, uuid: str) -> Dict:
-        """获取客户端统计"""
+        """获取客户端统计（读取汇总表，不扫描命令日志）"""
         cursor = self.conn.cursor()
 
-        # 命令执行统计
+        # 累计命令执行统计
         cursor.execute("""
-            SELECT
-                COUNT(*) as total_commands,
-                SUM(CASE WHEN success = 1 THEN 1 ELSE 0 END) as successful_commands,
-                MAX(executed_at) as last_command_time
-            FROM command_logs
+            SELECT total, successful, last_command_time
+            FROM command_stats
             WHERE client_uuid = ?
         """, (uuid,))
         result = cursor.fetchone()
+        total, successful, last_command_time = result if result else (0, 0, None)
+
+        # 最近 24 小时（最多 25 行小时汇总）
+        since = (datetime.now(timezone.utc) - timedelta(hours=24)).strftime("%Y-%m-%d %H:00:00")
+        cursor.execute("""
+            SELECT SUM(total), SUM(successful)
+            FROM command_stats_hourly
+            WHERE client_uuid = ? AND hour >= ?
+        """, (uuid, since))
+        recent_total, recent_successful = cursor.fetchone()
 
         return {
-            "total_commands": result[0] or 0,
-            "successful_commands": result[1] or 0,
-            "last_command_time": result[2]
+            "total_commands": total,
+            "successful_commands": successful,
+            "success_rate": round(successful / total, 4) if total else None,
+            "last_command_time": last_command_time,
+            "last_24h": {
+                "total_commands": recent_total or 0,
+                "successful_commands": recent_successful or 0,
+                "success_rate": round(recent_successful / recent_total, 4) if recent_total else None
+            }
         }
 
+    def get_command_rollups(self, uuid: str, period: str = "hour", limit: int = 24) -> List[Dict]:
+        """获取按小时（period="hour"）或按天（period="day"）汇总的命令数和成功率，最新的在前"""
+        if period not in ("hour", "day"):
+            raise ValueError("period must be 'hour' or 'day'")
+        table = "command_stats_hourly" if period == "hour" else "command_stats_daily"
+        cursor = self.conn.cursor()
+        cursor.execute(f"""
+            SELECT {period} AS period, total, successful,
+                   ROUND(CAST(successful AS REAL) / total, 4) AS success_rate
+            FROM {table}
+            WHERE client_uuid = ?
+            ORDER BY {period} DESC
+            LIMIT ?
+        """, (uuid, limit))
+        return [dict(row) for row in cursor.fetchall()]
+
     def get_command_history(self, uuid: str, limit: int = 50) -> List[Dict]:
         """获取命令历史"""
         cursor = self.conn.cursor()
         cursor.execute("""
-            SELECT command, params, response, success, executed_at
+            SELECT command, params, response, success, executed_at, coalesced
             FROM command_logs
             WHERE client_uuid = ?
             ORDER BY executed_at DESC
@@ -211,7 +414,55 @@ class LMSDatabase:
         """, (uuid, limit))
         return [dict(row) for row in cursor.fetchall()]
 
+    def prune(self, now: Optional[datetime] = None) -> Dict[str, int]:
+        """按保留天数删除过期的日志和汇总行
+
+        分批删除，每批一个事务，期间其他写入可以穿插提交。
+
+        Returns:
+            每个表删除的行数
+        """
+        now = now or datetime.now(timezone.utc)
+        deleted = {}
+        for table, days in self.retention.items():
+            if days <= 0:
+                continue
+            column = RETENTION_COLUMNS[table]
+            cutoff = (now - timedelta(days=days)).strftime(TIMESTAMP_FORMAT)
+            if column == "day":
+                cutoff = cutoff[:10]
+
+            def delete_chunk(conn, table=table, column=column, cutoff=cutoff):
+                return conn.execute(f"""
+                    DELETE FROM {table} WHERE rowid IN (
+                        SELECT rowid FROM {table} WHERE {column} < ? LIMIT ?
+                    )
+                """, (cutoff, RETENTION_CHUNK_ROWS)).rowcount
+
+            deleted[table] = 0
+            while True:
+                count = self.writer.call(delete_chunk)
+                deleted[table] += count
+                if count < RETENTION_CHUNK_ROWS:
+                    break
+
+        if any(deleted.values()):
+            logger.info(f"Retention pruned {deleted}")
+        return deleted
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """等待已提交的异步写入全部落盘"""
+        return self.writer.flush(timeout)
+
+    def get_write_stats(self) -> Dict:
+        """写队列统计（积压深度、批次、提交耗时等）"""
+        return self.writer.get_stats()
+
     def close(self):
-        """关闭数据库连接"""
-        self.conn.close()
+        """写入剩余队列后关闭数据库连接"""
+        self.writer.close()
+        with self._read_conns_lock:
+            for conn in self._read_conns:
+                conn.close()
+            self._read_conns.clear()
         logger.info("Database connection closed")
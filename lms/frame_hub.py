@@ -0,0 +1,149 @@
+"""Per-client fan-out of camera preview frames to viewers."""
+import asyncio
+import logging
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from fastapi import WebSocket
+
+logger = logging.getLogger(__name__)
+
+# Frames buffered per viewer; when a viewer lags, the oldest frame is dropped
+VIEWER_QUEUE_SIZE = 2
+
+# Seconds between preview_feedback messages to the sending client
+FEEDBACK_INTERVAL = 1.0
+
+
+class ViewerSession:
+    """A viewer connection with its own bounded frame queue and sender task."""
+
+    def __init__(self, viewer_id: str, websocket: WebSocket, queue_size: int = VIEWER_QUEUE_SIZE):
+        self.viewer_id = viewer_id
+        self.websocket = websocket
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.task: Optional[asyncio.Task] = None
+        self.connected_at = time.time()
+
+        # Metrics
+        self.frames_sent = 0
+        self.frames_dropped = 0
+        self.bytes_sent = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+        self.latency_last = 0.0
+
+    def offer(self, frame: bytes) -> None:
+        """Queue a frame without waiting, dropping the oldest queued frame if full."""
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.frames_dropped += 1
+        self.queue.put_nowait((frame, time.perf_counter()))
+
+    async def run(self, on_closed: Callable[[str], None]) -> None:
+        """Send queued frames until the connection fails or the task is cancelled."""
+        try:
+            while True:
+                frame, queued_at = await self.queue.get()
+                await self.websocket.send_bytes(frame)
+
+                # Time from the frame arriving at the LMS to it being written to this viewer
+                latency = time.perf_counter() - queued_at
+                self.frames_sent += 1
+                self.bytes_sent += len(frame)
+                self.latency_total += latency
+                self.latency_last = latency
+                self.latency_max = max(self.latency_max, latency)
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.error(f"Error sending frame to viewer {self.viewer_id}: {e}")
+            on_closed(self.viewer_id)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Per-viewer counters and latencies (milliseconds)."""
+        return {
+            "viewer_id": self.viewer_id,
+            "connected_at": self.connected_at,
+            "frames_sent": self.frames_sent,
+            "frames_dropped": self.frames_dropped,
+            "bytes_sent": self.bytes_sent,
+            "queued": self.queue.qsize(),
+            "latency_avg_ms": self.latency_total / self.frames_sent * 1000 if self.frames_sent else 0.0,
+            "latency_max_ms": self.latency_max * 1000,
+            "latency_last_ms": self.latency_last * 1000,
+        }
+
+
+class FrameHub:
+    """Fans frames from one client out to the viewers watching it.
+
+    Frames arrive already serialized (binary frame messages), so publishing
+    only enqueues the same bytes object per viewer. Every viewer is sent to by
+    its own task, so a slow viewer drops frames instead of delaying others.
+    """
+
+    def __init__(self, client_uuid: str):
+        self.client_uuid = client_uuid
+        self.viewers: Dict[str, ViewerSession] = {}
+        self.frames_published = 0
+        self._feedback_at = time.monotonic()
+        # Viewer counters at the last feedback: {viewer_id: (frames_sent, frames_dropped, latency_total)}
+        self._feedback_marks: Dict[str, Tuple[int, int, float]] = {}
+
+    def add_viewer(self, viewer_id: str, websocket: WebSocket,
+                   on_closed: Callable[[str], None]) -> ViewerSession:
+        session = ViewerSession(viewer_id, websocket)
+        session.task = asyncio.create_task(session.run(on_closed))
+        self.viewers[viewer_id] = session
+        return session
+
+    def remove_viewer(self, viewer_id: str) -> Optional[ViewerSession]:
+        session = self.viewers.pop(viewer_id, None)
+        if session and session.task and session.task is not asyncio.current_task():
+            session.task.cancel()
+        return session
+
+    def publish(self, frame: bytes) -> None:
+        """Hand a frame to every viewer without waiting for any send."""
+        self.frames_published += 1
+        for session in self.viewers.values():
+            session.offer(frame)
+
+    def take_feedback(self) -> Optional[Dict[str, Any]]:
+        """Delivery feedback for the sending client, at most once per FEEDBACK_INTERVAL.
+
+        Reports the best-served viewer since the last feedback: the share of
+        frames it was sent (rather than dropped) and its average latency. A
+        client only needs to back off when even that viewer falls behind.
+        """
+        now = time.monotonic()
+        if now - self._feedback_at < FEEDBACK_INTERVAL or not self.viewers:
+            return None
+        self._feedback_at = now
+
+        best = None
+        marks = {}
+        for viewer_id, session in self.viewers.items():
+            sent0, dropped0, latency0 = self._feedback_marks.get(viewer_id, (0, 0, 0.0))
+            marks[viewer_id] = (session.frames_sent, session.frames_dropped, session.latency_total)
+            sent = session.frames_sent - sent0
+            total = sent + session.frames_dropped - dropped0
+            if total == 0:
+                continue
+            delivered = sent / total
+            latency_ms = (session.latency_total - latency0) / sent * 1000 if sent else 0.0
+            if best is None or (delivered, -latency_ms) > (best[0], -best[1]):
+                best = (delivered, latency_ms)
+        self._feedback_marks = marks
+
+        if best is None:
+            return None
+        return {"viewers": len(self.viewers), "delivered": round(best[0], 3), "latency_ms": round(best[1], 1)}
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "client_uuid": self.client_uuid,
+            "frames_published": self.frames_published,
+            "viewers": [session.get_stats() for session in self.viewers.values()],
+        }
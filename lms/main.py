@@ -1,4 +1,5 @@
 """LMS (Light Management Service) - FastAPI application for managing ClassTop clients."""
+import asyncio
 import logging
 import os
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Request
@@ -8,8 +9,9 @@ from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
 
 from websocket_manager import manager
-from api import clients, settings, camera
-from db import LMSDatabase
+from api import clients, settings, camera, fleet
+from db import LMSDatabase, parse_retention
+from repository import LMSRepository
 from management_client import ManagementClient
 
 # Configure logging
@@ -19,8 +21,15 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Initialize database
-lms_db = LMSDatabase()
+# Initialize database; request handlers go through the async repository.
+# LMS_RETENTION_DAYS overrides how long logs are kept, e.g. "command_logs=7,cctv_logs=30"
+lms_db = LMSDatabase(retention=parse_retention(os.getenv("LMS_RETENTION_DAYS", "")))
+repo = LMSRepository(lms_db)
+manager.command_logger = lms_db.log_command
+
+# How often expired log rows are deleted (seconds)
+RETENTION_INTERVAL = float(os.getenv("LMS_RETENTION_INTERVAL", "3600"))
+retention_task = None
 
 # Initialize Management-Server client (optional)
 management_url = os.getenv("MANAGEMENT_SERVER_URL")
@@ -51,14 +60,31 @@ app.add_middleware(
 app.include_router(clients.router)
 app.include_router(settings.router)
 app.include_router(camera.router)
+app.include_router(fleet.router)
+
+# Routers reach the database through request.app.state.repo
+app.state.repo = repo
+
+
+async def retention_loop():
+    """Delete log rows older than their retention period, once per interval"""
+    while True:
+        try:
+            await repo.prune()
+        except Exception as e:
+            logger.error(f"Retention job failed: {e}")
+        await asyncio.sleep(RETENTION_INTERVAL)
 
 
 @app.on_event("startup")
 async def startup():
-    """Startup event: register to Management-Server"""
+    """Startup event: start retention job, register to Management-Server"""
+    global retention_task
+    retention_task = asyncio.create_task(retention_loop())
+
     if management_client:
         logger.info("Attempting to register with Management-Server...")
-        if management_client.register():
+        if await asyncio.to_thread(management_client.register):
             management_client.start_heartbeat()
         else:
             logger.warning("Failed to register with Management-Server, continuing in standalone mode")
@@ -66,10 +92,13 @@ async def startup():
 
 @app.on_event("shutdown")
 async def shutdown():
-    """Shutdown event: stop heartbeat and close database"""
+    """Shutdown event: stop heartbeat and retention job, flush queued writes and close database"""
     if management_client:
         management_client.stop_heartbeat()
-    lms_db.close()
+    if retention_task:
+        retention_task.cancel()
+    await repo.close()
+    logger.info(f"Database writes flushed: {repo.get_write_stats()}")
     logger.info("LMS shutdown complete")
 
 
@@ -87,8 +116,8 @@ async def websocket_endpoint(websocket: WebSocket, client_uuid: str):
     logger.info(f"WebSocket connection request from client {client_uuid} at {client_ip}")
 
     # Register client in database
-    lms_db.register_client(client_uuid, f"Client-{client_uuid[:8]}", client_ip)
-    lms_db.log_connection(client_uuid, "connected", client_ip)
+    await repo.register_client(client_uuid, f"Client-{client_uuid[:8]}", client_ip)
+    await repo.log_connection(client_uuid, "connected", client_ip)
 
     await manager.connect(websocket, client_uuid, client_ip)
 
@@ -96,12 +125,12 @@ async def websocket_endpoint(websocket: WebSocket, client_uuid: str):
         await manager.listen_to_client(client_uuid)
     except WebSocketDisconnect:
         logger.info(f"Client {client_uuid} disconnected")
-        lms_db.update_client_status(client_uuid, "offline")
-        lms_db.log_connection(client_uuid, "disconnected", client_ip)
+        await repo.update_client_status(client_uuid, "offline")
+        await repo.log_connection(client_uuid, "disconnected", client_ip)
         manager.disconnect(client_uuid)
     except Exception as e:
         logger.error(f"Error in WebSocket connection for {client_uuid}: {e}")
-        lms_db.update_client_status(client_uuid, "error")
+        await repo.update_client_status(client_uuid, "error")
         manager.disconnect(client_uuid)
 
 
@@ -113,19 +142,14 @@ async def viewer_websocket_endpoint(websocket: WebSocket, client_uuid: str, view
     await manager.add_viewer(websocket, viewer_id, client_uuid)
 
     try:
-        # Keep connection alive
+        # Keep connection alive; viewers only send pings/close messages
         while True:
-            # Just receive pings/close messages
-            try:
-                message = await websocket.receive_json()
-                # Handle viewer commands if needed
-            except Exception:
-                break
+            await websocket.receive_text()
     except WebSocketDisconnect:
         logger.info(f"Viewer {viewer_id} disconnected")
-        manager.remove_viewer(viewer_id)
     except Exception as e:
         logger.error(f"Error in viewer WebSocket for {viewer_id}: {e}")
+    finally:
         manager.remove_viewer(viewer_id)
 
 
@@ -137,9 +161,10 @@ async def health_check():
 
     return {
         "status": "healthy",
-        "lms_uuid": lms_db.get_config("lms_uuid"),
+        "lms_uuid": await repo.get_config("lms_uuid"),
         "clients_online": online_clients,
         "clients_total": total_clients,
+        "db_write_queue_depth": repo.get_write_stats()["depth"],
         "management_server_connected": management_client is not None and management_client.api_key is not None
     }
 
@@ -147,10 +172,17 @@ async def health_check():
 @app.get("/api/stats")
 async def get_stats():
     """Get LMS statistics."""
+    online_clients, all_clients, lms_uuid = await asyncio.gather(
+        repo.get_online_clients(),
+        repo.get_all_clients(),
+        repo.get_config("lms_uuid")
+    )
     return {
-        "online_clients": lms_db.get_online_clients(),
-        "total_clients": len(lms_db.get_all_clients()),
-        "lms_uuid": lms_db.get_config("lms_uuid")
+        "online_clients": online_clients,
+        "total_clients": len(all_clients),
+        "lms_uuid": lms_uuid,
+        "db_writes": repo.get_write_stats(),
+        "commands": manager.get_command_stats()
     }
 
 
@@ -165,5 +197,7 @@ if __name__ == "__main__":
         host="0.0.0.0",
         port=8000,
         reload=True,
-        log_level="info"
+        log_level="info",
+        # Camera frames are JPEG bytes; deflating them costs CPU for no gain
+        ws_per_message_deflate=False
     )
@@ -20,6 +20,7 @@ class ClientInfo(BaseModel):
     settings: Optional[Dict[str, str]] = None
     ip_address: Optional[str] = None
     user_agent: Optional[str] = None
+    capabilities: List[str] = Field(default_factory=list)  # e.g. "batch"
 
 
 class CommandRequest(BaseModel):
@@ -35,6 +36,22 @@ class CommandResponse(BaseModel):
     error: Optional[str] = None
 
 
+class FleetSelector(BaseModel):
+    """Clients a fleet command goes to."""
+    type: str = "online"  # "all", "online", "tag" or "uuids"
+    tag: Optional[str] = None
+    uuids: Optional[List[str]] = None
+
+
+class FleetCommandRequest(BaseModel):
+    """Command to send to many clients at once."""
+    command: str
+    params: Optional[Dict[str, Any]] = None
+    selector: FleetSelector = Field(default_factory=FleetSelector)
+    timeout: float = Field(10.0, gt=0)  # per client
+    concurrency: int = Field(500, ge=1)  # commands in flight at once
+
+
 class SettingUpdate(BaseModel):
     """Setting update request."""
     key: str
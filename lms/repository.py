@@ -0,0 +1,99 @@
+"""Async data access for the FastAPI app: reads on a thread pool, writes through the writer thread."""
+import asyncio
+import functools
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from db import LMSDatabase
+
+logger = logging.getLogger(__name__)
+
+# Reader threads, each with its own SQLite connection
+READ_WORKERS = 4
+
+
+class LMSRepository:
+    """Awaitable wrapper around ``LMSDatabase`` for use inside ``async def`` handlers.
+
+    Queries run on a small pool of reader threads (one connection each), so
+    they never block the event loop. Writes go to the database's write queue,
+    whose single writer thread serializes them; ``set_config`` waits for its
+    write to be committed, the status and log writes do not.
+    """
+
+    def __init__(self, db: LMSDatabase, read_workers: int = READ_WORKERS):
+        self.db = db
+        self._readers = ThreadPoolExecutor(max_workers=read_workers, thread_name_prefix="lms-db-read")
+
+    async def _run(self, fn: Callable, *args, **kwargs) -> Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._readers, functools.partial(fn, *args, **kwargs))
+
+    # Reads
+
+    async def get_config(self, key: str) -> Optional[str]:
+        return await self._run(self.db.get_config, key)
+
+    async def get_online_clients(self) -> List[Dict]:
+        return await self._run(self.db.get_online_clients)
+
+    async def get_all_clients(self) -> List[Dict]:
+        return await self._run(self.db.get_all_clients)
+
+    async def get_client_tags(self, uuid: str) -> List[str]:
+        return await self._run(self.db.get_client_tags, uuid)
+
+    async def get_clients_by_tag(self, tag: str) -> List[str]:
+        return await self._run(self.db.get_clients_by_tag, tag)
+
+    async def get_client_stats(self, uuid: str) -> Dict:
+        return await self._run(self.db.get_client_stats, uuid)
+
+    async def get_command_history(self, uuid: str, limit: int = 50) -> List[Dict]:
+        return await self._run(self.db.get_command_history, uuid, limit)
+
+    async def get_cctv_events(self, uuid: str, limit: int = 100) -> List[Dict]:
+        return await self._run(self.db.get_cctv_events, uuid, limit)
+
+    async def get_command_rollups(self, uuid: str, period: str = "hour", limit: int = 24) -> List[Dict]:
+        return await self._run(self.db.get_command_rollups, uuid, period, limit)
+
+    # Writes
+
+    async def set_config(self, key: str, value: str) -> None:
+        await asyncio.to_thread(self.db.set_config, key, value)
+
+    async def set_client_tags(self, uuid: str, tags: List[str]) -> None:
+        await asyncio.to_thread(self.db.set_client_tags, uuid, tags)
+
+    async def register_client(self, uuid: str, name: str, ip: str, metadata: dict = None) -> None:
+        self.db.register_client(uuid, name, ip, metadata)
+
+    async def update_client_status(self, uuid: str, status: str) -> None:
+        self.db.update_client_status(uuid, status)
+
+    async def log_connection(self, uuid: str, event_type: str, ip: str) -> None:
+        self.db.log_connection(uuid, event_type, ip)
+
+    async def log_command(self, uuid: str, command: str, params: dict, response: dict, success: bool,
+                          coalesced: bool = False) -> None:
+        self.db.log_command(uuid, command, params, response, success, coalesced)
+
+    async def log_cctv_event(self, uuid: str, event_type: str, camera_id: str = None, details: dict = None) -> None:
+        self.db.log_cctv_event(uuid, event_type, camera_id, details)
+
+    async def prune(self) -> Dict[str, int]:
+        """Delete expired log rows (chunked transactions on the writer thread)."""
+        return await asyncio.to_thread(self.db.prune)
+
+    async def flush(self, timeout: Optional[float] = None) -> bool:
+        return await asyncio.to_thread(self.db.flush, timeout)
+
+    def get_write_stats(self) -> Dict:
+        return self.db.get_write_stats()
+
+    async def close(self) -> None:
+        """Finish pending reads, flush queued writes and close the database."""
+        await asyncio.to_thread(self._readers.shutdown, True)
+        await asyncio.to_thread(self.db.close)
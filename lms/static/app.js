@@ -202,6 +202,10 @@ async function saveSetting() {
 let cameraInitialized = false;
 let statusRefreshInterval = null;
 let previewWebSocket = null;
+let previewFrameUrl = null;
+
+// Size of the binary camera frame header (see frame_protocol.py)
+const FRAME_HEADER_SIZE = 20;
 let previewActive = false;
 
 async function initializeCamera() {
@@ -562,8 +566,11 @@ async function startPreview() {
 
         const cameraIndex = parseInt(document.getElementById('selectedCamera')?.value || 0);
 
+        // Ask for frames no wider than the preview area (max 800px), so the client scales before encoding
+        const previewWidth = Math.min(800, document.getElementById('previewContainer')?.clientWidth || 800);
+
         // Start preview on server
-        const response = await fetch(`${API_BASE}/api/camera/${currentClient}/preview/start?camera_index=${cameraIndex}&fps=10`, {
+        const response = await fetch(`${API_BASE}/api/camera/${currentClient}/preview/start?camera_index=${cameraIndex}&fps=10&width=${previewWidth}`, {
             method: 'POST'
         });
 
@@ -579,6 +586,7 @@ async function startPreview() {
         const wsUrl = `${wsProtocol}//${window.location.host}/ws/viewer/${currentClient}/${viewerId}`;
 
         previewWebSocket = new WebSocket(wsUrl);
+        previewWebSocket.binaryType = 'arraybuffer';
 
         previewWebSocket.onopen = () => {
             console.log('Preview WebSocket connected');
@@ -595,6 +603,11 @@ async function startPreview() {
 
         previewWebSocket.onmessage = (event) => {
             try {
+                if (event.data instanceof ArrayBuffer) {
+                    // Binary frame: fixed header followed by JPEG bytes
+                    showPreviewFrame(new Blob([event.data.slice(FRAME_HEADER_SIZE)], { type: 'image/jpeg' }));
+                    return;
+                }
                 const data = JSON.parse(event.data);
                 if (data.type === 'camera_frame' && data.frame) {
                     // Update image source with base64 frame
@@ -625,6 +638,17 @@ async function startPreview() {
     }
 }
 
+function showPreviewFrame(blob) {
+    const img = document.getElementById('previewImage');
+    const url = URL.createObjectURL(blob);
+    img.src = url;
+    // Release the previous frame once the new one replaces it
+    if (previewFrameUrl) {
+        URL.revokeObjectURL(previewFrameUrl);
+    }
+    previewFrameUrl = url;
+}
+
 async function stopPreview() {
     if (!currentClient) return;
 
@@ -656,4 +680,8 @@ async function stopPreview() {
     document.getElementById('previewPlaceholder').style.display = 'block';
     document.getElementById('previewImage').style.display = 'none';
     document.getElementById('previewImage').src = '';
+    if (previewFrameUrl) {
+        URL.revokeObjectURL(previewFrameUrl);
+        previewFrameUrl = null;
+    }
 }
\ No newline at end of file
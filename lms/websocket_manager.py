@@ -1,15 +1,55 @@
 """WebSocket connection manager for handling multiple clients."""
 import asyncio
+import base64
+import binascii
+import itertools
 import json
 from datetime import datetime
-from typing import Dict, Optional, Any
+from typing import Callable, Dict, List, Optional, Any
 from fastapi import WebSocket, WebSocketDisconnect
 from models import ClientInfo, ClientStatus, CommandRequest, CommandResponse
+from frame_protocol import decode_frame, encode_frame
+from frame_hub import FrameHub
 import logging
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Seconds between sweeps that time out abandoned pending requests
+PENDING_SWEEP_INTERVAL = 1.0
+# Most commands carried by one batch frame
+MAX_BATCH_COMMANDS = 64
+# Read-only commands that identical in-flight requests may share by default;
+# anything that changes client state is always sent
+COALESCE_COMMANDS = frozenset({
+    "get_all_settings",
+    "get_setting",
+    "camera_get_cameras",
+    "camera_get_encoders",
+    "camera_get_status",
+    "camera_get_preview_stats",
+})
+
+
+class PendingRequest:
+    """A command sent to a client and awaiting its response, shared by coalesced callers."""
+
+    __slots__ = ("request_id", "client_uuid", "command", "params", "key", "future", "deadline", "waiters")
+
+    def __init__(self, request_id: str, client_uuid: str, command: str, params: Dict[str, Any],
+                 key: Optional[tuple], future: asyncio.Future, deadline: float):
+        self.request_id = request_id
+        self.client_uuid = client_uuid
+        self.command = command
+        self.params = params
+        self.key = key
+        self.future = future
+        self.deadline = deadline  # loop time after which no caller is waiting any more
+        self.waiters = 0
+
+    def to_message(self) -> Dict[str, Any]:
+        return {"request_id": self.request_id, "command": self.command, "params": self.params}
+
 
 class WebSocketManager:
     """Manages WebSocket connections from multiple clients."""
@@ -21,13 +61,34 @@ class WebSocketManager:
         # Client information: {client_uuid: ClientInfo}
         self.clients: Dict[str, ClientInfo] = {}
 
-        # Pending responses: {request_id: asyncio.Future}
-        self.pending_requests: Dict[str, asyncio.Future] = {}
+        # Pending responses: {request_id: PendingRequest}
+        self.pending_requests: Dict[str, PendingRequest] = {}
+
+        # In-flight requests by (client_uuid, command, params), for coalescing
+        self._inflight: Dict[tuple, PendingRequest] = {}
+
+        # Commands queued for each client's next outgoing frame: {client_uuid: [PendingRequest]}
+        self._outbox: Dict[str, List[PendingRequest]] = {}
+        self._tasks = set()
+        self._sweeper: Optional[asyncio.Task] = None
+
+        # Camera preview fan-out per watched client: {client_uuid: FrameHub}
+        self.hubs: Dict[str, FrameHub] = {}
+
+        # Viewer index: {viewer_id: watched client_uuid}
+        self.viewers: Dict[str, str] = {}
+
+        # Sequence numbers assigned to legacy JSON frames: {(client_uuid, camera_index): seq}
+        self._legacy_frame_seq: Dict[Any, int] = {}
 
-        # Viewer connections for camera preview: {viewer_id: {websocket, watching_client}}
-        self.viewers: Dict[str, Dict[str, Any]] = {}
+        self._request_ids = itertools.count(1)
+        self.command_stats = {"sent": 0, "coalesced": 0, "batches": 0, "batched_commands": 0,
+                              "timeouts": 0, "swept": 0}
 
-        self._request_counter = 0
+        # Optional hook called with (client_uuid, command, params, response, success, coalesced)
+        # once per send_command call, e.g. LMSDatabase.log_command; coalesced marks
+        # callers that shared another caller's request
+        self.command_logger: Optional[Callable[[str, str, Dict[str, Any], Dict[str, Any], bool, bool], None]] = None
 
     async def connect(self, websocket: WebSocket, client_uuid: str, client_ip: str = None):
         """Accept a new client connection."""
@@ -40,6 +101,8 @@ class WebSocketManager:
             self.clients[client_uuid].status = ClientStatus.ONLINE
             self.clients[client_uuid].last_seen = datetime.now()
             self.clients[client_uuid].ip_address = client_ip
+            # Announced again in the client's first state update
+            self.clients[client_uuid].capabilities = []
         else:
             self.clients[client_uuid] = ClientInfo(
                 uuid=client_uuid,
@@ -59,6 +122,14 @@ class WebSocketManager:
             self.clients[client_uuid].status = ClientStatus.OFFLINE
             self.clients[client_uuid].last_seen = datetime.now()
 
+        for key in [key for key in self._legacy_frame_seq if key[0] == client_uuid]:
+            del self._legacy_frame_seq[key]
+
+        # Commands to this client will not be answered
+        for pending in [p for p in self.pending_requests.values() if p.client_uuid == client_uuid]:
+            self._complete(pending, CommandResponse(success=False, error="Client disconnected"))
+        self._outbox.pop(client_uuid, None)
+
         logger.info(f"Client {client_uuid} disconnected")
 
     async def send_message(self, client_uuid: str, message: Dict[str, Any]) -> bool:
@@ -76,15 +147,23 @@ class WebSocketManager:
             self.disconnect(client_uuid)
             return False
 
-    async def send_command(self, client_uuid: str, command: str, params: Optional[Dict[str, Any]] = None, timeout: float = 30.0) -> CommandResponse:
+    async def send_command(self, client_uuid: str, command: str, params: Optional[Dict[str, Any]] = None,
+                           timeout: float = 30.0, coalesce: Optional[bool] = None) -> CommandResponse:
         """
         Send a command to client and wait for response.
 
+        A read-only command (see COALESCE_COMMANDS) identical to one already in
+        flight (same client, command and params) shares that request and its
+        response instead of being sent again. Commands issued to the same client in the same event-loop turn
+        go out in one ``batch`` frame if the client supports it.
+
         Args:
             client_uuid: Target client UUID
             command: Command name
             params: Command parameters
             timeout: Timeout in seconds
+            coalesce: Share an identical in-flight request; None does so only for
+                      COALESCE_COMMANDS, False always sends
 
         Returns:
             CommandResponse from the client
@@ -92,38 +171,134 @@ class WebSocketManager:
         if client_uuid not in self.active_connections:
             return CommandResponse(success=False, error="Client not connected")
 
-        # Generate request ID
-        self._request_counter += 1
-        request_id = f"req_{self._request_counter}_{datetime.now().timestamp()}"
+        params = params or {}
+        if coalesce is None:
+            coalesce = command in COALESCE_COMMANDS
+        key = (client_uuid, command, json.dumps(params, sort_keys=True, default=str)) if coalesce else None
+        pending = self._inflight.get(key) if key else None
+        owner = pending is None
+        if owner:
+            pending = self._dispatch(client_uuid, command, params, key)
+        else:
+            self.command_stats["coalesced"] += 1
 
-        # Create future for response
-        future = asyncio.Future()
-        self.pending_requests[request_id] = future
+        pending.waiters += 1
+        pending.deadline = max(pending.deadline, asyncio.get_running_loop().time() + timeout)
+        try:
+            # Shielded: one caller timing out must not cancel the shared request
+            response = await asyncio.wait_for(asyncio.shield(pending.future), timeout=timeout)
+        except asyncio.TimeoutError:
+            self.command_stats["timeouts"] += 1
+            response = CommandResponse(success=False, error="Command timeout")
+        finally:
+            pending.waiters -= 1
 
-        # Send command
-        message = {
-            "type": "command",
-            "request_id": request_id,
-            "command": command,
-            "params": params or {}
-        }
+        # Every caller is logged, so command rollups count API calls, not client executions
+        self._log_command(client_uuid, command, params, response, coalesced=not owner)
+        return response
+
+    async def send_commands(self, client_uuid: str, commands: List[CommandRequest],
+                            timeout: float = 30.0) -> List[CommandResponse]:
+        """Send several commands to a client in one frame and wait for all responses.
 
-        success = await self.send_message(client_uuid, message)
-        if not success:
-            del self.pending_requests[request_id]
-            return CommandResponse(success=False, error="Failed to send command")
+        Duplicates are shared only for read-only commands, as in send_command;
+        repeated writes are each sent.
+        """
+        return await asyncio.gather(*(
+            self.send_command(client_uuid, request.command, request.params, timeout)
+            for request in commands
+        ))
+
+    def _dispatch(self, client_uuid: str, command: str, params: Dict[str, Any], key: Optional[tuple]) -> PendingRequest:
+        """Register a new request and queue it for the client's next outgoing frame."""
+        loop = asyncio.get_running_loop()
+        request_id = f"req_{next(self._request_ids)}"
+        pending = PendingRequest(request_id, client_uuid, command, params, key, loop.create_future(), loop.time())
+        self.pending_requests[request_id] = pending
+        if key:
+            self._inflight[key] = pending
+
+        outbox = self._outbox.get(client_uuid)
+        if outbox is None:
+            # Flushed once the callers scheduled in this loop turn have queued theirs
+            outbox = self._outbox[client_uuid] = []
+            self._spawn(self._flush_outbox(client_uuid))
+        outbox.append(pending)
+
+        if self._sweeper is None or self._sweeper.done():
+            self._sweeper = self._spawn(self._sweep_pending())
+        return pending
+
+    def _spawn(self, coro) -> asyncio.Task:
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def _flush_outbox(self, client_uuid: str):
+        """Write the queued commands: batch frames, or one frame each for clients without batch support."""
+        requests = [p for p in self._outbox.pop(client_uuid, []) if not p.future.done()]
+        client = self.clients.get(client_uuid)
+        if len(requests) > 1 and client and "batch" in client.capabilities:
+            for start in range(0, len(requests), MAX_BATCH_COMMANDS):
+                chunk = requests[start:start + MAX_BATCH_COMMANDS]
+                message = {"type": "batch", "commands": [p.to_message() for p in chunk]}
+                if await self._send_requests(client_uuid, message, chunk):
+                    self.command_stats["batches"] += 1
+                    self.command_stats["batched_commands"] += len(chunk)
+        else:
+            for pending in requests:
+                await self._send_requests(client_uuid, {"type": "command", **pending.to_message()}, [pending])
 
-        # Wait for response
+    async def _send_requests(self, client_uuid: str, message: Dict[str, Any], requests: List[PendingRequest]) -> bool:
+        if await self.send_message(client_uuid, message):
+            self.command_stats["sent"] += len(requests)
+            return True
+        for pending in requests:
+            self._complete(pending, CommandResponse(success=False, error="Failed to send command"))
+        return False
+
+    def _complete(self, pending: PendingRequest, response: CommandResponse):
+        """Remove a request from the pending tables and hand its response to every waiter."""
+        self.pending_requests.pop(pending.request_id, None)
+        if pending.key and self._inflight.get(pending.key) is pending:
+            del self._inflight[pending.key]
+        if not pending.future.done():
+            pending.future.set_result(response)
+
+    def _resolve(self, message: Dict[str, Any]):
+        pending = self.pending_requests.get(message.get("request_id"))
+        if pending:
+            self._complete(pending, CommandResponse(
+                success=message.get("success", False),
+                data=message.get("data"),
+                error=message.get("error")
+            ))
+
+    async def _sweep_pending(self):
+        """Drop requests no caller is waiting for any more; runs while any are pending."""
+        loop = asyncio.get_running_loop()
+        while self.pending_requests:
+            await asyncio.sleep(PENDING_SWEEP_INTERVAL)
+            now = loop.time()
+            expired = [p for p in self.pending_requests.values() if p.deadline <= now]
+            for pending in expired:
+                self._complete(pending, CommandResponse(success=False, error="Command timeout"))
+            self.command_stats["swept"] += len(expired)
+
+    def get_command_stats(self) -> Dict[str, int]:
+        """Command dispatch counters and the current pending-table size."""
+        return {**self.command_stats, "pending": len(self.pending_requests), "inflight": len(self._inflight)}
+
+    def _log_command(self, client_uuid: str, command: str, params: Dict[str, Any], response: CommandResponse,
+                     coalesced: bool = False):
+        if self.command_logger is None:
+            return
         try:
-            response = await asyncio.wait_for(future, timeout=timeout)
-            return response
-        except asyncio.TimeoutError:
-            del self.pending_requests[request_id]
-            return CommandResponse(success=False, error="Command timeout")
+            self.command_logger(client_uuid, command, params,
+                                {"data": response.data, "error": response.error}, response.success, coalesced)
         except Exception as e:
-            if request_id in self.pending_requests:
-                del self.pending_requests[request_id]
-            return CommandResponse(success=False, error=str(e))
+            logger.error(f"Failed to log command {command} for {client_uuid}: {e}")
 
     async def handle_message(self, client_uuid: str, message: Dict[str, Any]):
         """Handle incoming message from client."""
@@ -131,15 +306,12 @@ class WebSocketManager:
 
         if message_type == "response":
             # Handle command response
-            request_id = message.get("request_id")
-            if request_id in self.pending_requests:
-                response = CommandResponse(
-                    success=message.get("success", False),
-                    data=message.get("data"),
-                    error=message.get("error")
-                )
-                self.pending_requests[request_id].set_result(response)
-                del self.pending_requests[request_id]
+            self._resolve(message)
+
+        elif message_type == "batch_response":
+            # Responses to a batch frame, one per command
+            for response in message.get("responses", []):
+                self._resolve(response)
 
         elif message_type == "heartbeat":
             # Update last seen time
@@ -152,11 +324,13 @@ class WebSocketManager:
                 data = message.get("data", {})
                 if "settings" in data:
                     self.clients[client_uuid].settings = data["settings"]
+                if "capabilities" in data:
+                    self.clients[client_uuid].capabilities = data["capabilities"]
                 self.clients[client_uuid].last_seen = datetime.now()
 
         elif message_type == "camera_frame":
-            # Broadcast camera frame to all viewers
-            await self.broadcast_camera_frame(client_uuid, message)
+            # Legacy base64-in-JSON frame from an older client
+            await self.handle_legacy_camera_frame(client_uuid, message)
 
         else:
             logger.warning(f"Unknown message type from {client_uuid}: {message_type}")
@@ -169,8 +343,16 @@ class WebSocketManager:
 
         try:
             while True:
-                message = await websocket.receive_json()
-                await self.handle_message(client_uuid, message)
+                message = await websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    raise WebSocketDisconnect(message.get("code", 1000))
+
+                data = message.get("bytes")
+                if data is not None:
+                    # Binary messages are camera frames
+                    await self.handle_camera_frame(client_uuid, data)
+                else:
+                    await self.handle_message(client_uuid, json.loads(message["text"]))
         except WebSocketDisconnect:
             self.disconnect(client_uuid)
         except Exception as e:
@@ -201,44 +383,88 @@ class WebSocketManager:
             client_uuid: Client UUID to watch
         """
         await websocket.accept()
-        self.viewers[viewer_id] = {
-            'websocket': websocket,
-            'watching_client': client_uuid
-        }
+        if viewer_id in self.viewers:
+            self.remove_viewer(viewer_id)
+
+        hub = self.hubs.get(client_uuid)
+        if hub is None:
+            hub = self.hubs[client_uuid] = FrameHub(client_uuid)
+        hub.add_viewer(viewer_id, websocket, self.remove_viewer)
+        self.viewers[viewer_id] = client_uuid
         logger.info(f"Viewer {viewer_id} connected to watch client {client_uuid}")
 
     def remove_viewer(self, viewer_id: str):
         """Remove a viewer connection."""
-        if viewer_id in self.viewers:
-            del self.viewers[viewer_id]
-            logger.info(f"Viewer {viewer_id} disconnected")
+        client_uuid = self.viewers.pop(viewer_id, None)
+        if client_uuid is None:
+            return
 
-    async def broadcast_camera_frame(self, client_uuid: str, frame_message: Dict[str, Any]):
-        """Broadcast camera frame to all viewers watching this client.
+        hub = self.hubs.get(client_uuid)
+        if hub:
+            hub.remove_viewer(viewer_id)
+            if not hub.viewers:
+                del self.hubs[client_uuid]
+        logger.info(f"Viewer {viewer_id} disconnected")
+
+    def get_viewer_stats(self, client_uuid: str) -> Dict[str, Any]:
+        """Frame fan-out metrics for the viewers of a client."""
+        hub = self.hubs.get(client_uuid)
+        if hub is None:
+            return {"client_uuid": client_uuid, "frames_published": 0, "viewers": []}
+        return hub.get_stats()
+
+    async def handle_camera_frame(self, client_uuid: str, data: bytes):
+        """Handle a binary frame message from a client.
 
         Args:
             client_uuid: Source client UUID
-            frame_message: Frame message containing camera_index and frame data
+            data: Frame message (header + JPEG bytes)
         """
-        # Find all viewers watching this client
-        viewers_to_remove = []
-
-        for viewer_id, viewer_info in self.viewers.items():
-            if viewer_info['watching_client'] == client_uuid:
-                try:
-                    await viewer_info['websocket'].send_json({
-                        'type': 'camera_frame',
-                        'client_uuid': client_uuid,
-                        'camera_index': frame_message.get('camera_index'),
-                        'frame': frame_message.get('frame')
-                    })
-                except Exception as e:
-                    logger.error(f"Error sending frame to viewer {viewer_id}: {e}")
-                    viewers_to_remove.append(viewer_id)
-
-        # Remove disconnected viewers
-        for viewer_id in viewers_to_remove:
-            self.remove_viewer(viewer_id)
+        try:
+            header, _ = decode_frame(data)
+        except ValueError as e:
+            logger.warning(f"Dropping invalid frame from {client_uuid}: {e}")
+            return
+        self.broadcast_camera_frame(client_uuid, data)
+        await self.send_preview_feedback(client_uuid, header.camera_index)
+
+    async def send_preview_feedback(self, client_uuid: str, camera_index: int):
+        """Tell a client how well its preview frames reach viewers, for its adaptive quality control.
+
+        Only binary-frame clients get feedback; older JSON-frame clients do not know the message.
+        """
+        hub = self.hubs.get(client_uuid)
+        feedback = hub.take_feedback() if hub else None
+        if feedback:
+            await self.send_message(client_uuid, {"type": "preview_feedback", "camera_index": camera_index, **feedback})
+
+    async def handle_legacy_camera_frame(self, client_uuid: str, message: Dict[str, Any]):
+        """Convert a legacy JSON frame ({camera_index, frame: base64}) to a binary frame.
+
+        The base64 payload is decoded once here rather than re-serialized for every viewer.
+        """
+        camera_index = message.get("camera_index") or 0
+        try:
+            payload = base64.b64decode(message.get("frame") or "", validate=True)
+        except (binascii.Error, ValueError) as e:
+            logger.warning(f"Dropping invalid legacy frame from {client_uuid}: {e}")
+            return
+
+        key = (client_uuid, camera_index)
+        seq = self._legacy_frame_seq.get(key, 0)
+        self._legacy_frame_seq[key] = seq + 1
+        self.broadcast_camera_frame(client_uuid, encode_frame(camera_index, seq, payload))
+
+    def broadcast_camera_frame(self, client_uuid: str, frame: bytes):
+        """Hand a binary frame message to every viewer watching this client.
+
+        Args:
+            client_uuid: Source client UUID
+            frame: Frame message, forwarded to viewers unchanged
+        """
+        hub = self.hubs.get(client_uuid)
+        if hub:
+            hub.publish(frame)
 
 
 # Global instance
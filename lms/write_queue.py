@@ -0,0 +1,213 @@
+"""Write-behind queue: log and status writes committed in groups on a writer thread."""
+import logging
+import sqlite3
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+# A batch is committed when its oldest write has waited this long...
+FLUSH_INTERVAL = 0.05
+# ...or when this many writes are queued, whichever comes first
+BATCH_ROWS = 500
+
+
+def connect(db_path: str, **kwargs) -> sqlite3.Connection:
+    """Open a connection in WAL mode, so readers and the writer do not block each other."""
+    conn = sqlite3.connect(db_path, timeout=10, **kwargs)
+    conn.execute("PRAGMA journal_mode=WAL")
+    # With WAL, NORMAL only syncs at checkpoints and stays consistent after a crash
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+class WriteQueue:
+    """Queues SQL writes and commits them in groups on a dedicated thread.
+
+    ``submit`` never blocks, so it is safe to call from the event loop;
+    writes are applied in submission order, one transaction per batch.
+    """
+
+    def __init__(self, db_path: str, flush_interval: float = FLUSH_INTERVAL, batch_rows: int = BATCH_ROWS):
+        self.db_path = db_path
+        self.flush_interval = flush_interval
+        self.batch_rows = batch_rows
+
+        self._queue: deque = deque()  # (sql, params, queued_at); (fn, future, queued_at) for call()
+        self._cond = threading.Condition()
+        self._submitted = 0
+        self._committed = 0
+        self._closing = False
+        self._flush_requested = False
+
+        # Metrics
+        self.batches = 0
+        self.rows_written = 0
+        self.errors = 0
+        self.max_depth = 0
+        self.commit_time_total = 0.0
+        self.commit_time_max = 0.0
+        self.wait_time_max = 0.0
+        self.last_commit_at: Optional[float] = None
+
+        self._conn = connect(db_path, check_same_thread=False)
+        self._thread = threading.Thread(target=self._run, name="lms-db-writer", daemon=True)
+        self._thread.start()
+
+    @property
+    def depth(self) -> int:
+        """Writes submitted and not yet committed."""
+        return self._submitted - self._committed
+
+    def submit(self, sql: str, params: Sequence[Any] = ()) -> None:
+        """Queue a write; it is committed within ``flush_interval`` seconds."""
+        with self._cond:
+            if self._closing:
+                raise RuntimeError("write queue is closed")
+            self._queue.append((sql, params, time.perf_counter()))
+            self._submitted += 1
+            self.max_depth = max(self.max_depth, len(self._queue))
+            self._cond.notify_all()
+
+    def call(self, fn: Callable[[sqlite3.Connection], Any], timeout: Optional[float] = None) -> Any:
+        """Run ``fn(conn)`` on the writer thread in its own transaction and return its result.
+
+        Used for maintenance (e.g. chunked deletes) that needs the writer's
+        connection and a result; queued writes before it are committed first.
+        """
+        future: Future = Future()
+        with self._cond:
+            if self._closing:
+                raise RuntimeError("write queue is closed")
+            self._queue.append((fn, future, time.perf_counter()))
+            self._submitted += 1
+            self._flush_requested = True
+            self._cond.notify_all()
+        return future.result(timeout)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every write submitted so far is committed.
+
+        Returns:
+            True if flushed, False on timeout
+        """
+        with self._cond:
+            target = self._submitted
+            # Commit what is queued now rather than waiting out the interval
+            self._flush_requested = True
+            self._cond.notify_all()
+            return self._cond.wait_for(lambda: self._committed >= target, timeout)
+
+    def close(self, timeout: Optional[float] = 10.0) -> None:
+        """Commit the remaining writes, then stop the writer thread."""
+        with self._cond:
+            self._closing = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            logger.error(f"Write queue did not drain in {timeout}s, {self.depth} writes lost")
+        else:
+            self._conn.close()
+
+    def _next_batch(self) -> list:
+        """Wait until a batch is due and take it off the queue."""
+        with self._cond:
+            while True:
+                if self._queue:
+                    due = self._queue[0][2] + self.flush_interval
+                    remaining = due - time.perf_counter()
+                    if self._closing or self._flush_requested or remaining <= 0 \
+                            or len(self._queue) >= self.batch_rows:
+                        count = min(len(self._queue), self.batch_rows)
+                        batch = [self._queue.popleft() for _ in range(count)]
+                        if not self._queue:
+                            self._flush_requested = False
+                        return batch
+                    self._cond.wait(remaining)
+                elif self._closing:
+                    return []
+                else:
+                    self._flush_requested = False
+                    self._cond.wait()
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if not batch:
+                return
+            start = time.perf_counter()
+            i = 0
+            while i < len(batch):
+                if callable(batch[i][0]):
+                    self._call(*batch[i][:2])
+                    i += 1
+                    continue
+                j = i
+                while j < len(batch) and not callable(batch[j][0]):
+                    j += 1
+                self._write(batch[i:j])
+                i = j
+            now = time.perf_counter()
+
+            elapsed = now - start
+            self.batches += 1
+            self.commit_time_total += elapsed
+            self.commit_time_max = max(self.commit_time_max, elapsed)
+            self.wait_time_max = max(self.wait_time_max, start - batch[0][2])
+            self.last_commit_at = time.time()
+            with self._cond:
+                self._committed += len(batch)
+                self._cond.notify_all()
+
+    def _write(self, batch: list) -> None:
+        """Apply a batch in one transaction, grouping runs of the same statement."""
+        try:
+            with self._conn:
+                i = 0
+                while i < len(batch):
+                    sql = batch[i][0]
+                    j = i
+                    while j < len(batch) and batch[j][0] == sql:
+                        j += 1
+                    self._conn.executemany(sql, [params for _, params, _ in batch[i:j]])
+                    i = j
+            self.rows_written += len(batch)
+        except sqlite3.Error as e:
+            # Retry one by one so a single bad write does not lose the batch
+            logger.error(f"Batch of {len(batch)} writes failed ({e}), retrying individually")
+            for sql, params, _ in batch:
+                try:
+                    with self._conn:
+                        self._conn.execute(sql, params)
+                    self.rows_written += 1
+                except sqlite3.Error as row_error:
+                    self.errors += 1
+                    logger.error(f"Write failed: {row_error} ({sql.split()[0]} {params})")
+
+    def _call(self, fn: Callable[[sqlite3.Connection], Any], future: Future) -> None:
+        try:
+            with self._conn:
+                result = fn(self._conn)
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"Writer call {getattr(fn, '__name__', fn)} failed: {e}")
+            future.set_exception(e)
+        else:
+            future.set_result(result)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "depth": self.depth,
+            "max_depth": self.max_depth,
+            "batches": self.batches,
+            "rows_written": self.rows_written,
+            "rows_per_batch_avg": round(self.rows_written / self.batches, 1) if self.batches else 0.0,
+            "commit_ms_avg": round(self.commit_time_total / self.batches * 1000, 2) if self.batches else 0.0,
+            "commit_ms_max": round(self.commit_time_max * 1000, 2),
+            "wait_ms_max": round(self.wait_time_max * 1000, 2),
+            "errors": self.errors,
+            "last_commit_at": self.last_commit_at,
+        }
@@ -42,6 +42,7 @@ def main() -> int:
         event_handler.initialize(app_handle, portal)
 
         # Initialize database and managers
+        reminder_manager = None
         try:
             _db.init_db()
 
@@ -60,12 +61,8 @@ def main() -> int:
             try:
                 from .reminder_manager import ReminderManager
                 reminder_manager = ReminderManager(schedule_manager, settings_manager, app_handle)
-                reminder_enabled = settings_manager.get_setting('reminder_enabled')
-                if reminder_enabled == 'true':
-                    reminder_manager.start()
-                    _logger.log_message("info", "Reminder service started")
-                else:
-                    _logger.log_message("info", "Reminder service disabled in settings")
+                # Always runs; reminder_enabled is re-checked whenever settings change
+                reminder_manager.start(portal)
             except Exception as e:
                 _logger.log_message("warning", f"Failed to initialize reminder manager: {e}")
 
@@ -149,4 +146,14 @@ def main() -> int:
             print("Warning: Failed to setup system tray")
 
         exit_code = app.run_return()
+
+        # The portal waits for its tasks on exit, so stop the reminder loop first
+        if reminder_manager:
+            reminder_manager.stop()
+
+        # Deliver anything still buffered before tearing down
+        event_handler.shutdown()
+
+        from .db_pool import close_all_pools
+        close_all_pools()
         return exit_code
@@ -11,6 +11,7 @@ from datetime import datetime
 try:
     from fastapi import FastAPI, HTTPException, Query
     from fastapi.middleware.cors import CORSMiddleware
+    from fastapi.responses import StreamingResponse
     from pydantic import BaseModel
     import uvicorn
 except ImportError:
@@ -18,6 +19,7 @@ except ImportError:
     print("Warning: FastAPI not installed. API server will not be available.")
 
 from . import logger as _logger
+from .schedule_io import EXPORT_FORMATS, EXPORT_MEDIA_TYPES, exportable_settings, iter_encoded, iter_export
 
 
 class APIServer:
@@ -221,15 +223,67 @@ class APIServer:
                 raise HTTPException(status_code=500, detail=str(e))
 
         @self.app.get("/api/schedule/week", tags=["Schedule"])
-        async def get_schedule_for_week(week: Optional[int] = Query(None)):
+        async def get_schedule_for_week(week: Optional[int] = Query(None),
+                                        group_by_day: bool = Query(False, description="Group classes by day_of_week")):
             """获取整周课程表 / Get schedule for entire week."""
             try:
-                classes = self.schedule_manager.get_schedule_for_week(week)
+                classes = self.schedule_manager.get_schedule_for_week(week, group_by_day)
                 return {"success": True, "data": classes}
             except Exception as e:
                 self.logger.log_message("error", f"API error getting weekly schedule: {e}")
                 raise HTTPException(status_code=500, detail=str(e))
 
+        @self.app.get("/api/schedule/conflicts", tags=["Schedule"])
+        async def get_schedule_conflicts():
+            """检查当前课程表中的所有冲突 / List every conflicting pair in the stored schedule."""
+            try:
+                conflicts = self.schedule_manager.check_conflicts_bulk()
+                return {"success": True, "data": conflicts}
+            except Exception as e:
+                self.logger.log_message("error", f"API error checking schedule conflicts: {e}")
+                raise HTTPException(status_code=500, detail=str(e))
+
+        @self.app.post("/api/schedule/conflicts", tags=["Schedule"])
+        async def check_schedule_conflicts(body: Dict[str, Any]):
+            """批量检查课程表冲突 / List every conflicting pair in a submitted timetable."""
+            try:
+                entries = body.get("entries")
+                if not isinstance(entries, list):
+                    raise HTTPException(status_code=400, detail="Field 'entries' must be a list")
+
+                # Reject malformed input here so only real server errors become 500
+                required_fields = ["day_of_week", "start_time", "end_time"]
+                for i, entry in enumerate(entries):
+                    if not isinstance(entry, dict):
+                        raise HTTPException(status_code=400, detail=f"Entry {i}: must be an object")
+                    for field in required_fields:
+                        if field not in entry:
+                            raise HTTPException(status_code=400, detail=f"Entry {i}: field '{field}' is required")
+                    try:
+                        day_of_week = int(entry["day_of_week"])
+                    except (TypeError, ValueError):
+                        raise HTTPException(status_code=400, detail=f"Entry {i}: 'day_of_week' must be an integer")
+                    if not 1 <= day_of_week <= 7:
+                        raise HTTPException(status_code=400, detail=f"Entry {i}: 'day_of_week' must be 1-7")
+                    for field in ("start_time", "end_time"):
+                        if not isinstance(entry[field], str):
+                            raise HTTPException(status_code=400, detail=f"Entry {i}: '{field}' must be a string")
+                    weeks = entry.get("weeks")
+                    if weeks is not None and (not isinstance(weeks, list)
+                                              or not all(isinstance(week, int) and week >= 1 for week in weeks)):
+                        raise HTTPException(status_code=400,
+                                            detail=f"Entry {i}: 'weeks' must be a list of week numbers >= 1")
+
+                conflicts = self.schedule_manager.check_conflicts_bulk(
+                    entries, bool(body.get("include_existing", False))
+                )
+                return {"success": True, "data": conflicts}
+            except HTTPException:
+                raise
+            except Exception as e:
+                self.logger.log_message("error", f"API error checking schedule conflicts: {e}")
+                raise HTTPException(status_code=500, detail=str(e))
+
         @self.app.delete("/api/schedule/{entry_id}", tags=["Schedule"])
         async def delete_schedule_entry(entry_id: int):
             """删除课程表条目 / Delete a schedule entry."""
@@ -382,6 +436,37 @@ class APIServer:
                 self.logger.log_message("error", f"API error getting statistics: {e}")
                 raise HTTPException(status_code=500, detail=str(e))
 
+        # ==================== Data Export ====================
+
+        @self.app.get("/api/export", tags=["Data"])
+        async def export_data(format: str = Query("jsonl", description="json, jsonl or csv"),
+                              gzip: bool = Query(False, description="gzip-compress the response"),
+                              include_courses: bool = Query(True),
+                              include_schedule: bool = Query(True),
+                              include_settings: bool = Query(False)):
+            """流式导出课程表 / Stream a schedule export straight from the database."""
+            if format not in EXPORT_FORMATS:
+                raise HTTPException(status_code=400, detail=f"format must be one of {', '.join(EXPORT_FORMATS)}")
+
+            try:
+                settings = exportable_settings(self.settings_manager.get_all_settings()) if include_settings else None
+                chunks = iter_export(self.schedule_manager, format, include_courses, include_schedule, settings)
+            except Exception as e:
+                self.logger.log_message("error", f"API error exporting data: {e}")
+                raise HTTPException(status_code=500, detail=str(e))
+
+            filename = f"classtop_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{format}"
+            if gzip:
+                filename += ".gz"
+            media_type = "application/gzip" if gzip else EXPORT_MEDIA_TYPES[format]
+
+            # A sync iterator: Starlette pulls each chunk on its thread pool
+            return StreamingResponse(
+                iter_encoded(chunks, gzip),
+                media_type=media_type,
+                headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+            )
+
         # ==================== Logs ====================
 
         @self.app.get("/api/logs", tags=["Logs"])
@@ -1,14 +1,16 @@
 """Camera Manager - 摄像头监控管理器"""
 from pathlib import Path
-from typing import Optional, Dict, List
+from typing import Optional, Dict, List, Sequence
 import threading
 
 from .camera_monitor import (
     CameraMonitor,
     MonitorConfig,
+    PreviewOptions,
     RecordingOptions
 )
 from . import logger
+from .preview_controller import DEFAULT_MIN_FPS, DEFAULT_MIN_QUALITY, PreviewController
 
 
 class CameraManager:
@@ -28,6 +30,8 @@ class CameraManager:
         self.logger = logger
         self.monitor: Optional[CameraMonitor] = None
         self._lock = threading.Lock()
+        # 自适应预览控制器 {camera_index: PreviewController}
+        self._preview_controllers: Dict[int, PreviewController] = {}
         self._initialized = False
 
         self.logger.log_message("info", "CameraManager initialized")
@@ -269,12 +273,33 @@ class CameraManager:
             self.logger.log_message("error", f"Error stopping streaming: {e}")
             return False
 
-    def start_preview(self, camera_index: int = 0, fps: int = 10) -> bool:
+    def start_preview(
+        self,
+        camera_index: int = 0,
+        fps: int = 10,
+        width: Optional[int] = None,
+        height: Optional[int] = None,
+        quality: Optional[int] = None,
+        grayscale: bool = False,
+        roi: Optional[Sequence[float]] = None,
+        adaptive: bool = True,
+        min_fps: float = DEFAULT_MIN_FPS,
+        min_quality: int = DEFAULT_MIN_QUALITY
+    ) -> bool:
         """开始视频预览（通过WebSocket发送帧）
 
         Args:
             camera_index: 摄像头索引
             fps: 预览帧率（默认10fps以节省带宽）
+            width: 可选的预览宽度（只给宽或高时按比例缩放）
+            height: 可选的预览高度
+            quality: 可选的 JPEG 质量（1-100），默认使用流配置
+            grayscale: 是否以灰度编码
+            roi: 可选的感兴趣区域 (x, y, 宽, 高)，取值为画面比例 0-1
+            adaptive: 是否根据链路拥塞自动调整分辨率、质量和帧率（AIMD）；
+                以上参数为上限
+            min_fps: 自适应时的最低帧率
+            min_quality: 自适应时的最低 JPEG 质量
 
         Returns:
             是否成功
@@ -283,6 +308,15 @@ class CameraManager:
             return False
 
         try:
+            # 创建预览选项（缩放、裁剪和灰度在编码前完成）
+            opts = PreviewOptions(
+                width=width,
+                height=height,
+                quality=quality,
+                grayscale=grayscale,
+                roi=tuple(roi) if roi else None
+            )
+
             # 首先确保流传输已启动
             if not self.monitor.start_streaming(camera_index):
                 self.logger.log_message("error", f"Failed to start streaming for preview on camera {camera_index}")
@@ -291,26 +325,61 @@ class CameraManager:
             # 启动预览帧发送线程
             import threading
             import time
-            import base64
+
+            streamer = self.monitor.get_streamer(camera_index)
+            controller = None
+            if adaptive:
+                controller = PreviewController(
+                    opts, fps,
+                    frame_size=(streamer.width, streamer.height),
+                    default_quality=self.monitor.config.streaming.jpeg_quality,
+                    min_fps=min_fps,
+                    min_quality=min_quality
+                )
+                self._preview_controllers[camera_index] = controller
+            else:
+                self._preview_controllers.pop(camera_index, None)
 
             def preview_loop():
-                interval = 1.0 / fps
-                streamer = self.monitor.get_streamer(camera_index)
+                frame_opts, interval = opts, 1.0 / fps
+                last_seq = -1
+                next_send_at = 0.0
 
                 while hasattr(self, '_preview_active') and self._preview_active.get(camera_index, False):
                     try:
-                        # 获取当前帧
-                        frame_bytes = streamer.get_frame()
-
-                        if frame_bytes:
-                            # 将帧编码为base64
-                            frame_base64 = base64.b64encode(frame_bytes).decode('utf-8')
-
-                            # 通过WebSocket客户端发送帧（如果有的话）
-                            if hasattr(self, 'websocket_client') and self.websocket_client:
-                                self.websocket_client.send_camera_frame(camera_index, frame_base64)
-
-                        time.sleep(interval)
+                        if not streamer.is_streaming:
+                            break
+
+                        # 限制发送频率，到点后再等待比上一帧更新的帧，不重复发送同一帧
+                        delay = next_send_at - time.monotonic()
+                        if delay > 0:
+                            time.sleep(delay)
+
+                        # 超时用于定期检查预览是否已停止
+                        seq, frame_bytes = streamer.wait_for_frame(last_seq, timeout=1.0, options=frame_opts)
+                        if frame_bytes is None:
+                            continue
+                        last_seq = seq
+
+                        client = getattr(self, 'websocket_client', None)
+                        # 通过WebSocket客户端以二进制帧发送JPEG（如果有的话）
+                        if client:
+                            client.send_camera_frame(camera_index, frame_bytes)
+
+                        # 根据发送统计和查看者反馈调整档位
+                        if controller and client and controller.update(client.get_camera_frame_stats(camera_index)):
+                            frame_opts, preview_fps = controller.current()
+                            interval = 1.0 / preview_fps
+                            self.logger.log_message(
+                                "info",
+                                f"Preview on camera {camera_index} moved to tier {controller.tier} "
+                                f"(last congestion: {controller.last_reason}): width={frame_opts.width}, "
+                                f"quality={frame_opts.quality}, fps={preview_fps:.1f}"
+                            )
+
+                        # 上行链路较慢时按实际发送能力降低取帧频率
+                        next_send_at = time.monotonic() + max(
+                            interval, client.get_frame_interval(camera_index) if client else 0.0)
                     except Exception as e:
                         self.logger.log_message("error", f"Preview loop error: {e}")
                         break
@@ -347,6 +416,7 @@ class CameraManager:
             # 停止预览线程
             if hasattr(self, '_preview_active') and camera_index in self._preview_active:
                 self._preview_active[camera_index] = False
+            self._preview_controllers.pop(camera_index, None)
 
             self.logger.log_message("info", f"Stopped preview on camera {camera_index}")
             return True
@@ -368,11 +438,32 @@ class CameraManager:
             return {"active_cameras": 0, "streamers": {}}
 
         try:
-            return self.monitor.get_status(camera_index)
+            status = self.monitor.get_status(camera_index)
+            # 附加自适应预览的当前档位
+            if camera_index is not None:
+                self._attach_preview_status(camera_index, status)
+            else:
+                for index, streamer_status in status.get("streamers", {}).items():
+                    self._attach_preview_status(index, streamer_status)
+            return status
         except Exception as e:
             self.logger.log_message("error", f"Error getting status: {e}")
             return {"active_cameras": 0, "streamers": {}}
 
+    def _attach_preview_status(self, camera_index: int, status: Dict):
+        controller = self._preview_controllers.get(camera_index)
+        status["preview"] = controller.get_status() if controller else None
+
+    def on_preview_feedback(self, feedback: Dict):
+        """处理 LMS 发来的查看者反馈（preview_feedback 消息）
+
+        Args:
+            feedback: 包含 camera_index、delivered、latency_ms 的反馈
+        """
+        controller = self._preview_controllers.get(feedback.get("camera_index", 0))
+        if controller:
+            controller.on_feedback(feedback)
+
     def cleanup(self):
         """清理资源"""
         with self._lock:
@@ -52,6 +52,7 @@ from .config import (
     EncoderConfig,
     RecordingConfig,
     RecordingOptions,
+    PreviewOptions,
     StreamingConfig,
     APIConfig
 )
@@ -60,6 +61,14 @@ from .monitor import CameraMonitor
 from .camera_detector import CameraDetector
 from .encoder_detector import EncoderDetector
 from .video_streamer import VideoStreamer
+from .capture import (
+    CaptureHub,
+    FrameSource,
+    OpenCVSource,
+    SyntheticSource,
+    FileSource,
+    FFmpegPipeRecorder
+)
 
 __all__ = [
     # Main class
@@ -71,6 +80,7 @@ __all__ = [
     'EncoderConfig',
     'RecordingConfig',
     'RecordingOptions',
+    'PreviewOptions',
     'StreamingConfig',
     'APIConfig',
 
@@ -79,6 +89,14 @@ __all__ = [
     'EncoderDetector',
     'VideoStreamer',
 
+    # Shared capture and frame sources
+    'CaptureHub',
+    'FrameSource',
+    'OpenCVSource',
+    'SyntheticSource',
+    'FileSource',
+    'FFmpegPipeRecorder',
+
     # Metadata
     '__version__',
 ]
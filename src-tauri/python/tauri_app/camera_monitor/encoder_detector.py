@@ -1,73 +1,213 @@
 """Hardware encoder detection using FFmpeg."""
+import json
+import os
+import platform
+import shutil
 import subprocess
-from typing import List, Dict
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import List, Dict, Optional, Set
+
+# Encoders to look for, in preference order within each vendor
+ENCODER_TYPES = [
+    # NVIDIA NVENC
+    ("h264_nvenc", "H.264", "NVIDIA NVENC"),
+    ("hevc_nvenc", "H.265", "NVIDIA NVENC"),
+    # Intel QSV
+    ("h264_qsv", "H.264", "Intel Quick Sync"),
+    ("hevc_qsv", "H.265", "Intel Quick Sync"),
+    # AMD AMF
+    ("h264_amf", "H.264", "AMD AMF"),
+    ("hevc_amf", "H.265", "AMD AMF"),
+    # Software fallback
+    ("libx264", "H.264", "Software (libx264)"),
+    ("libx265", "H.265", "Software (libx265)"),
+]
+
+# Probe results are reused until ffmpeg or the GPU driver changes
+DEFAULT_CACHE_FILE = Path.home() / ".classtop" / "encoder_cache.json"
+CACHE_VERSION = 1
+
+# Hardware test encodes run in parallel; each gets this long
+TEST_TIMEOUT = 10
+MAX_TEST_WORKERS = 4
+
+_NO_WINDOW = subprocess.CREATE_NO_WINDOW if hasattr(subprocess, 'CREATE_NO_WINDOW') else 0
+
+
+def parse_encoder_list(output: str) -> Set[str]:
+    """Parse encoder names from ``ffmpeg -encoders`` output.
+
+    Lines after the ``------`` separator look like
+    `` V....D h264_nvenc           NVIDIA NVENC H.264 encoder``.
+    """
+    names = set()
+    in_list = False
+    for line in output.splitlines():
+        fields = line.split()
+        if not in_list:
+            in_list = bool(fields) and set(fields[0]) == {"-"}
+            continue
+        if len(fields) >= 2:
+            names.add(fields[1])
+    return names
+
+
+def gpu_identity() -> List[str]:
+    """Installed display adapters and driver versions, as far as cheaply known.
+
+    Used to invalidate the probe cache when a GPU or driver is installed,
+    removed or updated.
+    """
+    identity = []
+    system = platform.system()
+    try:
+        if system == "Windows":
+            import winreg
+            display_class = r"SYSTEM\CurrentControlSet\Control\Class\{4d36e968-e325-11ce-bfc1-08002be10318}"
+            with winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, display_class) as root:
+                for i in range(winreg.QueryInfoKey(root)[0]):
+                    subkey = winreg.EnumKey(root, i)
+                    if not subkey.isdigit():
+                        continue
+                    try:
+                        with winreg.OpenKey(root, subkey) as adapter:
+                            desc = winreg.QueryValueEx(adapter, "DriverDesc")[0]
+                            version = winreg.QueryValueEx(adapter, "DriverVersion")[0]
+                            identity.append(f"{desc} {version}")
+                    except OSError:
+                        continue
+        elif system == "Linux":
+            for card in sorted(Path("/sys/class/drm").glob("card[0-9]*")):
+                if "-" in card.name:
+                    continue  # connector, e.g. card0-HDMI-A-1
+                device = card / "device"
+                vendor = (device / "vendor").read_text().strip() if (device / "vendor").exists() else ""
+                model = (device / "device").read_text().strip() if (device / "device").exists() else ""
+                driver = os.path.basename(os.readlink(device / "driver")) if (device / "driver").exists() else ""
+                module_version = Path("/sys/module") / driver / "version"
+                version = module_version.read_text().strip() if driver and module_version.exists() else ""
+                identity.append(f"{vendor}:{model} {driver} {version}".strip())
+            nvidia = Path("/proc/driver/nvidia/version")
+            if nvidia.exists():
+                identity.append(nvidia.read_text().splitlines()[0].strip())
+        else:
+            identity.append(f"{system} {platform.release()}")
+    except Exception as e:
+        print(f"Error reading GPU driver info: {e}")
+    return identity
 
 
 class EncoderDetector:
     """Detects available hardware encoders."""
 
-    def __init__(self):
+    def __init__(
+        self,
+        ffmpeg: str = "ffmpeg",
+        cache_file: Optional[str] = None,
+        use_cache: bool = True,
+        max_workers: int = MAX_TEST_WORKERS
+    ):
+        """
+        Args:
+            ffmpeg: FFmpeg executable (name on PATH or full path)
+            cache_file: Where probe results are kept (None = ~/.classtop/encoder_cache.json)
+            use_cache: Reuse results from earlier runs while ffmpeg and the GPU driver are unchanged
+            max_workers: Hardware test encodes run at once
+        """
+        self.ffmpeg = ffmpeg
+        self.cache_file = Path(cache_file) if cache_file else DEFAULT_CACHE_FILE
+        self.use_cache = use_cache
+        self.max_workers = max_workers
         self.encoders = []
 
-    def detect_encoders(self) -> List[Dict]:
-        """Detect available hardware encoders (H.264 and H.265)."""
-        encoders = []
+        # Stats
+        self.last_detection: Dict = {}
 
-        # Check for various hardware encoder types
-        encoder_types = [
-            # NVIDIA NVENC
-            ("h264_nvenc", "H.264", "NVIDIA NVENC"),
-            ("hevc_nvenc", "H.265", "NVIDIA NVENC"),
-            # Intel QSV
-            ("h264_qsv", "H.264", "Intel Quick Sync"),
-            ("hevc_qsv", "H.265", "Intel Quick Sync"),
-            # AMD AMF
-            ("h264_amf", "H.264", "AMD AMF"),
-            ("hevc_amf", "H.265", "AMD AMF"),
-            # Software fallback
-            ("libx264", "H.264", "Software (libx264)"),
-            ("libx265", "H.265", "Software (libx265)"),
-        ]
+    def detect_encoders(self, refresh: bool = False) -> List[Dict]:
+        """Detect available hardware encoders (H.264 and H.265).
+
+        Args:
+            refresh: Probe even if cached results are still valid.
+        """
+        start = time.perf_counter()
+        key = self._cache_key() if self.use_cache else None
+
+        encoders = None
+        if key is not None and not refresh:
+            encoders = self._load_cache(key)
+        source = "cache" if encoders is not None else "probe"
+
+        if encoders is None:
+            encoders = self._probe()
+            if key is not None and encoders is not None:
+                self._save_cache(key, encoders)
+
+        self.encoders = encoders or []
+        self.last_detection = {
+            "source": source,
+            "duration_ms": round((time.perf_counter() - start) * 1000, 1),
+            "encoders": len(self.encoders),
+        }
+        return self.encoders
+
+    def _probe(self) -> Optional[List[Dict]]:
+        """List encoders once and test-encode the hardware ones in parallel.
+
+        Returns:
+            Usable encoders, or None if ffmpeg could not be run.
+        """
+        listed = self._list_encoders()
+        if listed is None:
+            return None
 
-        for codec_name, codec_type, description in encoder_types:
-            if self._check_encoder(codec_name):
-                encoders.append({
-                    "name": codec_name,
-                    "type": codec_type,
-                    "description": description,
-                    "is_hardware": "nvenc" in codec_name or "qsv" in codec_name or "amf" in codec_name
-                })
+        candidates = [entry for entry in ENCODER_TYPES if entry[0] in listed]
+        hardware = [name for name, _, _ in candidates if self._is_hardware(name)]
 
-        self.encoders = encoders
+        usable = {}
+        if hardware:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(hardware))) as pool:
+                usable = dict(zip(hardware, pool.map(self._test_encoder, hardware)))
+
+        encoders = []
+        for codec_name, codec_type, description in candidates:
+            is_hardware = self._is_hardware(codec_name)
+            # For software encoders, listing is enough
+            if is_hardware and not usable[codec_name]:
+                continue
+            encoders.append({
+                "name": codec_name,
+                "type": codec_type,
+                "description": description,
+                "is_hardware": is_hardware
+            })
         return encoders
 
-    def _check_encoder(self, encoder_name: str) -> bool:
-        """Check if a specific encoder is actually usable (not just listed)."""
-        # First check if encoder is listed
-        list_cmd = ["ffmpeg", "-hide_banner", "-encoders"]
+    @staticmethod
+    def _is_hardware(encoder_name: str) -> bool:
+        return "nvenc" in encoder_name or "qsv" in encoder_name or "amf" in encoder_name
 
+    def _list_encoders(self) -> Optional[Set[str]]:
+        """Names of the encoders this ffmpeg build lists, or None on error."""
         try:
             result = subprocess.run(
-                list_cmd,
+                [self.ffmpeg, "-hide_banner", "-encoders"],
                 capture_output=True,
                 text=True,
-                timeout=5
+                timeout=5,
+                creationflags=_NO_WINDOW
             )
-
-            if encoder_name not in result.stdout:
-                return False
-
+            return parse_encoder_list(result.stdout)
         except Exception as e:
             print(f"Error listing encoders: {e}")
-            return False
+            return None
 
-        # For software encoders, listing is enough
-        if "lib" in encoder_name:
-            return True
-
-        # For hardware encoders, test if they actually work
+    def _test_encoder(self, encoder_name: str) -> bool:
+        """Check if a listed hardware encoder actually works on this machine."""
         test_cmd = [
-            "ffmpeg",
+            self.ffmpeg,
+            "-hide_banner",
             "-f", "lavfi",
             "-i", "nullsrc=s=256x256:d=0.1",
             "-c:v", encoder_name,
@@ -80,32 +220,11 @@ class EncoderDetector:
                 test_cmd,
                 capture_output=True,
                 text=True,
-                timeout=10,
-                creationflags=subprocess.CREATE_NO_WINDOW if hasattr(subprocess, 'CREATE_NO_WINDOW') else 0
+                timeout=TEST_TIMEOUT,
+                creationflags=_NO_WINDOW
             )
-
-            # Check if encoding succeeded (return code 0)
-            # Also check stderr doesn't contain critical errors
-            if result.returncode == 0:
-                return True
-
-            # Sometimes ffmpeg returns non-zero but still works
-            # Check for specific error messages that indicate hardware not available
-            error_indicators = [
-                "Cannot load",
-                "not available",
-                "No capable devices",
-                "Failed to",
-                "does not support",
-                "not supported"
-            ]
-
-            stderr_lower = result.stderr.lower()
-            for indicator in error_indicators:
-                if indicator.lower() in stderr_lower:
-                    return False
-
-            return False
+            # Non-zero means the hardware (or its driver) is not available
+            return result.returncode == 0
 
         except subprocess.TimeoutExpired:
             return False
@@ -113,6 +232,58 @@ class EncoderDetector:
             print(f"Error testing encoder {encoder_name}: {e}")
             return False
 
+    def _cache_key(self) -> Optional[Dict]:
+        """Identity of the ffmpeg binary and GPU drivers, or None if ffmpeg is missing."""
+        path = shutil.which(self.ffmpeg)
+        if path is None:
+            return None
+        try:
+            stat = os.stat(path)
+            result = subprocess.run(
+                [path, "-hide_banner", "-version"],
+                capture_output=True,
+                text=True,
+                timeout=5,
+                creationflags=_NO_WINDOW
+            )
+        except Exception as e:
+            print(f"Error reading ffmpeg version: {e}")
+            return None
+        lines = result.stdout.splitlines()
+        return {
+            "ffmpeg": os.path.realpath(path),
+            "version": lines[0] if lines else "",
+            "mtime": stat.st_mtime,
+            "size": stat.st_size,
+            "gpu": gpu_identity(),
+        }
+
+    def _load_cache(self, key: Dict) -> Optional[List[Dict]]:
+        try:
+            with open(self.cache_file, "r", encoding="utf-8") as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if cached.get("cache_version") != CACHE_VERSION or cached.get("key") != key:
+            return None
+        return cached.get("encoders")
+
+    def _save_cache(self, key: Dict, encoders: List[Dict]):
+        data = {
+            "cache_version": CACHE_VERSION,
+            "key": key,
+            "encoders": encoders,
+            "probed_at": time.time(),
+        }
+        tmp = self.cache_file.with_suffix(".tmp")
+        try:
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=2)
+            os.replace(tmp, self.cache_file)
+        except OSError as e:
+            print(f"Error saving encoder cache: {e}")
+
     def get_preferred_encoder(self, codec_type: str = "H.264") -> str:
         """Get the preferred encoder for a codec type (H.264 or H.265)."""
         # Priority: NVENC > QSV > AMF > Software
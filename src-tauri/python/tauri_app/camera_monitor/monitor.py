@@ -1,6 +1,7 @@
 """Main CameraMonitor class."""
-from typing import Optional, List, Dict
+from typing import Callable, Optional, List, Dict
 import threading
+from .capture import FrameSource
 from .config import MonitorConfig, RecordingOptions
 from .camera_detector import CameraDetector
 from .encoder_detector import EncoderDetector
@@ -10,15 +11,29 @@ from .video_streamer import VideoStreamer
 class CameraMonitor:
     """Main camera monitoring class with flexible configuration."""
 
-    def __init__(self, config: Optional[MonitorConfig] = None):
+    def __init__(
+        self,
+        config: Optional[MonitorConfig] = None,
+        source_factory: Optional[Callable[[int, MonitorConfig], FrameSource]] = None
+    ):
         """Initialize Camera Monitor.
 
         Args:
             config: Configuration object. If None, uses default configuration.
+            source_factory: Builds the frame source for a camera index, e.g. a
+                SyntheticSource or FileSource for testing. If None, cameras are
+                opened through OpenCV.
         """
         self.config = config or MonitorConfig.create_default()
-        self.camera_detector = CameraDetector()
-        self.encoder_detector = EncoderDetector()
+        self.source_factory = source_factory
+        self.camera_detector = CameraDetector(
+            cache_file=self.config.camera.profile_cache_file,
+            use_cache=self.config.camera.profile_cache
+        )
+        self.encoder_detector = EncoderDetector(
+            cache_file=self.config.encoder.probe_cache_file,
+            use_cache=self.config.encoder.probe_cache
+        )
         self.streamers: Dict[int, VideoStreamer] = {}
         self._initialized = False
 
@@ -102,7 +117,8 @@ class CameraMonitor:
                 camera_name=camera["name"],
                 camera_index=camera_index,
                 encoder=encoder,
-                config=self.config
+                config=self.config,
+                source=self.source_factory(camera_index, self.config) if self.source_factory else None
             )
 
             self.streamers[camera_index] = streamer
@@ -215,7 +231,9 @@ class CameraMonitor:
 
     def _print_cameras(self):
         """Print detected cameras."""
-        print(f"\n📹 Detected {len(self.cameras)} camera(s):")
+        detection = self.camera_detector.last_detection
+        print(f"\n📹 Detected {len(self.cameras)} camera(s) "
+              f"({detection.get('cached', 0)} cached, {detection.get('duration_ms', 0):.0f} ms):")
         print("-" * 60)
         for cam in self.cameras:
             print(f"  [{cam['index']}] {cam['name']}")
@@ -227,7 +245,8 @@ class CameraMonitor:
 
     def _print_encoders(self):
         """Print detected encoders."""
-        print("\n🎬 Hardware Encoder Detection:")
+        detection = self.encoder_detector.last_detection
+        print(f"\n🎬 Hardware Encoder Detection ({detection['source']}, {detection['duration_ms']:.0f} ms):")
         print("-" * 60)
 
         # H.264
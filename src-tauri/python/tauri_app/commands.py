@@ -254,6 +254,57 @@ async def check_schedule_conflict(body: ConflictCheckRequest) -> ConflictCheckRe
     )
 
 
+class BulkConflictEntry(BaseModel):
+    id: Optional[int] = None
+    course_name: Optional[str] = None
+    day_of_week: int
+    start_time: str
+    end_time: str
+    weeks: Optional[List[int]] = None
+
+
+class BulkConflictRequest(BaseModel):
+    entries: Optional[List[BulkConflictEntry]] = None  # 为空时检查当前课程表
+    include_existing: bool = False  # 同时与已有课程表比较
+
+
+class BulkConflictSide(BaseModel):
+    index: Optional[int]  # 在 entries 中的位置，已有课程为 None
+    id: Optional[int]
+    course_name: Optional[str]
+    day_of_week: int
+    start_time: str
+    end_time: str
+    weeks: List[int]
+
+
+class BulkConflictPair(BaseModel):
+    day_of_week: int
+    first: BulkConflictSide
+    second: BulkConflictSide
+    conflict_weeks: List[int]
+
+
+class BulkConflictResponse(BaseModel):
+    has_conflict: bool
+    conflicts: List[BulkConflictPair]
+
+
+@commands.command()
+async def check_schedule_conflicts_bulk(body: BulkConflictRequest) -> BulkConflictResponse:
+    """Find every conflicting pair in a timetable (or the current schedule)."""
+    if not _db.schedule_manager:
+        return BulkConflictResponse(has_conflict=False, conflicts=[])
+
+    entries = [entry.model_dump() for entry in body.entries] if body.entries is not None else None
+    pairs = _db.schedule_manager.check_conflicts_bulk(entries, body.include_existing)
+
+    return BulkConflictResponse(
+        has_conflict=len(pairs) > 0,
+        conflicts=[BulkConflictPair(**pair) for pair in pairs]
+    )
+
+
 @commands.command()
 async def get_schedule(body: WeekRequest) -> List[ScheduleEntryResponse]:
     schedule = _db.get_schedule(body.week)
@@ -774,22 +825,33 @@ async def get_audio_devices() -> AudioDevicesResponse:
 # ========== Data Import/Export Commands ==========
 
 class ExportDataRequest(BaseModel):
-    format: str  # "json" or "csv"
+    format: str  # "json", "jsonl" or "csv"
     include_courses: bool = True
     include_schedule: bool = True
     include_settings: bool = False
+    output_path: Optional[str] = None  # 直接流式写入文件（不返回 data）
+    compress: bool = False  # gzip 压缩，仅在指定 output_path 时可用
 
 
 class ExportDataResponse(BaseModel):
     success: bool
     data: Optional[str] = None
     message: str
+    bytes_written: int = 0
+
+
+class ImportProgressData(BaseModel):
+    """导入进度 - 用于 Channel 传输"""
+    stage: str  # "conflicts", "courses", "schedule" or "done"
+    done: int
+    total: int
 
 
 class ImportDataRequest(BaseModel):
     format: str  # "json" or "csv"
     data: str
     replace_existing: bool = False  # 是否替换现有数据
+    channel_id: Optional[JavaScriptChannelId[ImportProgressData]] = None  # 可选的进度 Channel
 
 
 class ImportDataResponse(BaseModel):
@@ -797,83 +859,54 @@ class ImportDataResponse(BaseModel):
     message: str
     courses_imported: int = 0
     schedule_imported: int = 0
+    skipped: int = 0  # 无效而被跳过的课程表条目
+    conflicts: int = 0  # 导入后存在的时间冲突数
+    conflicts_capped: bool = False  # 冲突数达到统计上限，conflicts 为下限（≥）
 
 
 @commands.command()
 async def export_schedule_data(body: ExportDataRequest) -> ExportDataResponse:
-    """Export schedule data to JSON or CSV format."""
+    """Export schedule data to JSON, JSON Lines or CSV format.
+
+    With output_path the export is streamed straight to the file (optionally
+    gzip-compressed); otherwise the document is returned in data.
+    """
     try:
-        import json
-        import csv
-        import io
-
-        data_dict = {}
-
-        # Export courses
-        if body.include_courses:
-            courses = _db.get_courses()
-            data_dict['courses'] = courses
-
-        # Export schedule
-        if body.include_schedule:
-            schedule = _db.get_schedule(week=None)
-            data_dict['schedule'] = schedule
-
-        # Export settings (optional)
-        if body.include_settings:
-            settings = _db.list_configs()
-            # Exclude sensitive settings
-            safe_settings = {k: v for k, v in settings.items()
-                           if k not in ['client_uuid', 'server_url', 'api_server_enabled']}
-            data_dict['settings'] = safe_settings
-
-        if body.format == 'json':
-            # Export as JSON
-            json_data = json.dumps(data_dict, ensure_ascii=False, indent=2)
+        from .schedule_io import EXPORT_FORMATS, exportable_settings, iter_export, write_export
+
+        if body.format not in EXPORT_FORMATS:
             return ExportDataResponse(
-                success=True,
-                data=json_data,
-                message="数据已导出为 JSON 格式"
+                success=False,
+                message=f"不支持的导出格式: {body.format}"
             )
 
-        elif body.format == 'csv':
-            # Export as CSV (schedule entries only)
-            output = io.StringIO()
-            writer = csv.writer(output)
-
-            # Write CSV header
-            writer.writerow([
-                'course_id', 'course_name', 'teacher', 'location', 'color',
-                'day_of_week', 'start_time', 'end_time', 'weeks', 'note'
-            ])
-
-            # Write schedule entries
-            for entry in data_dict.get('schedule', []):
-                writer.writerow([
-                    entry.get('course_id', ''),
-                    entry.get('course_name', ''),
-                    entry.get('teacher', ''),
-                    entry.get('location', ''),
-                    entry.get('color', ''),
-                    entry.get('day_of_week', ''),
-                    entry.get('start_time', ''),
-                    entry.get('end_time', ''),
-                    json.dumps(entry.get('weeks', [])),
-                    entry.get('note', '')
-                ])
-
-            csv_data = output.getvalue()
+        if body.compress and not body.output_path:
+            return ExportDataResponse(success=False, message="压缩导出需要指定 output_path")
+
+        if not _db.schedule_manager:
+            return ExportDataResponse(success=False, message="Schedule manager not initialized")
+
+        settings = exportable_settings(_db.list_configs()) if body.include_settings else None
+        chunks = iter_export(_db.schedule_manager, body.format,
+                             body.include_courses, body.include_schedule, settings)
+
+        format_name = {'json': 'JSON', 'jsonl': 'JSON Lines', 'csv': 'CSV'}[body.format]
+
+        if body.output_path:
+            written = write_export(body.output_path, chunks, body.compress)
             return ExportDataResponse(
                 success=True,
-                data=csv_data,
-                message="数据已导出为 CSV 格式"
+                message=f"数据已导出为 {format_name} 格式: {body.output_path}",
+                bytes_written=written
             )
 
-        else:
-            return ExportDataResponse(
-                success=False,
-                message=f"不支持的导出格式: {body.format}"
-            )
+        data = ''.join(chunks)
+        return ExportDataResponse(
+            success=True,
+            data=data,
+            message=f"数据已导出为 {format_name} 格式",
+            bytes_written=len(data.encode('utf-8'))
+        )
 
     except Exception as e:
         _logger.log_message("error", f"Failed to export data: {e}")
@@ -884,130 +917,37 @@ async def export_schedule_data(body: ExportDataRequest) -> ExportDataResponse:
 
 
 @commands.command()
-async def import_schedule_data(body: ImportDataRequest) -> ImportDataResponse:
-    """Import schedule data from JSON or CSV format."""
+async def import_schedule_data(body: ImportDataRequest, webview_window: WebviewWindow) -> ImportDataResponse:
+    """Import schedule data from JSON or CSV format in a single transaction."""
     try:
-        import json
-        import csv
-        import io
-
-        courses_imported = 0
-        schedule_imported = 0
-
-        if body.format == 'json':
-            # Parse JSON data
-            data_dict = json.loads(body.data)
-
-            # Clear existing data if requested
-            if body.replace_existing:
-                # Delete all schedule entries and courses
-                all_courses = _db.get_courses()
-                for course in all_courses:
-                    _db.delete_course(course['id'])
-
-            # Import courses
-            if 'courses' in data_dict:
-                course_id_map = {}  # Map old IDs to new IDs
-                for course_data in data_dict['courses']:
-                    # Remove ID to create new course
-                    course_name = course_data.get('name')
-                    teacher = course_data.get('teacher')
-                    location = course_data.get('location')
-                    color = course_data.get('color')
-
-                    new_id = _db.add_course(course_name, teacher, location, color)
-                    if new_id > 0:
-                        old_id = course_data.get('id')
-                        course_id_map[old_id] = new_id
-                        courses_imported += 1
-
-            # Import schedule entries
-            if 'schedule' in data_dict:
-                for entry_data in data_dict['schedule']:
-                    old_course_id = entry_data.get('course_id')
-                    new_course_id = course_id_map.get(old_course_id)
-
-                    if new_course_id:
-                        entry_id = _db.add_schedule_entry(
-                            course_id=new_course_id,
-                            day_of_week=entry_data.get('day_of_week'),
-                            start_time=entry_data.get('start_time'),
-                            end_time=entry_data.get('end_time'),
-                            weeks=entry_data.get('weeks'),
-                            note=entry_data.get('note')
-                        )
-                        if entry_id > 0:
-                            schedule_imported += 1
+        from .schedule_io import parse_import
 
+        if body.format not in ('json', 'csv'):
             return ImportDataResponse(
-                success=True,
-                message=f"成功导入 {courses_imported} 门课程和 {schedule_imported} 条课程表",
-                courses_imported=courses_imported,
-                schedule_imported=schedule_imported
+                success=False,
+                message=f"不支持的导入格式: {body.format}"
             )
 
-        elif body.format == 'csv':
-            # Parse CSV data
-            reader = csv.DictReader(io.StringIO(body.data))
-
-            # Clear existing data if requested
-            if body.replace_existing:
-                all_courses = _db.get_courses()
-                for course in all_courses:
-                    _db.delete_course(course['id'])
-
-            # Map to track created courses
-            course_map = {}  # name -> course_id
-
-            for row in reader:
-                course_name = row.get('course_name', '').strip()
-                if not course_name:
-                    continue
-
-                # Create or get course
-                if course_name not in course_map:
-                    course_id = _db.add_course(
-                        name=course_name,
-                        teacher=row.get('teacher'),
-                        location=row.get('location'),
-                        color=row.get('color')
-                    )
-                    if course_id > 0:
-                        course_map[course_name] = course_id
-                        courses_imported += 1
-                else:
-                    course_id = course_map[course_name]
+        if not _db.schedule_manager:
+            return ImportDataResponse(success=False, message="Schedule manager not initialized")
 
-                # Add schedule entry
-                try:
-                    weeks_str = row.get('weeks', '[]')
-                    weeks = json.loads(weeks_str) if weeks_str else None
-                except:
-                    weeks = None
-
-                entry_id = _db.add_schedule_entry(
-                    course_id=course_id,
-                    day_of_week=int(row.get('day_of_week', 1)),
-                    start_time=row.get('start_time'),
-                    end_time=row.get('end_time'),
-                    weeks=weeks,
-                    note=row.get('note')
-                )
-                if entry_id > 0:
-                    schedule_imported += 1
+        courses, entries = parse_import(body.format, body.data)
 
-            return ImportDataResponse(
-                success=True,
-                message=f"成功导入 {courses_imported} 门课程和 {schedule_imported} 条课程表",
-                courses_imported=courses_imported,
-                schedule_imported=schedule_imported
-            )
+        progress = None
+        if body.channel_id is not None:
+            channel = body.channel_id.channel_on(webview_window.as_ref_webview())
 
-        else:
-            return ImportDataResponse(
-                success=False,
-                message=f"不支持的导入格式: {body.format}"
-            )
+            def progress(stage: str, done: int, total: int) -> None:
+                channel.send_model(ImportProgressData(stage=stage, done=done, total=total))
+
+        result = _db.schedule_manager.bulk_import(courses, entries, body.replace_existing, progress)
+
+        message = f"成功导入 {result['courses_imported']} 门课程和 {result['schedule_imported']} 条课程表"
+        if result['conflicts']:
+            prefix = "≥ " if result['conflicts_capped'] else ""
+            message += f"，存在 {prefix}{result['conflicts']} 处时间冲突"
+
+        return ImportDataResponse(success=True, message=message, **result)
 
     except Exception as e:
         _logger.log_message("error", f"Failed to import data: {e}")
@@ -0,0 +1,143 @@
+"""
+Schedule conflict detection for ClassTop.
+
+Two entries conflict when they fall on the same day, their [start, end)
+ranges overlap and they share at least one week. Weeks are kept as integer
+bitsets so the week test is a single AND; an entry without a week
+restriction applies to every week.
+
+- IntervalIndex answers "what overlaps this range" for one day in
+  O(log n + k) using a max-end tree over entries sorted by start time.
+- find_conflicting_pairs reports every conflicting pair of a whole
+  timetable with one sweep-line pass per day, optionally stopping after
+  max_pairs pairs.
+"""
+
+import heapq
+from bisect import bisect_left
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Bitset of an entry without week restriction: every bit set
+ALL_WEEKS_MASK = -1
+
+
+def week_mask(weeks: Optional[Sequence[int]]) -> int:
+    """Convert a week list to a bitset (empty/None means every week).
+
+    Weeks start at 1; anything below that (left by older versions that did
+    not validate weeks) never matches a week and is ignored.
+    """
+    if not weeks:
+        return ALL_WEEKS_MASK
+    mask = 0
+    for week in weeks:
+        if int(week) >= 1:
+            mask |= 1 << int(week)
+    return mask
+
+
+def conflict_weeks(weeks: Optional[List[int]], other_weeks: Optional[List[int]]) -> List[int]:
+    """Weeks two overlapping entries collide in, reported like check_conflicts always has.
+
+    If either entry has no week restriction the other entry's weeks are
+    reported ([1] when neither is restricted).
+    """
+    if not weeks or not other_weeks:
+        return list(weeks) if weeks else list(other_weeks) if other_weeks else [1]
+    other_mask = week_mask(other_weeks)
+    return sorted({week for week in weeks if int(week) >= 1 and other_mask >> int(week) & 1})
+
+
+class IntervalIndex:
+    """Static overlap index for the entries of one day.
+
+    Entries are sorted by start time; a segment tree stores the maximum end
+    time of each subtree so queries skip every subtree that ended too early.
+    """
+
+    def __init__(self, items: Sequence[Tuple[str, str, int, Any]]):
+        """
+        Args:
+            items: (start_time, end_time, week_mask, payload) tuples
+        """
+        items = sorted(items, key=lambda item: item[0])
+        self._starts = [item[0] for item in items]
+        self._ends = [item[1] for item in items]
+        self._masks = [item[2] for item in items]
+        self._payloads = [item[3] for item in items]
+
+        size = 1
+        while size < len(items):
+            size *= 2
+        self._size = size
+        # "" sorts before every HH:MM string, so it is the neutral element for max
+        tree = [""] * (2 * size)
+        tree[size:size + len(items)] = self._ends
+        for node in range(size - 1, 0, -1):
+            tree[node] = max(tree[2 * node], tree[2 * node + 1])
+        self._tree = tree
+
+    def __len__(self) -> int:
+        return len(self._starts)
+
+    def overlapping(self, start_time: str, end_time: str,
+                    mask: int = ALL_WEEKS_MASK) -> Iterator[Any]:
+        """Yield payloads of entries overlapping [start_time, end_time) in a shared week, by start time."""
+        # Only entries starting before end_time can overlap
+        limit = bisect_left(self._starts, end_time)
+        if not limit:
+            return
+
+        tree, size = self._tree, self._size
+        stack = [(1, 0, size)]
+        while stack:
+            node, lo, hi = stack.pop()
+            if lo >= limit or tree[node] <= start_time:
+                continue
+            if node >= size:
+                if self._masks[lo] & mask:
+                    yield self._payloads[lo]
+                continue
+            mid = (lo + hi) // 2
+            stack.append((2 * node + 1, mid, hi))
+            stack.append((2 * node, lo, mid))
+
+
+def find_conflicting_pairs(entries: Sequence[Dict],
+                           max_pairs: Optional[int] = None) -> List[Tuple[int, int]]:
+    """Find every conflicting pair in a timetable with a sweep line per day.
+
+    Args:
+        entries: Dicts with day_of_week, start_time, end_time and optional weeks
+        max_pairs: Stop once this many pairs are found (None finds them all)
+
+    Returns:
+        (i, j) index pairs into entries with i < j, ordered by day then start time.
+        When max_pairs pairs are returned, more may exist.
+    """
+    by_day: Dict[int, List[int]] = {}
+    for index, entry in enumerate(entries):
+        by_day.setdefault(entry["day_of_week"], []).append(index)
+
+    masks = [week_mask(entry.get("weeks")) for entry in entries]
+    pairs: List[Tuple[int, int]] = []
+
+    for day in sorted(by_day):
+        order = sorted(by_day[day], key=lambda i: (entries[i]["start_time"], i))
+        # Entries still running at the sweep position, as a min-heap on end time
+        active: List[Tuple[str, int]] = []
+        for index in order:
+            start, end = entries[index]["start_time"], entries[index]["end_time"]
+            while active and active[0][0] <= start:
+                heapq.heappop(active)
+            mask = masks[index]
+            for _, other in active:
+                # The start check only matters for zero-length entries (start == end)
+                if masks[other] & mask and entries[other]["start_time"] < end:
+                    pairs.append((min(index, other), max(index, other)))
+                    if max_pairs is not None and len(pairs) >= max_pairs:
+                        return pairs
+            if end > start:
+                heapq.heappush(active, (end, index))
+
+    return pairs
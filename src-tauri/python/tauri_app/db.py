@@ -1,13 +1,18 @@
+import json
 import sqlite3
 from pathlib import Path
-from typing import Optional, Dict, List
+from typing import Optional, Dict, List, Iterable, Tuple
 from . import logger
+from .db_pool import get_pool
 
 # Store DB in user home directory under .classtop
 APP_DIR = Path.home() / ".classtop"
 APP_DIR.mkdir(parents=True, exist_ok=True)
 DB_PATH = APP_DIR / "app_config.db"
 
+# schedule_weeks.week value for entries that apply to every week
+ALL_WEEKS = 0
+
 # Global managers
 schedule_manager = None
 settings_manager = None
@@ -19,7 +24,7 @@ def init_db() -> None:
     """Initialize database and create tables."""
     logger.log_message("info", "Initializing database")
 
-    conn = sqlite3.connect(DB_PATH)
+    conn = get_pool(DB_PATH).get()
     try:
         cur = conn.cursor()
 
@@ -66,6 +71,23 @@ def init_db() -> None:
         )
         logger.log_message("debug", "Schedule table ready")
 
+        # Week membership index - one row per (entry, week); ALL_WEEKS marks
+        # entries without a week restriction. Lets week filtering run in SQL.
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS schedule_weeks (
+                entry_id INTEGER NOT NULL,
+                week INTEGER NOT NULL,
+                PRIMARY KEY (entry_id, week),
+                FOREIGN KEY (entry_id) REFERENCES schedule(id) ON DELETE CASCADE
+            ) WITHOUT ROWID
+            """
+        )
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_schedule_weeks_week ON schedule_weeks(week, entry_id)")
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_schedule_day_start ON schedule(day_of_week, start_time)")
+        _migrate_schedule_weeks(cur)
+        logger.log_message("debug", "Schedule week index ready")
+
         # Current week settings with semester start date
         cur.execute(
             """
@@ -81,7 +103,37 @@ def init_db() -> None:
         logger.log_message("error", f"Error initializing database: {e}")
         raise
     finally:
-        conn.close()
+        if conn.in_transaction:
+            conn.rollback()
+
+
+def week_rows(entry_id: int, weeks: Optional[Iterable[int]]) -> List[Tuple[int, int]]:
+    """Build schedule_weeks rows for an entry's week list."""
+    if not weeks:
+        return [(entry_id, ALL_WEEKS)]
+    return [(entry_id, int(week)) for week in dict.fromkeys(weeks)]
+
+
+def _migrate_schedule_weeks(cur: sqlite3.Cursor) -> None:
+    """Backfill schedule_weeks from the JSON weeks column for entries not yet indexed."""
+    cur.execute(
+        """
+        SELECT id, weeks FROM schedule
+        WHERE id NOT IN (SELECT DISTINCT entry_id FROM schedule_weeks)
+        """
+    )
+    rows = []
+    for entry_id, weeks_json in cur.fetchall():
+        try:
+            weeks = json.loads(weeks_json) if weeks_json else []
+        except (TypeError, ValueError):
+            logger.log_message("warning", f"Invalid weeks JSON for schedule entry {entry_id}: {weeks_json!r}")
+            weeks = []
+        rows.extend(week_rows(entry_id, weeks))
+
+    if rows:
+        cur.executemany("INSERT OR IGNORE INTO schedule_weeks (entry_id, week) VALUES (?, ?)", rows)
+        logger.log_message("info", f"Migrated week index for {len({r[0] for r in rows})} schedule entries")
 
 
 def set_schedule_manager(manager) -> None:
@@ -121,19 +173,17 @@ def set_config(key: str, value: str) -> None:
     else:
         # Fallback to direct database access if manager not initialized
         logger.log_message("warning", "Settings manager not initialized, using direct DB access")
-        conn = sqlite3.connect(DB_PATH)
         try:
-            cur = conn.cursor()
-            cur.execute(
-                "INSERT INTO settings(key, value) VALUES(?, ?) ON CONFLICT(key) DO UPDATE SET value=excluded.value",
-                (key, value),
-            )
-            conn.commit()
+            with get_pool(DB_PATH).connection() as conn:
+                cur = conn.cursor()
+                cur.execute(
+                    "INSERT INTO settings(key, value) VALUES(?, ?) ON CONFLICT(key) DO UPDATE SET value=excluded.value",
+                    (key, value),
+                )
+                conn.commit()
             logger.log_message("info", f"Config set: {key} = {value}")
         except Exception as e:
             logger.log_message("error", f"Error setting config for key '{key}': {e}")
-        finally:
-            conn.close()
 
 
 def get_config(key: str) -> Optional[str]:
@@ -144,17 +194,15 @@ def get_config(key: str) -> Optional[str]:
     else:
         # Fallback to direct database access
         logger.log_message("warning", "Settings manager not initialized, using direct DB access")
-        conn = sqlite3.connect(DB_PATH)
         try:
-            cur = conn.cursor()
-            cur.execute("SELECT value FROM settings WHERE key=?", (key,))
-            row = cur.fetchone()
-            return row[0] if row else None
+            with get_pool(DB_PATH).connection() as conn:
+                cur = conn.cursor()
+                cur.execute("SELECT value FROM settings WHERE key=?", (key,))
+                row = cur.fetchone()
+                return row[0] if row else None
         except Exception as e:
             logger.log_message("error", f"Error getting config for key '{key}': {e}")
             return None
-        finally:
-            conn.close()
 
 
 def list_configs() -> Dict[str, str]:
@@ -165,16 +213,14 @@ def list_configs() -> Dict[str, str]:
     else:
         # Fallback to direct database access
         logger.log_message("warning", "Settings manager not initialized, using direct DB access")
-        conn = sqlite3.connect(DB_PATH)
         try:
-            cur = conn.cursor()
-            cur.execute("SELECT key, value FROM settings")
-            return {k: v for k, v in cur.fetchall()}
+            with get_pool(DB_PATH).connection() as conn:
+                cur = conn.cursor()
+                cur.execute("SELECT key, value FROM settings")
+                return {k: v for k, v in cur.fetchall()}
         except Exception as e:
             logger.log_message("error", f"Error listing configs: {e}")
             return {}
-        finally:
-            conn.close()
 
 
 # Course management functions - delegated to schedule manager
@@ -268,17 +314,32 @@ def get_schedule_by_day(day_of_week: int, week: Optional[int] = None) -> List[Di
         logger.log_message("error", "Schedule manager not initialized")
         return []
 
-    return schedule_manager.get_schedule_by_day(day_of_week, week)
+    return schedule_manager.timeline.classes_for_day(day_of_week, week)
 
 
-def get_schedule_for_week(week: Optional[int] = None) -> List[Dict]:
-    """Get all classes for the entire week."""
+def get_schedule_for_week(week: Optional[int] = None, group_by_day: bool = False):
+    """Get all classes for the entire week (optionally grouped by day)."""
     global schedule_manager
     if not schedule_manager:
         logger.log_message("error", "Schedule manager not initialized")
-        return []
+        return {day: [] for day in range(1, 8)} if group_by_day else []
 
-    return schedule_manager.get_schedule_for_week(week)
+    timeline = schedule_manager.timeline
+    if group_by_day:
+        return {day: timeline.classes_for_day(day, week) for day in range(1, 8)}
+    return timeline.classes_for_week(week)
+
+
+def _timeline_now():
+    """Return (timeline, day_of_week, HH:MM, week number) for the current moment."""
+    from datetime import datetime
+    now = datetime.now()
+    return (
+        schedule_manager.timeline,
+        now.isoweekday(),
+        now.strftime("%H:%M"),
+        get_calculated_week_number()
+    )
 
 
 def get_current_class() -> Optional[Dict]:
@@ -291,17 +352,8 @@ def get_current_class() -> Optional[Dict]:
         logger.log_message("error", "Schedule manager not initialized")
         return None
 
-    from datetime import datetime
-    now = datetime.now()
-    day_of_week = now.isoweekday()
-    current_time = now.strftime("%H:%M")
-    week_num = get_calculated_week_number()
-
-    classes = schedule_manager.get_schedule_by_day(day_of_week, week_num)
-    for cls in classes:
-        if cls["start_time"] <= current_time <= cls["end_time"]:
-            return cls
-    return None
+    timeline, day_of_week, current_time, week_num = _timeline_now()
+    return timeline.current_class(day_of_week, current_time, week_num)
 
 
 def get_next_class() -> Optional[Dict]:
@@ -314,23 +366,8 @@ def get_next_class() -> Optional[Dict]:
         logger.log_message("error", "Schedule manager not initialized")
         return None
 
-    from datetime import datetime
-    now = datetime.now()
-    day_of_week = now.isoweekday()
-    current_time = now.strftime("%H:%M")
-    week_num = get_calculated_week_number()
-
-    classes = schedule_manager.get_schedule_by_day(day_of_week, week_num)
-    for cls in classes:
-        if cls["start_time"] > current_time:
-            return cls
-
-    for day_offset in range(1, 8):
-        next_day = ((day_of_week - 1 + day_offset) % 7) + 1
-        classes = schedule_manager.get_schedule_by_day(next_day, week_num)
-        if classes:
-            return classes[0]
-    return None
+    timeline, day_of_week, current_time, week_num = _timeline_now()
+    return timeline.next_class(day_of_week, current_time, week_num)
 
 
 def get_last_class() -> Optional[Dict]:
@@ -343,20 +380,8 @@ def get_last_class() -> Optional[Dict]:
         logger.log_message("error", "Schedule manager not initialized")
         return None
 
-    from datetime import datetime
-    now = datetime.now()
-    day_of_week = now.isoweekday()
-    current_time = now.strftime("%H:%M")
-    week_num = get_calculated_week_number()
-
-    classes = schedule_manager.get_schedule_by_day(day_of_week, week_num)
-    last_class = None
-    for cls in classes:
-        if cls["end_time"] <= current_time:
-            last_class = cls
-        else:
-            break
-    return last_class
+    timeline, day_of_week, current_time, week_num = _timeline_now()
+    return timeline.last_class(day_of_week, current_time, week_num)
 
 
 def get_schedule_statistics() -> Dict:
@@ -0,0 +1,144 @@
+"""
+Shared SQLite connection pool for ClassTop.
+
+Every manager used to open a fresh ``sqlite3.connect`` per call, paying for a
+file open and a schema read each time. The pool hands out one long-lived
+connection per thread instead, configured once with WAL journaling and a
+statement cache, and shared by every manager that points at the same file.
+"""
+
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, Union
+
+from . import logger as _logger
+
+# Number of prepared statements kept per connection (sqlite3 LRU cache)
+STATEMENT_CACHE_SIZE = 256
+
+# Seconds to wait for a competing writer before raising "database is locked"
+BUSY_TIMEOUT = 5.0
+
+
+class ConnectionPool:
+    """Per-thread SQLite connections for a single database file."""
+
+    def __init__(self, db_path: Union[str, Path]):
+        self.db_path = Path(db_path)
+        self.logger = _logger
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        # {thread_ident: (thread, connection)} - used to close everything on shutdown
+        self._connections: Dict[int, tuple] = {}
+
+    def _configure(self, conn: sqlite3.Connection) -> None:
+        """Apply per-connection pragmas."""
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA temp_store=MEMORY")
+
+    def open_connection(self) -> sqlite3.Connection:
+        """Open a new configured connection that is not bound to a thread.
+
+        The caller owns the connection and must serialize access to it.
+        """
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=BUSY_TIMEOUT,
+            check_same_thread=False,
+            cached_statements=STATEMENT_CACHE_SIZE,
+        )
+        self._configure(conn)
+        return conn
+
+    def get(self) -> sqlite3.Connection:
+        """Return the calling thread's connection, opening it on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            return conn
+
+        conn = self.open_connection()
+        self._local.conn = conn
+
+        current = threading.current_thread()
+        with self._lock:
+            self._prune_dead_threads()
+            self._connections[current.ident] = (current, conn)
+
+        self.logger.log_message("debug", f"Pooled connection opened for thread {current.name}: {self.db_path}")
+        return conn
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """Borrow the calling thread's connection.
+
+        Anything left uncommitted when the outermost borrow exits is rolled
+        back, which matches the old behaviour of closing a per-call
+        connection. A nested borrow on the same thread (e.g. a settings read
+        made in the middle of a write) shares the outer transaction and
+        leaves it alone.
+        """
+        conn = self.get()
+        depth = getattr(self._local, "depth", 0)
+        self._local.depth = depth + 1
+        try:
+            yield conn
+        finally:
+            self._local.depth = depth
+            if depth == 0 and conn.in_transaction:
+                conn.rollback()
+
+    def _prune_dead_threads(self) -> None:
+        """Close connections owned by threads that have exited. Caller holds the lock."""
+        for ident, (thread, conn) in list(self._connections.items()):
+            if not thread.is_alive():
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+                del self._connections[ident]
+
+    def close_all(self) -> None:
+        """Close every pooled connection (call on shutdown)."""
+        with self._lock:
+            for _, conn in self._connections.values():
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+            self._connections.clear()
+        self._local = threading.local()
+        self.logger.log_message("info", f"Connection pool closed: {self.db_path}")
+
+    @property
+    def size(self) -> int:
+        """Number of open pooled connections."""
+        with self._lock:
+            return len(self._connections)
+
+
+# Shared pools keyed by resolved database path
+_pools: Dict[str, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_path: Union[str, Path]) -> ConnectionPool:
+    """Get the shared pool for a database file, creating it if needed."""
+    key = str(Path(db_path).resolve())
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = ConnectionPool(db_path)
+            _pools[key] = pool
+        return pool
+
+
+def close_all_pools() -> None:
+    """Close every shared pool."""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close_all()
@@ -1,16 +1,30 @@
 """
 Global event handler for ClassTop application.
 Manages all event emissions to the frontend in a thread-safe manner.
+
+Schedule and settings updates go through an EventBatcher: events are
+buffered per channel for a short window, redundant updates to the same
+id/key are collapsed, and each channel is emitted once per flush as an
+array payload. Urgent events (e.g. course reminders) bypass the buffer.
 """
 
 import asyncio
+import itertools
+import json
 import threading
-from typing import Optional, Any, Dict
+import time
+from typing import Optional, Any, Callable, Dict, Hashable, List
 from datetime import datetime
-from pydantic import BaseModel
+from pydantic import BaseModel, RootModel
 from pytauri import AppHandle, Emitter
 from . import logger
 
+# Default batching window in seconds (about one frame at 60 Hz)
+DEFAULT_BATCH_WINDOW = 0.016
+
+# Events that are emitted immediately instead of being batched
+URGENT_EVENTS = {"course-reminder"}
+
 
 class ScheduleUpdateEvent(BaseModel):
     """Model for schedule update events."""
@@ -31,24 +45,249 @@ class SettingsBatchUpdateEvent(BaseModel):
     timestamp: str
 
 
+class ScheduleUpdateBatch(RootModel[List[ScheduleUpdateEvent]]):
+    """Array payload of the "schedule-update" channel."""
+
+
+class SettingUpdateBatch(RootModel[List[SettingUpdateEvent]]):
+    """Array payload of the "setting-update" channel."""
+
+
+class EventBatcher:
+    """Buffers events per channel and flushes them together after a short window.
+
+    Events added with the same key on a channel replace each other (optionally
+    merged), so a burst of updates to one id/key costs a single entry. A
+    background thread flushes every channel once the window since the first
+    buffered event has passed.
+    """
+
+    def __init__(self, flush_channel: Callable[[str, List[Dict[str, Any]]], None],
+                 window: float = DEFAULT_BATCH_WINDOW):
+        """
+        Args:
+            flush_channel: Called with (channel, items) for every non-empty channel on flush
+            window: Seconds to buffer events; 0 emits every event on its own
+        """
+        self.window = window
+        self._flush_channel = flush_channel
+        self._cond = threading.Condition()
+        self._pending: Dict[str, Dict[Hashable, Dict[str, Any]]] = {}
+        self._deadline: Optional[float] = None
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+        self._unique = itertools.count()
+        self._stats = {"events_in": 0, "events_out": 0, "coalesced": 0, "flushes": 0, "urgent": 0}
+
+    def add(self, channel: str, item: Dict[str, Any], key: Optional[Hashable] = None,
+            merge: Optional[Callable[[Dict[str, Any], Dict[str, Any]], Dict[str, Any]]] = None,
+            supersedes: bool = False) -> None:
+        """Buffer an event.
+
+        Args:
+            channel: Event name emitted to the frontend
+            item: Event data
+            key: Coalescing key; a later item with the same key replaces this one
+                 (None never coalesces)
+            merge: Optional merge(old, new) used instead of plain replacement
+            supersedes: Drop everything already buffered on the channel (e.g. a full reload)
+        """
+        with self._cond:
+            self._stats["events_in"] += 1
+            buffer = self._pending.setdefault(channel, {})
+            if supersedes and buffer:
+                self._stats["coalesced"] += len(buffer)
+                buffer.clear()
+            if key is None:
+                key = ("unique", next(self._unique))
+            elif key in buffer:
+                old = buffer.pop(key)
+                self._stats["coalesced"] += 1
+                if merge:
+                    item = merge(old, item)
+            # Re-inserting moves the key to the end, so the batch keeps last-update order
+            buffer[key] = item
+
+            if self.window <= 0 or self._closed:
+                batch = self._take()
+            else:
+                if self._deadline is None:
+                    self._deadline = time.monotonic() + self.window
+                    self._ensure_thread()
+                    self._cond.notify()
+                return
+        self._emit(batch)
+
+    def record_urgent(self) -> None:
+        """Count an event that bypassed the buffer."""
+        with self._cond:
+            self._stats["events_in"] += 1
+            self._stats["events_out"] += 1
+            self._stats["urgent"] += 1
+
+    def flush(self) -> None:
+        """Emit everything buffered now."""
+        with self._cond:
+            batch = self._take()
+        self._emit(batch)
+
+    def close(self) -> None:
+        """Flush and stop the background thread; later events are emitted immediately."""
+        with self._cond:
+            self._closed = True
+            batch = self._take()
+            self._cond.notify()
+        self._emit(batch)
+
+    def get_stats(self) -> Dict[str, int]:
+        """Counters: events_in, events_out (IPC messages), coalesced, flushes, urgent, pending."""
+        with self._cond:
+            stats = dict(self._stats)
+            stats["pending"] = sum(len(buffer) for buffer in self._pending.values())
+            return stats
+
+    def _take(self) -> Dict[str, List[Dict[str, Any]]]:
+        """Detach the buffered events. Caller holds the condition."""
+        batch = {channel: list(buffer.values()) for channel, buffer in self._pending.items() if buffer}
+        self._pending = {}
+        self._deadline = None
+        return batch
+
+    def _ensure_thread(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="EventBatcher", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while self._deadline is None and not self._closed:
+                    self._cond.wait()
+                if self._deadline is None:
+                    return
+                remaining = self._deadline - time.monotonic()
+                if remaining > 0:
+                    self._cond.wait(remaining)
+                    continue
+                batch = self._take()
+            self._emit(batch)
+
+    def _emit(self, batch: Dict[str, List[Dict[str, Any]]]) -> None:
+        if not batch:
+            return
+        for channel, items in batch.items():
+            try:
+                self._flush_channel(channel, items)
+            except Exception as e:
+                logger.log_message("error", f"Failed to flush {channel} events: {e}")
+        with self._cond:
+            self._stats["events_out"] += len(batch)
+            self._stats["flushes"] += 1
+
+
+def _merge_payloads(old: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, Any]:
+    """Merge two buffered update events for the same id (later fields win)."""
+    return {**new, "payload": {**old["payload"], **new["payload"]}}
+
+
+def _merge_batch_updates(old: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, Any]:
+    """Union the keys of two buffered settings batch updates."""
+    keys = list(dict.fromkeys(old["updated_keys"] + new["updated_keys"]))
+    return {"updated_keys": keys, "timestamp": new["timestamp"]}
+
+
 class EventHandler:
     """Thread-safe event handler for emitting events to the frontend."""
 
     _instance: Optional['EventHandler'] = None
     _app_handle: Optional[AppHandle] = None
     _portal = None  # Async portal for thread-safe operations
+    _batcher: Optional[EventBatcher] = None
 
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super(EventHandler, cls).__new__(cls)
+            cls._instance._batcher = EventBatcher(cls._instance._flush_channel)
         return cls._instance
 
-    def initialize(self, app_handle: AppHandle, portal) -> None:
-        """Initialize the event handler with app handle and async portal."""
+    def initialize(self, app_handle: AppHandle, portal,
+                   batch_window: float = DEFAULT_BATCH_WINDOW) -> None:
+        """Initialize the event handler with app handle and async portal.
+
+        Args:
+            batch_window: Seconds to buffer schedule/settings events (0 disables batching)
+        """
         self._app_handle = app_handle
         self._portal = portal
-        logger.log_message("info", "Event handler initialized with async portal")
-        
+        self._batcher.window = batch_window
+        logger.log_message("info", f"Event handler initialized with async portal (batch window {batch_window}s)")
+
+    def shutdown(self) -> None:
+        """Flush buffered events and stop the batching thread."""
+        self._batcher.close()
+        logger.log_message("info", f"Event handler stopped: {self._batcher.get_stats()}")
+
+    def get_stats(self) -> Dict[str, int]:
+        """Event counters (events_in, events_out, coalesced, flushes, urgent, pending)."""
+        return self._batcher.get_stats()
+
+    def _emit_model(self, event_name: str, event_data: BaseModel) -> None:
+        """Emit a model now, falling back to the async portal outside an event loop."""
+        # Try to emit directly - PyTauri's Emitter should be thread-safe
+        try:
+            Emitter.emit(self._app_handle, event_name, event_data)
+        except RuntimeError as e:
+            # If we get a runtime error about event loop, try using portal
+            if "event loop" in str(e).lower() and self._portal:
+                logger.log_message("debug", "Direct emit failed, trying portal approach")
+
+                # Define the emit task
+                async def emit_task():
+                    try:
+                        # In async context, we can safely emit
+                        Emitter.emit(self._app_handle, event_name, event_data)
+                        logger.log_message("debug", f"Event emitted via portal: {event_name}")
+                    except Exception as e2:
+                        logger.log_message("error", f"Failed to emit via portal: {e2}")
+
+                # Check if we're in a thread that can use portal
+                try:
+                    # Try to get the current event loop
+                    loop = asyncio.get_event_loop()
+                    if loop.is_running():
+                        # We're in the event loop thread, schedule as a task
+                        asyncio.create_task(emit_task())
+                        logger.log_message("debug", "Scheduled emit as async task")
+                    else:
+                        # Event loop exists but not running, use portal
+                        self._portal.start_task_soon(emit_task)
+                        logger.log_message("debug", "Scheduled emit via portal")
+                except RuntimeError:
+                    # No event loop in current thread, use portal
+                    self._portal.start_task_soon(emit_task)
+                    logger.log_message("debug", "Scheduled emit via portal (no loop)")
+            else:
+                raise
+
+    def _flush_channel(self, channel: str, items: List[Dict[str, Any]]) -> None:
+        """Emit one flushed channel from the batcher."""
+        if not self._app_handle:
+            return
+
+        if channel == "schedule-update":
+            event_data = ScheduleUpdateBatch([ScheduleUpdateEvent(**item) for item in items])
+        elif channel == "setting-update":
+            event_data = SettingUpdateBatch([SettingUpdateEvent(**item) for item in items])
+        elif channel == "settings-batch-update":
+            # Buffered batch updates are merged into a single one
+            event_data = SettingsBatchUpdateEvent(**items[-1])
+        else:
+            raise ValueError(f"Unknown batched channel: {channel}")
+
+        self._emit_model(channel, event_data)
+        logger.log_message("debug", f"Flushed {len(items)} {channel} event(s)")
+
+
     def emit_string_event(self, event_name: str, message: str) -> None:
         """Emit a simple string event to the frontend."""
         if not self._app_handle:
@@ -67,16 +306,12 @@ class EventHandler:
             logger.log_message("warning", "Event handler not initialized, cannot emit event")
             return
 
-        try:
-            event_data = SettingUpdateEvent(
-                key=key,
-                value=value,
-                timestamp=datetime.now().isoformat()
-            )
-            Emitter.emit(self._app_handle, "setting-update", event_data)
-            logger.log_message("info", f"Setting update event emitted: {key} = {value}")
-        except Exception as e:
-            logger.log_message("error", f"Failed to emit setting update event: {e}")
+        # Only the latest value of each key is emitted per batch
+        self._batcher.add("setting-update", {
+            "key": key,
+            "value": value,
+            "timestamp": datetime.now().isoformat()
+        }, key=key)
 
     def emit_schedule_update(self, event_type: str, payload: Dict[str, Any]) -> None:
         """Emit a schedule update event to the frontend."""
@@ -84,58 +319,16 @@ class EventHandler:
             logger.log_message("warning", "Event handler not initialized, cannot emit event")
             return
 
-        try:
-            # Create event data
-            event_data = ScheduleUpdateEvent(
-                type=event_type,
-                payload=payload,
-                timestamp=datetime.now().isoformat()
-            )
-
-            # Try to emit directly - PyTauri's Emitter should be thread-safe
-            try:
-                Emitter.emit(self._app_handle, "schedule-update", event_data)
-                logger.log_message("debug", f"Event emitted successfully: {event_type}")
-            except RuntimeError as e:
-                # If we get a runtime error about event loop, try using portal
-                if "event loop" in str(e).lower() and self._portal:
-                    logger.log_message("debug", "Direct emit failed, trying portal approach")
-
-                    # Define the emit task
-                    async def emit_task():
-                        try:
-                            # In async context, we can safely emit
-                            Emitter.emit(self._app_handle, "schedule-update", event_data)
-                            logger.log_message("debug", f"Event emitted via portal: {event_type}")
-                        except Exception as e2:
-                            logger.log_message("error", f"Failed to emit via portal: {e2}")
-
-                    # Check if we're in a thread that can use portal
-                    try:
-                        # Try to get the current event loop
-                        loop = asyncio.get_event_loop()
-                        if loop.is_running():
-                            # We're in the event loop thread, schedule as a task
-                            asyncio.create_task(emit_task())
-                            logger.log_message("debug", "Scheduled emit as async task")
-                        else:
-                            # Event loop exists but not running, use portal
-                            self._portal.start_task_soon(emit_task)
-                            logger.log_message("debug", "Scheduled emit via portal")
-                    except RuntimeError:
-                        # No event loop in current thread, use portal
-                        if self._portal:
-                            self._portal.start_task_soon(emit_task)
-                            logger.log_message("debug", "Scheduled emit via portal (no loop)")
-                        else:
-                            logger.log_message("error", "Cannot emit: no portal available")
-                else:
-                    logger.log_message("error", f"Failed to emit event: {e}")
-            except Exception as e:
-                logger.log_message("error", f"Unexpected error emitting event: {e}")
-
-        except Exception as e:
-            logger.log_message("error", f"Failed to prepare event: {e}")
+        # Repeated events for the same id collapse (updates merge their fields);
+        # a full reload makes everything buffered before it redundant
+        self._batcher.add("schedule-update", {
+            "type": event_type,
+            "payload": payload,
+            "timestamp": datetime.now().isoformat()
+        },
+            key=(event_type, payload.get("id")),
+            merge=_merge_payloads if event_type.endswith("_updated") else None,
+            supersedes=event_type == "schedule_reloaded")
 
     def emit_course_added(self, course_id: int, name: str) -> None:
         """Emit event when a course is added."""
@@ -163,21 +356,20 @@ class EventHandler:
         """Emit event when a schedule entry is deleted."""
         self.emit_schedule_update("schedule_deleted", {"id": entry_id})
 
+    def emit_schedule_reloaded(self, summary: Dict[str, Any]) -> None:
+        """Emit a single event after a bulk change (e.g. import) replaced many entries."""
+        self.emit_schedule_update("schedule_reloaded", summary)
+
     def emit_settings_batch_updated(self, updated_keys: list) -> None:
         """Emit event when multiple settings are updated at once."""
         if not self._app_handle:
             logger.log_message("warning", "Event handler not initialized, cannot emit event")
             return
 
-        try:
-            event_data = SettingsBatchUpdateEvent(
-                updated_keys=updated_keys,
-                timestamp=datetime.now().isoformat()
-            )
-            Emitter.emit(self._app_handle, "settings-batch-update", event_data)
-            logger.log_message("info", f"Settings batch update event emitted: {len(updated_keys)} settings")
-        except Exception as e:
-            logger.log_message("error", f"Failed to emit settings batch update event: {e}")
+        self._batcher.add("settings-batch-update", {
+            "updated_keys": list(updated_keys),
+            "timestamp": datetime.now().isoformat()
+        }, key="batch", merge=_merge_batch_updates)
 
     def emit_camera_initialized(self, camera_count: int, encoder_info: Dict) -> None:
         """Emit event when camera system is initialized."""
@@ -198,13 +390,15 @@ class EventHandler:
         logger.log_message("info", f"Recording stopped on camera {camera_index}")
 
     def emit_custom_event(self, event_name: str, payload: Dict[str, Any]) -> None:
-        """Emit a custom event with arbitrary payload."""
+        """Emit a custom event with arbitrary payload (as a JSON string), immediately."""
         if not self._app_handle:
             logger.log_message("warning", "Event handler not initialized, cannot emit event")
             return
 
         try:
-            Emitter.emit_str(self._app_handle, event_name, str(payload))
+            Emitter.emit_str(self._app_handle, event_name, json.dumps(payload, ensure_ascii=False))
+            if event_name in URGENT_EVENTS:
+                self._batcher.record_urgent()
             logger.log_message("debug", f"Custom event emitted: {event_name}")
         except Exception as e:
             logger.log_message("error", f"Failed to emit custom event: {e}")
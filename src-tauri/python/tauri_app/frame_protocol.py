@@ -0,0 +1,55 @@
+"""Binary camera frame protocol shared with the LMS.
+
+Each preview frame is sent as one binary WebSocket message: a fixed
+20-byte header followed by the encoded image bytes, instead of a JSON
+object carrying base64 text. The LMS forwards the message to viewers
+unchanged. The layout must match ``lms/frame_protocol.py``.
+
+Header (network byte order):
+
+    magic      4s  b"CTF" + protocol version
+    camera     H   camera index
+    codec      B   CODEC_* constant
+    flags      B   reserved, 0
+    seq        I   per-camera sequence number (wraps at 2**32)
+    timestamp  d   capture time, seconds since the epoch
+"""
+import struct
+import time
+from typing import NamedTuple, Optional, Tuple
+
+FRAME_MAGIC = b"CTF\x01"
+FRAME_HEADER = struct.Struct("!4sHBBId")
+FRAME_HEADER_SIZE = FRAME_HEADER.size
+
+CODEC_JPEG = 1
+
+
+class FrameHeader(NamedTuple):
+    camera_index: int
+    codec: int
+    seq: int
+    timestamp: float
+
+
+def encode_frame(camera_index: int, seq: int, payload: bytes,
+                 timestamp: Optional[float] = None, codec: int = CODEC_JPEG) -> bytes:
+    """Prefix encoded image bytes with a frame header."""
+    if timestamp is None:
+        timestamp = time.time()
+    header = FRAME_HEADER.pack(FRAME_MAGIC, camera_index, codec, 0, seq & 0xFFFFFFFF, timestamp)
+    return header + payload
+
+
+def decode_frame(data: bytes) -> Tuple[FrameHeader, memoryview]:
+    """Split a binary frame message into its header and a view of the payload.
+
+    Raises:
+        ValueError: Not a frame message (too short or wrong magic)
+    """
+    if len(data) < FRAME_HEADER_SIZE:
+        raise ValueError("Frame message shorter than header")
+    magic, camera_index, codec, _, seq, timestamp = FRAME_HEADER.unpack_from(data)
+    if magic != FRAME_MAGIC:
+        raise ValueError(f"Bad frame magic: {magic!r}")
+    return FrameHeader(camera_index, codec, seq, timestamp), memoryview(data)[FRAME_HEADER_SIZE:]
@@ -0,0 +1,201 @@
+"""Adaptive quality control for camera preview streams.
+
+The controller moves a preview session along a ladder of tiers (resolution,
+JPEG quality, frame rate) with AIMD: every control window without congestion
+the level rises by one tier after a few healthy windows, and any congested
+window halves it. Congestion is judged from the frame sender (uplink busy
+time, frames overwritten in its mailbox, time frames wait, bytes stuck in
+the socket write buffer) and from the LMS's viewer feedback (share of frames
+delivered to, and latency of, the best-served viewer).
+"""
+import random
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from .camera_monitor import PreviewOptions
+
+# (scale, quality, fps) per tier, best first; quality and fps are fractions
+# between the session's lower bound (0.0) and its requested value (1.0)
+PREVIEW_TIERS = [
+    (1.0, 1.0, 1.0),
+    (1.0, 0.7, 1.0),
+    (0.75, 0.7, 0.75),
+    (0.5, 0.5, 0.5),
+    (0.5, 0.3, 0.3),
+    (0.25, 0.3, 0.2),
+    (0.25, 0.0, 0.0),
+]
+
+# Lower bounds used when start_preview does not give any
+DEFAULT_MIN_FPS = 1.0
+DEFAULT_MIN_QUALITY = 30
+
+# Seconds of samples per control decision; each window is randomly up to
+# this share longer or shorter, so clients started together do not step up
+# (and overload the link) in lockstep
+CONTROL_INTERVAL = 1.0
+CONTROL_JITTER = 0.25
+
+# Healthy windows needed before stepping up one tier (additive increase)
+HEALTHY_WINDOWS_TO_STEP_UP = 3
+
+# Congestion thresholds
+UPLINK_BUSY_LIMIT = 0.8          # share of the frame interval spent sending
+QUEUE_LATENCY_LIMIT = 0.5        # share of the frame interval a frame waits before sending
+WRITE_BUFFER_FRAMES_LIMIT = 2    # frames' worth of bytes left in the socket buffer
+VIEWER_DELIVERY_LIMIT = 0.9      # share of frames reaching the best-served viewer
+VIEWER_LATENCY_LIMIT_MS = 500.0  # best viewer's LMS-side latency
+
+# Feedback older than this is ignored
+FEEDBACK_MAX_AGE = 3.0
+
+
+class PreviewController:
+    """AIMD controller choosing the encoding of one preview session."""
+
+    def __init__(self, options: PreviewOptions, fps: float, frame_size: Tuple[int, int],
+                 default_quality: int, min_fps: float = DEFAULT_MIN_FPS,
+                 min_quality: int = DEFAULT_MIN_QUALITY):
+        """
+        Args:
+            options: Requested preview options (the best tier)
+            fps: Requested preview rate (the best tier)
+            frame_size: Capture (width, height), used to scale when options give no size
+            default_quality: Quality used when options give none
+            min_fps: Lowest rate the controller may choose
+            min_quality: Lowest JPEG quality the controller may choose
+        """
+        self.options = options
+        self.max_fps = fps
+        self.min_fps = min(min_fps, fps)
+        self.max_quality = options.quality or default_quality
+        self.min_quality = min(min_quality, self.max_quality)
+        self.frame_size = frame_size
+
+        self.level = len(PREVIEW_TIERS) - 1
+        self._healthy_windows = 0
+        self._window_end = time.monotonic() + self._window_length()
+        self._last_dropped = 0
+        self._feedback: Optional[Dict[str, Any]] = None
+        self._feedback_at = 0.0
+        self._current = self._tier_settings()
+
+        # Stats
+        self.decreases = 0
+        self.increases = 0
+        self.last_reason: Optional[str] = None
+
+    @property
+    def tier(self) -> int:
+        """Current tier index (0 = best)."""
+        return len(PREVIEW_TIERS) - 1 - self.level
+
+    def current(self) -> Tuple[PreviewOptions, float]:
+        """Options and frame rate of the current tier."""
+        return self._current
+
+    def on_feedback(self, feedback: Dict[str, Any]) -> None:
+        """Record viewer feedback from the LMS (preview_feedback message)."""
+        self._feedback = feedback
+        self._feedback_at = time.monotonic()
+
+    def update(self, sender_stats: Optional[Dict[str, Any]]) -> bool:
+        """Feed the frame sender's stats; decides once per control window.
+
+        Returns:
+            True if the tier changed
+        """
+        now = time.monotonic()
+        if now < self._window_end or not sender_stats:
+            return False
+        self._window_end = now + self._window_length()
+
+        reason = self._congestion(sender_stats, now)
+        old_level = self.level
+        if reason:
+            # Multiplicative decrease; skip the next window so the sender's
+            # moving averages reflect the new tier before judging again
+            self.level //= 2
+            self._healthy_windows = 0
+            self._window_end += CONTROL_INTERVAL
+            self.last_reason = reason
+        else:
+            self._healthy_windows += 1
+            if self._healthy_windows >= HEALTHY_WINDOWS_TO_STEP_UP and self.level < len(PREVIEW_TIERS) - 1:
+                # Additive increase
+                self.level += 1
+                self._healthy_windows = 0
+
+        if self.level == old_level:
+            return False
+        if self.level < old_level:
+            self.decreases += 1
+        else:
+            self.increases += 1
+        self._current = self._tier_settings()
+        return True
+
+    @staticmethod
+    def _window_length() -> float:
+        return CONTROL_INTERVAL * random.uniform(1 - CONTROL_JITTER, 1 + CONTROL_JITTER)
+
+    def _congestion(self, stats: Dict[str, Any], now: float) -> Optional[str]:
+        """Name of the first congestion signal seen in this window, or None."""
+        interval = 1.0 / self._current[1]
+
+        dropped = stats.get("frames_dropped", 0)
+        new_drops = dropped - self._last_dropped
+        self._last_dropped = dropped
+        if new_drops > 0:
+            return "sender_drops"
+
+        if stats.get("send_time_avg_ms", 0.0) / 1000 > UPLINK_BUSY_LIMIT * interval:
+            return "send_latency"
+        if stats.get("queue_latency_avg_ms", 0.0) / 1000 > QUEUE_LATENCY_LIMIT * interval:
+            return "queue_latency"
+
+        frames_sent = stats.get("frames_sent", 0)
+        if frames_sent:
+            frame_bytes = stats.get("bytes_sent", 0) / frames_sent
+            if stats.get("write_buffer", 0) > WRITE_BUFFER_FRAMES_LIMIT * frame_bytes:
+                return "write_buffer"
+
+        feedback = self._feedback
+        if feedback and now - self._feedback_at <= FEEDBACK_MAX_AGE:
+            self._feedback = None
+            if feedback.get("delivered", 1.0) < VIEWER_DELIVERY_LIMIT:
+                return "viewer_drops"
+            if feedback.get("latency_ms", 0.0) > VIEWER_LATENCY_LIMIT_MS:
+                return "viewer_latency"
+        return None
+
+    def _tier_settings(self) -> Tuple[PreviewOptions, float]:
+        scale, quality_share, fps_share = PREVIEW_TIERS[self.tier]
+
+        width, height = self.options.width, self.options.height
+        if width is None and height is None:
+            # Scale from the captured (or cropped) width
+            width = self.frame_size[0] * (self.options.roi[2] if self.options.roi else 1.0)
+        options = PreviewOptions(
+            width=max(1, round(width * scale)) if width else None,
+            height=max(1, round(height * scale)) if height else None,
+            quality=round(self.min_quality + quality_share * (self.max_quality - self.min_quality)),
+            grayscale=self.options.grayscale,
+            roi=self.options.roi
+        )
+        fps = self.min_fps + fps_share * (self.max_fps - self.min_fps)
+        return options, fps
+
+    def get_status(self) -> Dict[str, Any]:
+        options, fps = self._current
+        return {
+            "tier": self.tier,
+            "tiers": len(PREVIEW_TIERS),
+            "width": options.width,
+            "height": options.height,
+            "quality": options.quality,
+            "fps": round(fps, 1),
+            "decreases": self.decreases,
+            "increases": self.increases,
+            "last_reason": self.last_reason,
+        }
@@ -1,10 +1,23 @@
-"""Reminder Manager - 课程提醒管理器"""
+"""Reminder Manager - 课程提醒管理器
+
+每条提醒的触发时间（上课时间 - reminder_minutes）放入一个最小堆，后台任务在
+portal 的事件循环上睡眠到最近的触发时间；只有课程表或相关设置变更时才重新计算。
+"""
 import asyncio
-import threading
+import heapq
 from datetime import datetime, timedelta
-from typing import Optional, Set
+from typing import List, Optional, Set, Tuple
 from . import logger
 
+# 影响提醒时间的设置，其他设置变更不会触发重新计算
+REMINDER_SETTINGS = ('reminder_enabled', 'reminder_minutes', 'semester_start_date')
+
+# 单次最长睡眠（秒）。asyncio 的计时在系统休眠期间不走，定期醒来兜底休眠和时钟调整
+MAX_SLEEP_SECONDS = 300
+
+# 堆元素: (触发时间, 提醒ID, 上课时间, 课程信息)
+_Reminder = Tuple[datetime, str, datetime, dict]
+
 
 class ReminderManager:
     """管理课程提醒通知的后台任务"""
@@ -25,106 +38,158 @@ class ReminderManager:
         # 跟踪已发送的提醒，避免重复发送 (格式: "entry_id_date")
         self.sent_reminders: Set[str] = set()
 
-        # 后台任务
-        self._task = None
+        # 今天尚未触发的提醒（按触发时间排序的最小堆）及其对应日期
+        self._heap: List[_Reminder] = []
+        self._heap_date = None
+        self._dirty = True
+
+        # 后台任务所在的事件循环及唤醒事件（任务运行期间有效）
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake: Optional[asyncio.Event] = None
         self._running = False
 
+        # 课程表或设置变更时重新计算提醒
+        schedule_manager.add_listener(self._on_schedule_event)
+        settings_manager.add_listener(self._on_settings_changed)
+
         self.logger.log_message("info", "ReminderManager initialized")
 
-    def start(self):
-        """启动提醒服务"""
+    def start(self, portal):
+        """在 portal 的事件循环上启动提醒服务
+
+        Args:
+            portal: anyio 阻塞 portal（与命令处理共用的事件循环）
+        """
         if self._running:
             self.logger.log_message("warning", "Reminder service already running")
             return
 
         self._running = True
-
-        # 在新线程中运行异步事件循环
-        def run_loop():
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            self._task = loop.create_task(self._reminder_loop())
-            loop.run_until_complete(self._task)
-            loop.close()
-
-        thread = threading.Thread(target=run_loop, daemon=True)
-        thread.start()
+        self._dirty = True
+        portal.start_task_soon(self._reminder_loop)
 
         self.logger.log_message("info", "Reminder service started")
 
     def stop(self):
         """停止提醒服务"""
         self._running = False
-        if self._task:
-            self._task.cancel()
+        self._request_wakeup()
         self.logger.log_message("info", "Reminder service stopped")
 
+    def _on_schedule_event(self, event_type: str, payload: dict):
+        """课程表变更回调（可能来自任意线程）"""
+        self._invalidate()
+
+    def _on_settings_changed(self, updated_keys: List[str]):
+        """设置变更回调（可能来自任意线程）"""
+        if any(key in REMINDER_SETTINGS for key in updated_keys):
+            self._invalidate()
+
+    def _invalidate(self):
+        """标记提醒需要重新计算并唤醒后台任务"""
+        self._dirty = True
+        self._request_wakeup()
+
+    def _request_wakeup(self):
+        """线程安全地唤醒后台任务"""
+        loop, wake = self._loop, self._wake
+        if loop is None or wake is None:
+            return
+        try:
+            loop.call_soon_threadsafe(wake.set)
+        except RuntimeError:
+            # 事件循环已关闭
+            pass
+
     async def _reminder_loop(self):
-        """提醒循环 - 每分钟检查一次"""
-        while self._running:
-            try:
-                await self._check_and_send_reminders()
-                # 每60秒检查一次
-                await asyncio.sleep(60)
-            except asyncio.CancelledError:
-                break
-            except Exception as e:
-                self.logger.log_message("error", f"Error in reminder loop: {e}")
-                await asyncio.sleep(60)
-
-    async def _check_and_send_reminders(self):
-        """检查并发送课程提醒"""
+        """提醒循环 - 睡眠到下一个提醒或被变更唤醒"""
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
         try:
-            # 检查是否启用提醒
-            enabled = self.settings_manager.get_setting('reminder_enabled')
-            if enabled != 'true':
-                return
-
-            # 获取提醒提前时间
-            reminder_minutes_str = self.settings_manager.get_setting('reminder_minutes')
-            reminder_minutes = int(reminder_minutes_str) if reminder_minutes_str else 10
-
-            # 获取当前时间和周数
-            now = datetime.now()
-            current_day = now.isoweekday()  # 1-7 (Monday-Sunday)
-            current_time = now.strftime("%H:%M")
-
-            # 计算当前周数
-            week_number = self.schedule_manager.calculate_week_number(
-                self.settings_manager.get_setting('semester_start_date')
-            )
-
-            # 获取今天的课程
-            today_classes = self.schedule_manager.get_schedule_by_day(current_day, week_number)
-
-            # 检查每节课
-            for class_info in today_classes:
-                start_time = class_info['start_time']
-                class_id = class_info['id']
-
-                # 生成唯一的提醒ID（包含日期，避免每天重复）
-                reminder_id = f"{class_id}_{now.strftime('%Y-%m-%d')}"
-
-                # 如果已经发送过这个提醒，跳过
-                if reminder_id in self.sent_reminders:
-                    continue
-
-                # 计算距离上课的分钟数
-                start_hour, start_minute = map(int, start_time.split(':'))
-                start_datetime = now.replace(hour=start_hour, minute=start_minute, second=0, microsecond=0)
-                minutes_until_class = (start_datetime - now).total_seconds() / 60
-
-                # 如果在提醒时间范围内（提前reminder_minutes分钟到上课时间之间）
-                if 0 <= minutes_until_class <= reminder_minutes:
-                    await self._send_notification(class_info, int(minutes_until_class))
-                    self.sent_reminders.add(reminder_id)
-                    self.logger.log_message("info", f"Sent reminder for class: {class_info['name']}")
-
-            # 清理过期的提醒记录（超过24小时）
-            self._cleanup_old_reminders()
+            while self._running:
+                # 先清除再处理：处理期间到达的唤醒会让下面的等待立即返回
+                self._wake.clear()
+                try:
+                    timeout = await self._send_due_reminders()
+                except Exception as e:
+                    self.logger.log_message("error", f"Error in reminder loop: {e}")
+                    timeout = MAX_SLEEP_SECONDS
+
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self._loop = None
+            self._wake = None
+
+    def _rebuild(self, now: datetime):
+        """根据今天的课程和提醒设置重新计算提醒堆"""
+        self._dirty = False
+        self._heap_date = now.date()
+        self._heap = []
+        self._cleanup_old_reminders()
+
+        # 检查是否启用提醒
+        if self.settings_manager.get_setting('reminder_enabled') != 'true':
+            self.logger.log_message("debug", "Reminders disabled, nothing scheduled")
+            return
 
-        except Exception as e:
-            self.logger.log_message("error", f"Error checking reminders: {e}")
+        # 获取提醒提前时间
+        try:
+            reminder_minutes = int(self.settings_manager.get_setting('reminder_minutes') or 10)
+        except ValueError:
+            reminder_minutes = 10
+        lead = timedelta(minutes=reminder_minutes)
+
+        # 计算当前周数
+        week_number = self.schedule_manager.calculate_week_number(
+            self.settings_manager.get_setting('semester_start_date')
+        )
+
+        today_str = now.strftime('%Y-%m-%d')
+        for class_info in self.schedule_manager.timeline.classes_for_day(now.isoweekday(), week_number):
+            # 生成唯一的提醒ID（包含日期，避免每天重复）
+            reminder_id = f"{class_info['id']}_{today_str}"
+            if reminder_id in self.sent_reminders:
+                continue
+
+            start_hour, start_minute = map(int, class_info['start_time'].split(':'))
+            start_at = now.replace(hour=start_hour, minute=start_minute, second=0, microsecond=0)
+            # 已经开始的课程不再提醒；触发时间已过但尚未上课的会立即提醒
+            if start_at < now:
+                continue
+            self._heap.append((start_at - lead, reminder_id, start_at, class_info))
+
+        heapq.heapify(self._heap)
+        if self._heap:
+            self.logger.log_message(
+                "debug", f"Scheduled {len(self._heap)} reminder(s), next at {self._heap[0][0]:%H:%M}")
+
+    async def _send_due_reminders(self) -> float:
+        """发送已到触发时间的提醒，返回距下一次需要醒来的秒数"""
+        now = datetime.now()
+        if self._dirty or self._heap_date != now.date():
+            self._rebuild(now)
+
+        while self._heap and self._heap[0][0] <= now:
+            _, reminder_id, start_at, class_info = heapq.heappop(self._heap)
+            if reminder_id in self.sent_reminders:
+                continue
+            minutes_until = max(0, round((start_at - now).total_seconds() / 60))
+            await self._send_notification(class_info, minutes_until)
+            self.sent_reminders.add(reminder_id)
+            self.logger.log_message("info", f"Sent reminder for class: {class_info['name']}")
+
+        if self._heap:
+            timeout = (self._heap[0][0] - now).total_seconds()
+        else:
+            # 今天没有待发送的提醒，睡到明天零点
+            tomorrow = datetime.combine(now.date() + timedelta(days=1), datetime.min.time())
+            timeout = (tomorrow - now).total_seconds()
+        return min(max(timeout, 0.0), MAX_SLEEP_SECONDS)
 
     async def _send_notification(self, class_info: dict, minutes_until: int):
         """发送通知
@@ -183,4 +248,5 @@ class ReminderManager:
     def clear_sent_reminders(self):
         """手动清空已发送的提醒记录（用于测试）"""
         self.sent_reminders.clear()
+        self._invalidate()
         self.logger.log_message("info", "Cleared all sent reminders")
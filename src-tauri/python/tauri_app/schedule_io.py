@@ -0,0 +1,274 @@
+"""
+Schedule import/export formats for ClassTop.
+
+Exports are streamed: records come straight from a database cursor and are
+written out in small text chunks, optionally gzip-compressed, so memory use
+does not grow with the size of the timetable. Imports parse the same
+documents into plain course/entry rows for ``ScheduleManager.bulk_import``.
+
+- JSON: {"courses": [{id, name, ...}], "schedule": [{course_id, ...}]}.
+  Entries reference courses by their exported id.
+- CSV: one schedule entry per row (course_name, teacher, location, color,
+  day_of_week, start_time, end_time, weeks, note). Courses are created once
+  per distinct course_name.
+- JSON Lines (export only): one {"type": "course"|"schedule"|"settings", ...}
+  object per line.
+"""
+
+import csv
+import io
+import json
+import zlib
+from itertools import groupby
+from operator import itemgetter
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+EXPORT_FORMATS = ('json', 'jsonl', 'csv')
+
+# Column order of the CSV export
+CSV_FIELDS = [
+    'course_id', 'course_name', 'teacher', 'location', 'color',
+    'day_of_week', 'start_time', 'end_time', 'weeks', 'note'
+]
+
+# Approximate size of the text chunks handed to the writer / HTTP response
+EXPORT_CHUNK_SIZE = 64 * 1024
+
+# Settings that identify this client and are never exported
+EXPORT_EXCLUDED_SETTINGS = ('client_uuid', 'server_url', 'api_server_enabled')
+
+# Media types per export format
+EXPORT_MEDIA_TYPES = {
+    'json': 'application/json',
+    'jsonl': 'application/x-ndjson',
+    'csv': 'text/csv; charset=utf-8',
+}
+
+# Parsed import: (courses, entries). Courses carry a "key" that entries
+# reference through "course_key".
+ImportRows = Tuple[List[Dict], List[Dict]]
+
+
+def parse_json_import(data: str) -> ImportRows:
+    """Parse a JSON export into course and entry rows."""
+    data_dict = json.loads(data)
+
+    courses = [
+        {
+            "key": course.get('id'),
+            "name": course.get('name'),
+            "teacher": course.get('teacher'),
+            "location": course.get('location'),
+            "color": course.get('color')
+        }
+        for course in data_dict.get('courses', [])
+    ]
+
+    entries = [
+        {
+            "course_key": entry.get('course_id'),
+            "day_of_week": entry.get('day_of_week'),
+            "start_time": entry.get('start_time'),
+            "end_time": entry.get('end_time'),
+            "weeks": entry.get('weeks'),
+            "note": entry.get('note')
+        }
+        for entry in data_dict.get('schedule', [])
+    ]
+    return courses, entries
+
+
+def parse_csv_import(data: str) -> ImportRows:
+    """Parse a CSV export into course and entry rows."""
+    courses: Dict[str, Dict] = {}
+    entries: List[Dict] = []
+
+    for row in csv.DictReader(io.StringIO(data)):
+        course_name = (row.get('course_name') or '').strip()
+        if not course_name:
+            continue
+
+        if course_name not in courses:
+            courses[course_name] = {
+                "key": course_name,
+                "name": course_name,
+                "teacher": row.get('teacher'),
+                "location": row.get('location'),
+                "color": row.get('color')
+            }
+
+        try:
+            weeks_str = row.get('weeks', '[]')
+            weeks = json.loads(weeks_str) if weeks_str else None
+        except ValueError:
+            weeks = None
+
+        entries.append({
+            "course_key": course_name,
+            "day_of_week": row.get('day_of_week') or 1,
+            "start_time": row.get('start_time'),
+            "end_time": row.get('end_time'),
+            "weeks": weeks,
+            "note": row.get('note')
+        })
+
+    return list(courses.values()), entries
+
+
+def parse_import(format: str, data: str) -> ImportRows:
+    """Parse an import document in the given format ("json" or "csv")."""
+    if format == 'json':
+        return parse_json_import(data)
+    if format == 'csv':
+        return parse_csv_import(data)
+    raise ValueError(f"Unsupported import format: {format}")
+
+
+# ========== Export ==========
+
+def _chunked(pieces: Iterable[str]) -> Iterator[str]:
+    """Join small strings into chunks of roughly EXPORT_CHUNK_SIZE characters."""
+    buffer: List[str] = []
+    size = 0
+    for piece in pieces:
+        buffer.append(piece)
+        size += len(piece)
+        if size >= EXPORT_CHUNK_SIZE:
+            yield ''.join(buffer)
+            buffer.clear()
+            size = 0
+    if buffer:
+        yield ''.join(buffer)
+
+
+def _json_pieces(records: Iterable[Tuple[str, Dict]], sections: List[str],
+                 settings: Optional[Dict[str, str]]) -> Iterator[str]:
+    """The {"courses": [...], "schedule": [...], "settings": {...}} document, piece by piece."""
+    section_of = {'course': 'courses', 'schedule': 'schedule'}
+    # Records arrive grouped by kind, courses first
+    groups = groupby(records, key=itemgetter(0))
+    pending = next(groups, None)
+
+    separator = '\n'
+    yield '{'
+    for section in sections:
+        yield f'{separator}  "{section}": ['
+        separator = ',\n'
+        if pending is None or section_of[pending[0]] != section:
+            yield ']'
+            continue
+        item_separator = '\n    '
+        for _, record in pending[1]:
+            yield item_separator + json.dumps(record, ensure_ascii=False)
+            item_separator = ',\n    '
+        yield '\n  ]'
+        pending = next(groups, None)
+    if settings is not None:
+        yield f'{separator}  "settings": ' + json.dumps(settings, ensure_ascii=False)
+    yield '\n}\n'
+
+
+def _jsonl_pieces(records: Iterable[Tuple[str, Dict]], settings: Optional[Dict[str, str]]) -> Iterator[str]:
+    for kind, record in records:
+        yield json.dumps({"type": kind, **record}, ensure_ascii=False) + '\n'
+    if settings is not None:
+        yield json.dumps({"type": "settings", "values": settings}, ensure_ascii=False) + '\n'
+
+
+def _csv_pieces(records: Iterable[Tuple[str, Dict]]) -> Iterator[str]:
+    """Schedule entries as CSV rows (courses are implied by the course columns)."""
+    line = io.StringIO()
+    writer = csv.writer(line)
+
+    def render(values) -> str:
+        line.seek(0)
+        line.truncate()
+        writer.writerow(values)
+        return line.getvalue()
+
+    yield render(CSV_FIELDS)
+    for kind, entry in records:
+        if kind != 'schedule':
+            continue
+        yield render([
+            entry.get('course_id', ''),
+            entry.get('course_name', ''),
+            entry.get('teacher', ''),
+            entry.get('location', ''),
+            entry.get('color', ''),
+            entry.get('day_of_week', ''),
+            entry.get('start_time', ''),
+            entry.get('end_time', ''),
+            json.dumps(entry.get('weeks', [])),
+            entry.get('note', '')
+        ])
+
+
+def exportable_settings(settings: Dict[str, str]) -> Dict[str, str]:
+    """Drop client-specific settings before exporting."""
+    return {k: v for k, v in settings.items() if k not in EXPORT_EXCLUDED_SETTINGS}
+
+
+def iter_export(schedule_manager, format: str, include_courses: bool = True,
+                include_schedule: bool = True,
+                settings: Optional[Dict[str, str]] = None) -> Iterator[str]:
+    """Stream an export document as text chunks.
+
+    Args:
+        schedule_manager: ScheduleManager to read records from
+        format: "json", "jsonl" or "csv" (CSV holds schedule entries only)
+        include_courses: Include the courses section (json/jsonl)
+        include_schedule: Include schedule entries
+        settings: Settings to append (json/jsonl), None to leave them out
+
+    Raises:
+        ValueError: Unsupported format
+    """
+    if format not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format: {format}")
+
+    if format == 'csv':
+        records = schedule_manager.iter_export_records(False, include_schedule)
+        return _chunked(_csv_pieces(records))
+
+    records = schedule_manager.iter_export_records(include_courses, include_schedule)
+    if format == 'jsonl':
+        return _chunked(_jsonl_pieces(records, settings))
+
+    sections = (['courses'] if include_courses else []) + (['schedule'] if include_schedule else [])
+    return _chunked(_json_pieces(records, sections, settings))
+
+
+def iter_encoded(chunks: Iterable[str], compress: bool = False) -> Iterator[bytes]:
+    """Encode text chunks as UTF-8, gzip-compressing them incrementally if requested."""
+    if not compress:
+        for chunk in chunks:
+            yield chunk.encode('utf-8')
+        return
+
+    # wbits=31 produces a gzip container rather than a raw zlib stream
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode('utf-8'))
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def write_export(path: Union[str, Path], chunks: Iterable[str], compress: bool = False) -> int:
+    """Write an export stream to a file and return the number of bytes written."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    written = 0
+    tmp_path = path.with_name(path.name + '.part')
+    try:
+        with open(tmp_path, 'wb') as f:
+            for data in iter_encoded(chunks, compress):
+                f.write(data)
+                written += len(data)
+        tmp_path.replace(path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+    return written
@@ -5,12 +5,24 @@ Handles all schedule-related operations with proper logging.
 
 import json
 import sqlite3
-from typing import Optional, Dict, List
+from typing import Optional, Dict, List, Union, Callable, Any, Iterator, Tuple
 from datetime import datetime, timedelta
 from contextlib import contextmanager
 from pathlib import Path
 
 from . import logger as _logger
+from .conflicts import conflict_weeks, find_conflicting_pairs
+from .db import ALL_WEEKS, week_rows
+from .db_pool import get_pool
+
+# Rows per executemany batch during bulk import (progress is reported per batch)
+IMPORT_BATCH_SIZE = 500
+
+# Conflicting pairs counted during bulk import before the sweep stops
+IMPORT_CONFLICT_LIMIT = 1000
+
+# Rows fetched per round trip while streaming an export
+EXPORT_FETCH_SIZE = 500
 
 
 class ScheduleManager:
@@ -20,22 +32,38 @@ class ScheduleManager:
         self.db_path = db_path
         self.logger = _logger
         self.event_handler = event_handler
+        self.pool = get_pool(db_path)
+        # In-process listeners notified after every schedule/course change
+        self._listeners: List[Callable[[str, Dict[str, Any]], None]] = []
+
+        from .timeline import ScheduleTimeline
+        self.timeline = ScheduleTimeline(self)
 
     @contextmanager
     def get_connection(self):
-        """Context manager for database connections."""
-        conn = None
+        """Context manager for database connections (pooled, one per thread)."""
         try:
-            conn = sqlite3.connect(self.db_path)
-            self.logger.log_message("debug", f"Database connection opened: {self.db_path}")
-            yield conn
+            with self.pool.connection() as conn:
+                yield conn
         except Exception as e:
             self.logger.log_message("error", f"Database connection failed: {e}")
             raise
-        finally:
-            if conn:
-                conn.close()
-                self.logger.log_message("debug", "Database connection closed")
+
+    def add_listener(self, callback: Callable[[str, Dict[str, Any]], None]) -> None:
+        """Register a callback(event_type, payload) for schedule changes.
+
+        Event types and payloads mirror the schedule-update events emitted to
+        the frontend (course_added, schedule_added, schedule_deleted, ...).
+        """
+        self._listeners.append(callback)
+
+    def _notify_listeners(self, event_type: str, payload: Dict[str, Any]) -> None:
+        """Notify in-process listeners of a schedule change."""
+        for callback in self._listeners:
+            try:
+                callback(event_type, payload)
+            except Exception as e:
+                self.logger.log_message("error", f"Schedule listener failed on {event_type}: {e}")
 
     # Course Management Methods
     def add_course(self, name: str, teacher: Optional[str] = None,
@@ -58,6 +86,7 @@ class ScheduleManager:
                     # Emit event if handler is available
                     if self.event_handler:
                         self.event_handler.emit_course_added(course_id, name)
+                    self._notify_listeners("course_added", {"id": course_id, "name": name})
                 else:
                     self.logger.log_message("warning", f"Failed to get course ID after insertion")
 
@@ -123,6 +152,7 @@ class ScheduleManager:
                     # Emit event if handler is available
                     if self.event_handler:
                         self.event_handler.emit_course_updated(course_id, **fields_to_update)
+                    self._notify_listeners("course_updated", {"id": course_id, **fields_to_update})
                 else:
                     self.logger.log_message("warning", f"Course {course_id} not found")
 
@@ -148,6 +178,10 @@ class ScheduleManager:
                     return False
 
                 # Delete course (CASCADE will handle schedule entries)
+                cur.execute(
+                    "DELETE FROM schedule_weeks WHERE entry_id IN (SELECT id FROM schedule WHERE course_id = ?)",
+                    (course_id,)
+                )
                 cur.execute("DELETE FROM courses WHERE id = ?", (course_id,))
                 conn.commit()
 
@@ -155,6 +189,7 @@ class ScheduleManager:
                 # Emit event if handler is available
                 if self.event_handler:
                     self.event_handler.emit_course_deleted(course_id)
+                self._notify_listeners("course_deleted", {"id": course_id})
                 return True
             except Exception as e:
                 self.logger.log_message("error", f"Error deleting course: {e}")
@@ -177,6 +212,10 @@ class ScheduleManager:
             self.logger.log_message("error", f"Invalid day_of_week: {day_of_week}")
             return -1
 
+        if not self._validate_weeks(weeks):
+            self.logger.log_message("error", f"Invalid weeks: {weeks}")
+            return -1
+
         with self.get_connection() as conn:
             try:
                 cur = conn.cursor()
@@ -189,7 +228,7 @@ class ScheduleManager:
                     return -1
 
                 # Check for time conflicts
-                if self._has_time_conflict(conn, day_of_week, start_time, end_time, weeks):
+                if self._has_time_conflict(day_of_week, start_time, end_time, weeks):
                     self.logger.log_message("warning", "Schedule conflict detected")
 
                 weeks_json = json.dumps(weeks) if weeks else None
@@ -198,14 +237,26 @@ class ScheduleManager:
                        VALUES (?, ?, ?, ?, ?, ?)""",
                     (course_id, day_of_week, start_time, end_time, weeks_json, note)
                 )
+                entry_id = cur.lastrowid if cur.lastrowid is not None else -1
+                if entry_id > 0:
+                    cur.executemany(
+                        "INSERT INTO schedule_weeks (entry_id, week) VALUES (?, ?)",
+                        week_rows(entry_id, weeks)
+                    )
                 conn.commit()
 
-                entry_id = cur.lastrowid if cur.lastrowid is not None else -1
                 if entry_id > 0:
                     self.logger.log_message("info", f"Schedule entry added with ID: {entry_id}")
                     # Emit event if handler is available
                     if self.event_handler:
                         self.event_handler.emit_schedule_added(entry_id, course_id, day_of_week, start_time, end_time)
+                    self._notify_listeners("schedule_added", {
+                        "id": entry_id,
+                        "course_id": course_id,
+                        "day_of_week": day_of_week,
+                        "start_time": start_time,
+                        "end_time": end_time
+                    })
 
                 return entry_id
             except Exception as e:
@@ -224,19 +275,19 @@ class ScheduleManager:
                            s.day_of_week, s.start_time, s.end_time, s.weeks, s.note
                     FROM schedule s
                     JOIN courses c ON s.course_id = c.id
-                    ORDER BY s.day_of_week, s.start_time
                 """
-                cur.execute(query)
+                params = []
+                if week is not None:
+                    query += self._WEEK_JOIN
+                    params.extend([ALL_WEEKS, week])
+                query += " ORDER BY s.day_of_week, s.start_time"
+                cur.execute(query, params)
 
                 schedule = []
                 for row in cur.fetchall():
                     weeks_json = row[9]
                     weeks_list = json.loads(weeks_json) if weeks_json else []
 
-                    # Filter by week if specified
-                    if week is not None and weeks_list and week not in weeks_list:
-                        continue
-
                     schedule.append({
                         "id": row[0],
                         "course_id": row[1],
@@ -265,6 +316,7 @@ class ScheduleManager:
             try:
                 cur = conn.cursor()
                 cur.execute("DELETE FROM schedule WHERE id = ?", (entry_id,))
+                cur.execute("DELETE FROM schedule_weeks WHERE entry_id = ?", (entry_id,))
                 conn.commit()
 
                 success = cur.rowcount > 0
@@ -273,6 +325,7 @@ class ScheduleManager:
                     # Emit event if handler is available
                     if self.event_handler:
                         self.event_handler.emit_schedule_deleted(entry_id)
+                    self._notify_listeners("schedule_deleted", {"id": entry_id})
                 else:
                     self.logger.log_message("warning", f"Schedule entry {entry_id} not found")
 
@@ -281,60 +334,291 @@ class ScheduleManager:
                 self.logger.log_message("error", f"Error deleting schedule entry: {e}")
                 return False
 
-    def get_schedule_by_day(self, day_of_week: int, week: Optional[int] = None) -> List[Dict]:
-        """Get all classes for a specific day, optionally filtered by week."""
-        self.logger.log_message("debug", f"Getting schedule for day {day_of_week}, week {week}")
+    # Streaming Export
+    def iter_export_records(self, include_courses: bool = True,
+                            include_schedule: bool = True) -> Iterator[Tuple[str, Dict]]:
+        """
+        Stream courses and schedule entries straight from a cursor.
 
-        with self.get_connection() as conn:
-            try:
-                cur = conn.cursor()
-                query = """
-                    SELECT s.id, c.name, c.teacher, c.location, s.day_of_week,
-                           s.start_time, s.end_time, s.weeks, c.color
+        Yields ("course", row) for every course, then ("schedule", row) for every
+        entry in get_courses()/get_schedule() shape. Rows are fetched in batches
+        so memory stays constant. Both tables are read from one snapshot on a
+        dedicated connection, since a streaming response may resume the
+        generator on a different thread.
+        """
+        conn = self.pool.open_connection()
+        try:
+            # One read transaction keeps courses and schedule consistent with each other
+            conn.execute("BEGIN")
+            cur = conn.cursor()
+
+            if include_courses:
+                cur.execute("SELECT id, name, teacher, location, color FROM courses ORDER BY id")
+                while True:
+                    rows = cur.fetchmany(EXPORT_FETCH_SIZE)
+                    if not rows:
+                        break
+                    for row in rows:
+                        yield "course", {
+                            "id": row[0],
+                            "name": row[1],
+                            "teacher": row[2],
+                            "location": row[3],
+                            "color": row[4]
+                        }
+
+            if include_schedule:
+                cur.execute("""
+                    SELECT s.id, s.course_id, c.name, c.teacher, c.location, c.color,
+                           s.day_of_week, s.start_time, s.end_time, s.weeks, s.note
                     FROM schedule s
                     JOIN courses c ON s.course_id = c.id
-                    WHERE s.day_of_week = ?
-                    ORDER BY s.start_time
-                """
-                cur.execute(query, (day_of_week,))
+                    ORDER BY s.day_of_week, s.start_time
+                """)
+                while True:
+                    rows = cur.fetchmany(EXPORT_FETCH_SIZE)
+                    if not rows:
+                        break
+                    for row in rows:
+                        yield "schedule", {
+                            "id": row[0],
+                            "course_id": row[1],
+                            "course_name": row[2],
+                            "teacher": row[3],
+                            "location": row[4],
+                            "color": row[5],
+                            "day_of_week": row[6],
+                            "start_time": row[7],
+                            "end_time": row[8],
+                            "weeks": json.loads(row[9]) if row[9] else [],
+                            "note": row[10]
+                        }
+        finally:
+            conn.close()
+
+    # Bulk Import
+    def _next_id(self, cur: sqlite3.Cursor, table: str) -> int:
+        """First unused AUTOINCREMENT id of a table (caller holds the write lock)."""
+        cur.execute(
+            f"""SELECT MAX(COALESCE((SELECT seq FROM sqlite_sequence WHERE name = ?), 0),
+                          COALESCE((SELECT MAX(id) FROM {table}), 0))""",
+            (table,)
+        )
+        return cur.fetchone()[0] + 1
+
+    def bulk_import(self, courses: List[Dict], entries: List[Dict],
+                    replace_existing: bool = False,
+                    progress: Optional[Callable[[str, int, int], None]] = None) -> Dict[str, int]:
+        """
+        Import courses and schedule entries in a single transaction.
 
-                classes = []
-                for row in cur.fetchall():
-                    weeks_list = json.loads(row[7]) if row[7] else []
+        Conflicts are checked once with a sweep over the whole timetable, rows
+        are written with executemany, and a single "schedule_reloaded" event
+        is emitted instead of one event per row. Conflicts are reported, not
+        rejected, like add_schedule_entry does.
 
-                    # Filter by week if specified
-                    if week is not None and weeks_list and week not in weeks_list:
-                        continue
+        Args:
+            courses: Course rows {key, name, teacher, location, color}
+            entries: Entry rows {course_key, day_of_week, start_time, end_time, weeks, note}
+            replace_existing: Delete every course and schedule entry first
+            progress: Optional callback(stage, done, total); stages are
+                      "conflicts", "courses", "schedule" and "done"
 
-                    classes.append({
-                        "id": row[0],
-                        "name": row[1],
-                        "teacher": row[2],
-                        "location": row[3],
-                        "day_of_week": row[4],
-                        "start_time": row[5],
-                        "end_time": row[6],
-                        "weeks": weeks_list,
-                        "color": row[8] if len(row) > 8 else None
-                    })
+        Returns:
+            {courses_imported, schedule_imported, skipped, conflicts, conflicts_capped}.
+            conflicts_capped means the sweep stopped at IMPORT_CONFLICT_LIMIT
+            pairs, so conflicts is a lower bound
 
-                return classes
-            except Exception as e:
-                self.logger.log_message("error", f"Error getting schedule by day: {e}")
-                return []
+        Raises:
+            Exception: Database errors; nothing is written in that case
+        """
+        def report(stage: str, done: int, total: int) -> None:
+            if progress:
+                try:
+                    progress(stage, done, total)
+                except Exception as e:
+                    self.logger.log_message("warning", f"Import progress callback failed: {e}")
+
+        self.logger.log_message("info", f"Bulk import: {len(courses)} courses, {len(entries)} entries "
+                                        f"(replace_existing={replace_existing})")
+
+        courses = [course for course in courses if course.get("name")]
+        course_keys = {course["key"] for course in courses}
+
+        # Validate up front with the same rules as add_schedule_entry
+        valid_entries = []
+        for entry in entries:
+            try:
+                day_of_week = int(entry.get("day_of_week"))
+            except (TypeError, ValueError):
+                continue
+            start_time, end_time = entry.get("start_time"), entry.get("end_time")
+            if (entry.get("course_key") not in course_keys or not 1 <= day_of_week <= 7
+                    or not isinstance(start_time, str) or not isinstance(end_time, str)
+                    or not self._validate_time_format(start_time)
+                    or not self._validate_time_format(end_time)
+                    or not self._validate_weeks(entry.get("weeks"))):
+                continue
+            valid_entries.append({**entry, "day_of_week": day_of_week, "weeks": entry.get("weeks") or None})
+        skipped = len(entries) - len(valid_entries)
+
+        # One sweep over the imported timetable (and the schedule it is added to),
+        # done before taking the write lock so other writers are not held up by it
+        report("conflicts", 0, 1)
+        timetable = valid_entries if replace_existing else valid_entries + self.timeline.all_classes()
+        conflicts = find_conflicting_pairs(timetable, IMPORT_CONFLICT_LIMIT)
+        conflicts_capped = len(conflicts) >= IMPORT_CONFLICT_LIMIT
+        report("conflicts", 1, 1)
+
+        with self.get_connection() as conn:
+            cur = conn.cursor()
+            # Take the write lock now so the id ranges below stay ours
+            cur.execute("BEGIN IMMEDIATE")
+
+            if replace_existing:
+                cur.execute("DELETE FROM schedule_weeks")
+                cur.execute("DELETE FROM schedule")
+                cur.execute("DELETE FROM courses")
+
+            # Explicit ids let executemany insert entries and their week rows together
+            next_course_id = self._next_id(cur, "courses")
+            course_ids = {}
+            course_rows = []
+            for offset, course in enumerate(courses):
+                course_ids[course["key"]] = next_course_id + offset
+                course_rows.append((next_course_id + offset, course["name"], course.get("teacher"),
+                                    course.get("location"), course.get("color")))
+
+            for done in range(0, len(course_rows), IMPORT_BATCH_SIZE):
+                cur.executemany(
+                    "INSERT INTO courses (id, name, teacher, location, color) VALUES (?, ?, ?, ?, ?)",
+                    course_rows[done:done + IMPORT_BATCH_SIZE]
+                )
+                report("courses", min(done + IMPORT_BATCH_SIZE, len(course_rows)), len(course_rows))
+
+            next_entry_id = self._next_id(cur, "schedule")
+            for done in range(0, len(valid_entries), IMPORT_BATCH_SIZE):
+                entry_rows = []
+                weeks_rows = []
+                for offset, entry in enumerate(valid_entries[done:done + IMPORT_BATCH_SIZE], start=done):
+                    entry_id = next_entry_id + offset
+                    entry_rows.append((
+                        entry_id, course_ids[entry["course_key"]], entry["day_of_week"],
+                        entry["start_time"], entry["end_time"],
+                        json.dumps(entry["weeks"]) if entry["weeks"] else None, entry.get("note")
+                    ))
+                    weeks_rows.extend(week_rows(entry_id, entry["weeks"]))
+                cur.executemany(
+                    """INSERT INTO schedule (id, course_id, day_of_week, start_time, end_time, weeks, note)
+                       VALUES (?, ?, ?, ?, ?, ?, ?)""",
+                    entry_rows
+                )
+                cur.executemany("INSERT INTO schedule_weeks (entry_id, week) VALUES (?, ?)", weeks_rows)
+                report("schedule", min(done + IMPORT_BATCH_SIZE, len(valid_entries)), len(valid_entries))
+
+            conn.commit()
+
+        result = {
+            "courses_imported": len(course_rows),
+            "schedule_imported": len(valid_entries),
+            "skipped": skipped,
+            "conflicts": len(conflicts),
+            "conflicts_capped": conflicts_capped
+        }
+        if conflicts:
+            count = f"≥ {len(conflicts)}" if conflicts_capped else str(len(conflicts))
+            self.logger.log_message("warning", f"Imported schedule has {count} time conflicts")
+        self.logger.log_message("info", f"Bulk import finished: {result}")
+
+        payload = {**result, "replace_existing": replace_existing}
+        if self.event_handler:
+            self.event_handler.emit_schedule_reloaded(payload)
+        self._notify_listeners("schedule_reloaded", payload)
+
+        report("done", len(valid_entries), len(valid_entries))
+        return result
+
+    def get_schedule_by_day(self, day_of_week: int, week: Optional[int] = None) -> List[Dict]:
+        """Get all classes for a specific day, optionally filtered by week."""
+        self.logger.log_message("debug", f"Getting schedule for day {day_of_week}, week {week}")
 
-    def get_schedule_for_week(self, week: Optional[int] = None) -> List[Dict]:
-        """Get all classes for the entire week, optionally filtered by week number."""
+        try:
+            return self._query_classes(week, day_of_week)
+        except Exception as e:
+            self.logger.log_message("error", f"Error getting schedule by day: {e}")
+            return []
+
+    def get_schedule_for_week(self, week: Optional[int] = None,
+                              group_by_day: bool = False) -> Union[List[Dict], Dict[int, List[Dict]]]:
+        """Get all classes for the entire week, optionally filtered by week number.
+
+        Args:
+            week: Week number to filter by (None = all weeks)
+            group_by_day: Return {day_of_week: [classes]} for days 1-7 instead of a flat list
+
+        Returns:
+            Classes ordered by (day_of_week, start_time), same shape as get_schedule_by_day
+        """
         self.logger.log_message("debug", f"Getting schedule for week {week}")
 
-        all_classes = []
-        for day in range(1, 8):  # Monday to Sunday
-            day_classes = self.get_schedule_by_day(day, week)
-            all_classes.extend(day_classes)
+        try:
+            classes = self._query_classes(week)
+        except Exception as e:
+            self.logger.log_message("error", f"Error getting schedule for week: {e}")
+            classes = []
+
+        if not group_by_day:
+            return classes
+
+        grouped: Dict[int, List[Dict]] = {day: [] for day in range(1, 8)}
+        for cls in classes:
+            grouped[cls["day_of_week"]].append(cls)
+        return grouped
+
+    def _query_classes(self, week: Optional[int] = None, day_of_week: Optional[int] = None,
+                       entry_id: Optional[int] = None) -> List[Dict]:
+        """Fetch classes in one query, filtered by week and optionally a single day or entry."""
+        query = """
+            SELECT s.id, c.name, c.teacher, c.location, s.day_of_week,
+                   s.start_time, s.end_time, s.weeks, c.color
+            FROM schedule s
+            JOIN courses c ON s.course_id = c.id
+        """
+        params = []
+        if week is not None:
+            query += self._WEEK_JOIN
+            params.extend([ALL_WEEKS, week])
+        if day_of_week is not None:
+            query += " WHERE s.day_of_week = ?"
+            params.append(day_of_week)
+        elif entry_id is not None:
+            query += " WHERE s.id = ?"
+            params.append(entry_id)
+        query += " ORDER BY s.day_of_week, s.start_time"
 
-        return all_classes
+        with self.get_connection() as conn:
+            cur = conn.cursor()
+            cur.execute(query, params)
+
+            return [
+                {
+                    "id": row[0],
+                    "name": row[1],
+                    "teacher": row[2],
+                    "location": row[3],
+                    "day_of_week": row[4],
+                    "start_time": row[5],
+                    "end_time": row[6],
+                    "weeks": json.loads(row[7]) if row[7] else [],
+                    "color": row[8]
+                }
+                for row in cur.fetchall()
+            ]
 
     # Utility Methods
+    # Restricts rows to entries that apply to a given week (params: ALL_WEEKS, week)
+    _WEEK_JOIN = " JOIN schedule_weeks w ON w.entry_id = s.id AND w.week IN (?, ?)"
+
     def _validate_time_format(self, time_str: str) -> bool:
         """Validate time string format (HH:MM)."""
         try:
@@ -343,40 +627,30 @@ class ScheduleManager:
         except:
             return False
 
-    def _has_time_conflict(self, conn: sqlite3.Connection, day_of_week: int,
-                          start_time: str, end_time: str,
+    def _validate_weeks(self, weeks: Optional[List[int]]) -> bool:
+        """Validate a week list: None/empty (every week) or week numbers >= 1."""
+        if not weeks:
+            return True
+        return isinstance(weeks, list) and all(
+            isinstance(week, int) and not isinstance(week, bool) and week >= 1 for week in weeks
+        )
+
+    def _has_time_conflict(self, day_of_week: int, start_time: str, end_time: str,
                           weeks: Optional[List[int]] = None) -> bool:
         """Check if there's a time conflict with existing schedule."""
         try:
-            cur = conn.cursor()
-            query = """
-                SELECT s.id, s.start_time, s.end_time, s.weeks, c.name
-                FROM schedule s
-                JOIN courses c ON s.course_id = c.id
-                WHERE s.day_of_week = ?
-            """
-            cur.execute(query, (day_of_week,))
-
-            for row in cur.fetchall():
-                existing_start = row[1]
-                existing_end = row[2]
-                existing_weeks = json.loads(row[3]) if row[3] else []
-
-                # Check time overlap
-                if not (end_time <= existing_start or start_time >= existing_end):
-                    # Check week overlap
-                    if not weeks or not existing_weeks:
-                        self.logger.log_message("warning",
-                            f"Time conflict with course '{row[4]}' ({existing_start}-{existing_end})")
-                        return True
-
-                    week_overlap = set(weeks) & set(existing_weeks)
-                    if week_overlap:
-                        self.logger.log_message("warning",
-                            f"Time conflict with course '{row[4]}' in weeks {week_overlap}")
-                        return True
+            overlapping = self.timeline.overlapping(day_of_week, start_time, end_time, weeks)
+            if not overlapping:
+                return False
 
-            return False
+            existing = overlapping[0]
+            if not weeks or not existing["weeks"]:
+                self.logger.log_message("warning",
+                    f"Time conflict with course '{existing['name']}' ({existing['start_time']}-{existing['end_time']})")
+            else:
+                self.logger.log_message("warning",
+                    f"Time conflict with course '{existing['name']}' in weeks {conflict_weeks(weeks, existing['weeks'])}")
+            return True
         except Exception as e:
             self.logger.log_message("error", f"Error checking time conflict: {e}")
             return False
@@ -413,70 +687,87 @@ class ScheduleManager:
         """
         self.logger.log_message("debug", f"Checking conflicts for {day_of_week} {start_time}-{end_time}")
 
-        with self.get_connection() as conn:
-            try:
-                cur = conn.cursor()
-                query = """
-                    SELECT s.id, c.name, c.teacher, c.location, s.start_time, s.end_time,
-                           s.day_of_week, s.weeks
-                    FROM schedule s
-                    JOIN courses c ON s.course_id = c.id
-                    WHERE s.day_of_week = ?
-                """
-                params = [day_of_week]
+        try:
+            conflicts = []
+            for existing in self.timeline.overlapping(day_of_week, start_time, end_time, weeks, exclude_entry_id):
+                weeks_in_conflict = conflict_weeks(weeks, existing["weeks"])
+                conflicts.append({
+                    "id": existing["id"],
+                    "course_name": existing["name"],
+                    "teacher": existing["teacher"],
+                    "location": existing["location"],
+                    "start_time": existing["start_time"],
+                    "end_time": existing["end_time"],
+                    "day_of_week": existing["day_of_week"],
+                    "weeks": existing["weeks"],
+                    "conflict_weeks": weeks_in_conflict
+                })
+
+                self.logger.log_message("warning",
+                    f"Conflict detected with '{existing['name']}' ({existing['start_time']}-{existing['end_time']}) "
+                    f"in weeks {weeks_in_conflict}")
+
+            return conflicts
 
-                # Exclude specific entry if editing
-                if exclude_entry_id:
-                    query += " AND s.id != ?"
-                    params.append(exclude_entry_id)
+        except Exception as e:
+            self.logger.log_message("error", f"Error checking conflicts: {e}")
+            return []
 
-                cur.execute(query, params)
+    def check_conflicts_bulk(self, entries: Optional[List[Dict]] = None,
+                             include_existing: bool = False) -> List[Dict]:
+        """
+        Find every conflicting pair in a whole timetable in one pass.
 
-                conflicts = []
-                for row in cur.fetchall():
-                    existing_id = row[0]
-                    existing_name = row[1]
-                    existing_teacher = row[2]
-                    existing_location = row[3]
-                    existing_start = row[4]
-                    existing_end = row[5]
-                    existing_day = row[6]
-                    existing_weeks = json.loads(row[7]) if row[7] else []
-
-                    # Check time overlap
-                    if not (end_time <= existing_start or start_time >= existing_end):
-                        # Check week overlap
-                        conflict_weeks = []
-
-                        if not weeks or not existing_weeks:
-                            # If either has no week restriction, it conflicts for all weeks
-                            conflict_weeks = weeks if weeks else existing_weeks if existing_weeks else [1]
-                        else:
-                            # Calculate actual conflicting weeks
-                            conflict_weeks = list(set(weeks) & set(existing_weeks))
-
-                        if conflict_weeks or (not weeks and not existing_weeks):
-                            conflicts.append({
-                                "id": existing_id,
-                                "course_name": existing_name,
-                                "teacher": existing_teacher,
-                                "location": existing_location,
-                                "start_time": existing_start,
-                                "end_time": existing_end,
-                                "day_of_week": existing_day,
-                                "weeks": existing_weeks,
-                                "conflict_weeks": conflict_weeks
-                            })
-
-                            self.logger.log_message("warning",
-                                f"Conflict detected with '{existing_name}' ({existing_start}-{existing_end}) "
-                                f"in weeks {conflict_weeks}")
-
-                return conflicts
+        Args:
+            entries: Entries to validate (day_of_week, start_time, end_time, weeks,
+                     optional id/course_name). None checks the stored schedule.
+            include_existing: Also check the given entries against the stored schedule
 
-            except Exception as e:
-                self.logger.log_message("error", f"Error checking conflicts: {e}")
-                return []
+        Returns:
+            List of {day_of_week, first, second, conflict_weeks}. first/second carry
+            "index" (position in entries, None for stored entries) and the entry "id".
+
+        Raises:
+            ValueError: An entry has weeks that are not week numbers >= 1
+        """
+        timetable: List[Dict] = []
+        if entries is not None:
+            for index, entry in enumerate(entries):
+                if not self._validate_weeks(entry.get("weeks")):
+                    raise ValueError(f"Entry {index}: invalid weeks {entry.get('weeks')}")
+                timetable.append({
+                    "index": index,
+                    "id": entry.get("id"),
+                    "course_name": entry.get("course_name") or entry.get("name"),
+                    "day_of_week": int(entry["day_of_week"]),
+                    "start_time": entry["start_time"],
+                    "end_time": entry["end_time"],
+                    "weeks": list(entry.get("weeks") or [])
+                })
+        if entries is None or include_existing:
+            for cls in self.timeline.all_classes():
+                timetable.append({
+                    "index": None,
+                    "id": cls["id"],
+                    "course_name": cls["name"],
+                    "day_of_week": cls["day_of_week"],
+                    "start_time": cls["start_time"],
+                    "end_time": cls["end_time"],
+                    "weeks": cls["weeks"]
+                })
+
+        pairs = find_conflicting_pairs(timetable)
+        self.logger.log_message("debug", f"Bulk conflict check: {len(timetable)} entries, {len(pairs)} conflicts")
+
+        return [
+            {
+                "day_of_week": timetable[i]["day_of_week"],
+                "first": timetable[i],
+                "second": timetable[j],
+                "conflict_weeks": conflict_weeks(timetable[i]["weeks"], timetable[j]["weeks"])
+            }
+            for i, j in pairs
+        ]
 
     def get_statistics(self) -> Dict:
         """Get schedule statistics."""
@@ -1,12 +1,18 @@
 """Settings Manager - 统一管理应用设置"""
-import sqlite3
+import threading
+import time
 import uuid
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Dict, Optional, Any
+from typing import Any, Callable, Dict, List, Optional
 from . import logger
+from .db_pool import get_pool
 
 APP_DIR = Path.home() / ".classtop"
 
+# 两次 PRAGMA data_version 检查之间的最小间隔（秒），用于发现其他进程对数据库的修改
+VERSION_CHECK_INTERVAL = 1.0
+
 class SettingsManager:
     """设置管理器，负责设置的初始化、读取和更新"""
 
@@ -67,12 +73,98 @@ class SettingsManager:
         """
         self.db_path = db_path
         self.event_handler = event_handler
+        self.pool = get_pool(db_path)
         self.logger = logger
+
+        # 设置缓存：整个 settings 表的内存副本，写操作直接写穿
+        # 所有写入都走专用连接，因此 data_version 只会因其他连接/进程的提交而变化
+        self._conn = None
+        self._lock = threading.RLock()
+        self._cache: Optional[Dict[str, str]] = None
+        self._data_version: Optional[int] = None
+        self._next_version_check = 0.0
+        self._hits = 0
+        self._misses = 0
+        self._reloads = 0
+
+        # 进程内监听器 callback(updated_keys)，在设置写入后调用
+        self._listeners: List[Callable[[List[str]], None]] = []
+
         self.logger.log_message("info", "SettingsManager initialized")
 
+    def add_listener(self, callback: Callable[[List[str]], None]) -> None:
+        """注册设置变更回调 callback(updated_keys)"""
+        self._listeners.append(callback)
+
+    def _notify_listeners(self, updated_keys: List[str]) -> None:
+        """通知进程内监听器设置已变更"""
+        for callback in self._listeners:
+            try:
+                callback(updated_keys)
+            except Exception as e:
+                self.logger.log_message("error", f"Settings listener failed: {e}")
+
+    @contextmanager
     def get_connection(self):
-        """获取数据库连接"""
-        return sqlite3.connect(self.db_path)
+        """获取设置管理器专用的数据库连接（加锁串行访问）"""
+        with self._lock:
+            if self._conn is None:
+                self._conn = self.pool.open_connection()
+            try:
+                yield self._conn
+            finally:
+                if self._conn.in_transaction:
+                    self._conn.rollback()
+
+    def _load_cache(self) -> Dict[str, str]:
+        """从数据库加载整个 settings 表到缓存（调用方持有锁）"""
+        with self.get_connection() as conn:
+            self._data_version = conn.execute("PRAGMA data_version").fetchone()[0]
+            self._cache = {k: v for k, v in conn.execute("SELECT key, value FROM settings")}
+        self._reloads += 1
+        self._next_version_check = time.monotonic() + VERSION_CHECK_INTERVAL
+        self.logger.log_message("debug", f"Settings cache loaded: {len(self._cache)} keys")
+        return self._cache
+
+    def _get_cache(self) -> Dict[str, str]:
+        """返回最新的缓存，必要时检查 data_version 并重新加载"""
+        cache = self._cache
+        if cache is not None and time.monotonic() < self._next_version_check:
+            self._hits += 1
+            return cache
+
+        with self._lock:
+            if self._cache is not None:
+                with self.get_connection() as conn:
+                    version = conn.execute("PRAGMA data_version").fetchone()[0]
+                if version == self._data_version:
+                    self._next_version_check = time.monotonic() + VERSION_CHECK_INTERVAL
+                    self._hits += 1
+                    return self._cache
+                self.logger.log_message("debug", "Settings changed by another connection, reloading cache")
+
+            self._misses += 1
+            return self._load_cache()
+
+    def invalidate_cache(self) -> None:
+        """丢弃缓存，下次读取时重新加载"""
+        with self._lock:
+            self._cache = None
+
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """获取缓存命中统计
+
+        Returns:
+            {hits, misses, reloads, hit_rate, size}
+        """
+        total = self._hits + self._misses
+        return {
+            "hits": self._hits,
+            "misses": self._misses,
+            "reloads": self._reloads,
+            "hit_rate": self._hits / total if total else 0.0,
+            "size": len(self._cache) if self._cache is not None else 0,
+        }
 
     def initialize_defaults(self) -> None:
         """初始化默认设置（如果不存在）"""
@@ -96,6 +188,7 @@ class SettingsManager:
                     self.logger.log_message("debug", f"Initialized setting: {key} = {value}")
 
             conn.commit()
+            self._load_cache()
 
         self.logger.log_message("info", "Default settings initialized")
 
@@ -108,11 +201,7 @@ class SettingsManager:
         Returns:
             设置值，如果不存在返回 None
         """
-        with self.get_connection() as conn:
-            cur = conn.cursor()
-            cur.execute("SELECT value FROM settings WHERE key=?", (key,))
-            row = cur.fetchone()
-            return row[0] if row else None
+        return self._get_cache().get(key)
 
     def set_setting(self, key: str, value: str) -> bool:
         """设置单个设置值
@@ -133,10 +222,13 @@ class SettingsManager:
                     (key, str(value))
                 )
                 conn.commit()
-                
+                if self._cache is not None:
+                    self._cache[key] = str(value)
+
             # Emit event if handler is available
             if self.event_handler:
                 self.event_handler.emit_setting_update(key, value)
+            self._notify_listeners([key])
 
             self.logger.log_message("info", f"Setting updated: {key} = {value}")
             return True
@@ -150,10 +242,7 @@ class SettingsManager:
         Returns:
             设置字典 {key: value}
         """
-        with self.get_connection() as conn:
-            cur = conn.cursor()
-            cur.execute("SELECT key, value FROM settings")
-            return {k: v for k, v in cur.fetchall()}
+        return dict(self._get_cache())
 
     def update_multiple(self, settings: Dict[str, str]) -> bool:
         """批量更新设置
@@ -174,10 +263,13 @@ class SettingsManager:
                         (key, str(value))
                     )
                 conn.commit()
+                if self._cache is not None:
+                    self._cache.update({key: str(value) for key, value in settings.items()})
 
             # Emit batch update event
             if self.event_handler:
                 self.event_handler.emit_settings_batch_updated(list(settings.keys()))
+            self._notify_listeners(list(settings.keys()))
 
             self.logger.log_message("info", f"Updated {len(settings)} settings")
             return True
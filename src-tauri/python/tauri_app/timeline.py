@@ -0,0 +1,225 @@
+"""
+Schedule Timeline for ClassTop.
+
+Keeps the whole schedule in memory as sorted interval arrays per (week, day)
+so current/next/last class lookups are a bisect instead of a database query
+and a linear scan. The timeline listens to ScheduleManager changes and
+updates itself incrementally.
+"""
+
+import threading
+from bisect import bisect_left, bisect_right
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from . import logger as _logger
+from .conflicts import IntervalIndex, week_mask
+
+# Per-slot arrays: classes sorted by start time, their start times, and the
+# running maximum of their end times (non-decreasing, so it can be bisected)
+_Slot = Tuple[List[Dict], List[str], List[str]]
+
+# Entries added/removed since a day's overlap index was built are kept aside
+# and applied at query time; past this many the index is rebuilt
+INDEX_PENDING_LIMIT = 64
+
+
+class ScheduleTimeline:
+    """In-memory index of schedule entries for O(log n) time lookups."""
+
+    def __init__(self, schedule_manager):
+        self.schedule_manager = schedule_manager
+        self.logger = _logger
+        self._lock = threading.RLock()
+        self._entries: Optional[Dict[int, Dict]] = None
+        # {(week or None, day_of_week): slot}, built lazily per lookup
+        self._slots: Dict[Tuple[Optional[int], int], _Slot] = {}
+        # {day_of_week: IntervalIndex} over every entry of the day, for conflict checks,
+        # plus the entries added ({day: [cls]}) and ids removed ({day: {id}}) since it was built
+        self._indexes: Dict[int, IntervalIndex] = {}
+        self._pending: Dict[int, List[Dict]] = {}
+        self._removed: Dict[int, Set[int]] = {}
+        # {entry_id: week bitset}
+        self._masks: Dict[int, int] = {}
+
+        schedule_manager.add_listener(self._on_schedule_event)
+
+    # Loading and invalidation
+    def reload(self) -> None:
+        """Reload every entry from the database."""
+        classes = self.schedule_manager._query_classes()
+        with self._lock:
+            self._entries = {cls["id"]: cls for cls in classes}
+            self._masks = {cls["id"]: week_mask(cls["weeks"]) for cls in classes}
+            self._clear_indexes()
+        self.logger.log_message("debug", f"Schedule timeline loaded: {len(classes)} entries")
+
+    def _ensure_loaded(self) -> Dict[int, Dict]:
+        if self._entries is None:
+            self.reload()
+        return self._entries
+
+    def _clear_indexes(self) -> None:
+        """Forget every built slot and overlap index. Caller holds the lock."""
+        self._slots.clear()
+        self._indexes.clear()
+        self._pending.clear()
+        self._removed.clear()
+
+    def _drop_day(self, day_of_week: int) -> None:
+        """Forget the built slots of one day. Caller holds the lock."""
+        for key in [key for key in self._slots if key[1] == day_of_week]:
+            del self._slots[key]
+
+    def _index_changed(self, day_of_week: int) -> None:
+        """Rebuild a day's overlap index lazily once too many changes piled up. Caller holds the lock."""
+        changes = len(self._pending.get(day_of_week, ())) + len(self._removed.get(day_of_week, ()))
+        if changes > INDEX_PENDING_LIMIT:
+            self._indexes.pop(day_of_week, None)
+            self._pending.pop(day_of_week, None)
+            self._removed.pop(day_of_week, None)
+
+    def _on_schedule_event(self, event_type: str, payload: Dict[str, Any]) -> None:
+        """Apply a ScheduleManager change to the timeline."""
+        with self._lock:
+            if self._entries is None:
+                # Nothing loaded yet; the first lookup reads the latest data
+                return
+
+            if event_type == "schedule_added":
+                for cls in self.schedule_manager._query_classes(entry_id=payload["id"]):
+                    day = cls["day_of_week"]
+                    self._entries[cls["id"]] = cls
+                    self._masks[cls["id"]] = week_mask(cls["weeks"])
+                    self._drop_day(day)
+                    if day in self._indexes:
+                        self._pending.setdefault(day, []).append(cls)
+                        self._index_changed(day)
+            elif event_type == "schedule_deleted":
+                cls = self._entries.pop(payload["id"], None)
+                if cls is not None:
+                    day = cls["day_of_week"]
+                    self._masks.pop(cls["id"], None)
+                    self._drop_day(day)
+                    if day in self._indexes:
+                        pending = self._pending.get(day, [])
+                        if cls in pending:
+                            pending.remove(cls)
+                        else:
+                            self._removed.setdefault(day, set()).add(cls["id"])
+                        self._index_changed(day)
+            elif event_type == "course_added":
+                # A course without schedule entries does not appear on the timeline
+                pass
+            else:
+                # Course edits/deletes touch every entry of that course
+                self._entries = None
+                self._clear_indexes()
+
+    def _slot(self, day_of_week: int, week: Optional[int]) -> _Slot:
+        """Return the sorted arrays for a day, building them on first use."""
+        key = (week, day_of_week)
+        slot = self._slots.get(key)
+        if slot is not None:
+            return slot
+
+        with self._lock:
+            entries = self._ensure_loaded()
+            classes = sorted(
+                (
+                    cls for cls in entries.values()
+                    if cls["day_of_week"] == day_of_week
+                    and (week is None or not cls["weeks"] or week in cls["weeks"])
+                ),
+                key=lambda cls: (cls["start_time"], cls["id"])
+            )
+            starts = [cls["start_time"] for cls in classes]
+            max_ends: List[str] = []
+            for cls in classes:
+                end = cls["end_time"]
+                max_ends.append(max(max_ends[-1], end) if max_ends else end)
+
+            slot = (classes, starts, max_ends)
+            self._slots[key] = slot
+            return slot
+
+    def _index(self, day_of_week: int) -> IntervalIndex:
+        """Return the overlap index for a day, building it on first use. Caller holds the lock."""
+        index = self._indexes.get(day_of_week)
+        if index is not None:
+            return index
+
+        entries = self._ensure_loaded()
+        index = IntervalIndex(sorted(
+            (
+                (cls["start_time"], cls["end_time"], self._masks[cls["id"]], cls)
+                for cls in entries.values() if cls["day_of_week"] == day_of_week
+            ),
+            key=lambda item: (item[0], item[3]["id"])
+        ))
+        self._indexes[day_of_week] = index
+        self._pending.pop(day_of_week, None)
+        self._removed.pop(day_of_week, None)
+        return index
+
+    # Lookups
+    def all_classes(self) -> List[Dict]:
+        """Get every entry (all weeks) ordered by (day_of_week, start_time)."""
+        return self.classes_for_week(None)
+
+    def overlapping(self, day_of_week: int, start_time: str, end_time: str,
+                    weeks: Optional[List[int]] = None,
+                    exclude_entry_id: Optional[int] = None) -> List[Dict]:
+        """Get entries overlapping [start_time, end_time) on a day and sharing a week, by start time."""
+        mask = week_mask(weeks)
+        with self._lock:
+            index = self._index(day_of_week)
+            removed = self._removed.get(day_of_week, ())
+            found = [cls for cls in index.overlapping(start_time, end_time, mask) if cls["id"] not in removed]
+            pending = [
+                cls for cls in self._pending.get(day_of_week, ())
+                if cls["start_time"] < end_time and cls["end_time"] > start_time
+                and self._masks[cls["id"]] & mask
+            ]
+
+        if pending:
+            found = sorted(found + pending, key=lambda cls: (cls["start_time"], cls["id"]))
+        return [dict(cls) for cls in found if cls["id"] != exclude_entry_id]
+
+    def classes_for_day(self, day_of_week: int, week: Optional[int] = None) -> List[Dict]:
+        """Get all classes of a day ordered by start time."""
+        return [dict(cls) for cls in self._slot(day_of_week, week)[0]]
+
+    def classes_for_week(self, week: Optional[int] = None) -> List[Dict]:
+        """Get all classes ordered by (day_of_week, start_time)."""
+        return [cls for day in range(1, 8) for cls in self.classes_for_day(day, week)]
+
+    def current_class(self, day_of_week: int, time_str: str,
+                      week: Optional[int] = None) -> Optional[Dict]:
+        """First class (by start time) with start_time <= time_str <= end_time."""
+        classes, starts, max_ends = self._slot(day_of_week, week)
+        started = bisect_right(starts, time_str)
+        # First class whose end has not passed; every earlier class ended before time_str
+        i = bisect_left(max_ends, time_str)
+        return dict(classes[i]) if i < started else None
+
+    def next_class(self, day_of_week: int, time_str: str,
+                   week: Optional[int] = None) -> Optional[Dict]:
+        """First class starting after time_str, otherwise the first class of the following days."""
+        classes, starts, _ = self._slot(day_of_week, week)
+        i = bisect_right(starts, time_str)
+        if i < len(classes):
+            return dict(classes[i])
+
+        for day_offset in range(1, 8):
+            next_day = ((day_of_week - 1 + day_offset) % 7) + 1
+            classes = self._slot(next_day, week)[0]
+            if classes:
+                return dict(classes[0])
+        return None
+
+    def last_class(self, day_of_week: int, time_str: str,
+                   week: Optional[int] = None) -> Optional[Dict]:
+        """Last class of the leading run of classes that have already ended."""
+        classes, _, max_ends = self._slot(day_of_week, week)
+        j = bisect_right(max_ends, time_str)
+        return dict(classes[j - 1]) if j > 0 else None
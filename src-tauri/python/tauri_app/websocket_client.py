@@ -1,10 +1,152 @@
 """WebSocket client for connecting to admin server."""
 import asyncio
 import json
+import threading
+import time
 from typing import Optional, Dict, Any, Callable
 import websockets
 from websockets.exceptions import ConnectionClosed, WebSocketException
 from . import logger
+from .frame_protocol import encode_frame
+from .preview_controller import DEFAULT_MIN_FPS, DEFAULT_MIN_QUALITY
+
+# Preview frames are paced so a send takes at most this fraction of the frame interval
+PREVIEW_SEND_BUDGET = 0.8
+
+# Lowest preview rate the pacing will go down to (frames per second)
+MIN_PREVIEW_FPS = 1.0
+
+# Weight of the newest sample in the moving average of send time
+SEND_TIME_SMOOTHING = 0.2
+
+
+class CameraFrameSender:
+    """Sends one camera's preview frames from a single coroutine.
+
+    Frames are handed over through a one-slot mailbox: a new frame replaces
+    one that has not been sent yet, so a slow uplink drops frames instead of
+    queueing them. The send interval follows the measured send time.
+    """
+
+    def __init__(self, client: 'WebSocketClient', camera_index: int):
+        self.client = client
+        self.camera_index = camera_index
+
+        self._lock = threading.Lock()
+        self._message: Optional[bytes] = None
+        self._queued_at = 0.0
+        self._seq = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._closed = False
+
+        # Stats
+        self.frames_in = 0
+        self.frames_sent = 0
+        self.frames_dropped = 0
+        self.bytes_sent = 0
+        self.send_time_avg = 0.0
+        self.queue_latency_avg = 0.0
+        self.queue_latency_max = 0.0
+        self.write_buffer = 0
+
+    @property
+    def min_interval(self) -> float:
+        """Shortest interval between sends the uplink currently sustains (seconds)."""
+        return min(self.send_time_avg / PREVIEW_SEND_BUDGET, 1.0 / MIN_PREVIEW_FPS)
+
+    def offer(self, frame: bytes) -> None:
+        """Put a frame in the mailbox (called from any thread)."""
+        with self._lock:
+            message = encode_frame(self.camera_index, self._seq, frame)
+            self._seq += 1
+            self.frames_in += 1
+            if self._message is not None:
+                self.frames_dropped += 1
+            self._message = message
+            self._queued_at = time.perf_counter()
+            loop, wake = self._loop, self._wake
+
+        if loop is not None:
+            try:
+                loop.call_soon_threadsafe(wake.set)
+            except RuntimeError:
+                pass  # Event loop closed
+
+    def close(self) -> None:
+        """Stop the sender coroutine."""
+        self._closed = True
+        loop, wake = self._loop, self._wake
+        if loop is not None:
+            try:
+                loop.call_soon_threadsafe(wake.set)
+            except RuntimeError:
+                pass
+
+    async def run(self) -> None:
+        """Sender loop; runs on the portal's event loop."""
+        # offer() treats a known loop as ready, so create the event first
+        self._wake = asyncio.Event()
+        self._loop = asyncio.get_running_loop()
+        # A frame may have arrived before the loop was known
+        self._wake.set()
+        last_send = 0.0
+
+        while not self._closed:
+            await self._wake.wait()
+            self._wake.clear()
+
+            # Pace to what the uplink sustains; newer frames overwrite the slot meanwhile
+            delay = last_send + self.min_interval - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+            with self._lock:
+                message, queued_at = self._message, self._queued_at
+                self._message = None
+            if message is None or self._closed:
+                continue
+
+            websocket = self.client.websocket
+            if not websocket:
+                self.frames_dropped += 1
+                continue
+
+            last_send = time.perf_counter()
+            try:
+                await websocket.send(message)
+            except Exception:
+                # Silently drop frames that fail to send
+                self.frames_dropped += 1
+                continue
+            done = time.perf_counter()
+
+            a = SEND_TIME_SMOOTHING
+            latency = last_send - queued_at
+            self.send_time_avg = (1 - a) * self.send_time_avg + a * (done - last_send)
+            self.queue_latency_avg = (1 - a) * self.queue_latency_avg + a * latency
+            self.queue_latency_max = max(self.queue_latency_max, latency)
+            self.frames_sent += 1
+            self.bytes_sent += len(message)
+
+            # Bytes the socket has not accepted yet; grows when the network, not this loop, is the bottleneck
+            transport = getattr(websocket, 'transport', None)
+            self.write_buffer = transport.get_write_buffer_size() if transport else 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Frame counters, send time and mailbox latency (milliseconds)."""
+        min_interval = self.min_interval
+        return {
+            "frames_in": self.frames_in,
+            "frames_sent": self.frames_sent,
+            "frames_dropped": self.frames_dropped,
+            "bytes_sent": self.bytes_sent,
+            "send_time_avg_ms": self.send_time_avg * 1000,
+            "queue_latency_avg_ms": self.queue_latency_avg * 1000,
+            "queue_latency_max_ms": self.queue_latency_max * 1000,
+            "max_fps": 1.0 / min_interval if min_interval > 0 else None,
+            "write_buffer": self.write_buffer,
+        }
 
 
 class WebSocketClient:
@@ -36,6 +178,9 @@ class WebSocketClient:
         self._listen_task: Optional[asyncio.Task] = None
         self._heartbeat_task: Optional[asyncio.Task] = None
 
+        # Preview frame senders: {camera_index: CameraFrameSender}
+        self._frame_senders: Dict[int, CameraFrameSender] = {}
+
     async def start(self):
         """Start WebSocket client with auto-reconnect."""
         if self.running:
@@ -54,6 +199,11 @@ class WebSocketClient:
         """Stop WebSocket client."""
         self.running = False
 
+        # Stop preview frame senders
+        for sender in self._frame_senders.values():
+            sender.close()
+        self._frame_senders.clear()
+
         # Cancel tasks
         if self._heartbeat_task:
             self._heartbeat_task.cancel()
@@ -81,7 +231,9 @@ class WebSocketClient:
 
                 self.logger.log_message("info", f"Connecting to admin server: {ws_url}")
 
-                async with websockets.connect(ws_url, ping_interval=20, ping_timeout=10) as websocket:
+                # No permessage-deflate: preview frames are already-compressed JPEG
+                async with websockets.connect(ws_url, ping_interval=20, ping_timeout=10,
+                                              compression=None) as websocket:
                     self.websocket = websocket
                     self.logger.log_message("info", "Connected to admin server")
 
@@ -135,11 +287,39 @@ class WebSocketClient:
 
         if message_type == 'command':
             await self._handle_command(data)
+        elif message_type == 'batch':
+            await self._handle_batch(data)
+        elif message_type == 'preview_feedback':
+            # Viewer delivery stats from the LMS for adaptive preview quality
+            from . import db as _db
+            if _db.camera_manager:
+                _db.camera_manager.on_preview_feedback(data)
         else:
             self.logger.log_message("warning", f"Unknown message type: {message_type}")
 
     async def _handle_command(self, data: Dict[str, Any]):
         """Handle command from server."""
+        response = await self._run_command(data)
+
+        if self.websocket:
+            await self.websocket.send(json.dumps({'type': 'response', **response}))
+
+    async def _handle_batch(self, data: Dict[str, Any]):
+        """Handle a batch of commands: run them concurrently and reply in one frame.
+
+        Blocking handlers run in worker threads (see _execute_command), so the
+        reply waits for the slowest command, not for the sum of them.
+        """
+        commands = data.get('commands', [])
+        self.logger.log_message("info", f"Received batch of {len(commands)} commands")
+
+        responses = await asyncio.gather(*(self._run_command(item) for item in commands))
+
+        if self.websocket:
+            await self.websocket.send(json.dumps({'type': 'batch_response', 'responses': responses}))
+
+    async def _run_command(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Execute one command message and build its response fields."""
         request_id = data.get('request_id')
         command = data.get('command')
         params = data.get('params', {})
@@ -147,30 +327,39 @@ class WebSocketClient:
         self.logger.log_message("info", f"Received command: {command}")
 
         try:
-            # Execute command
             result = await self._execute_command(command, params)
-
-            # Send response
-            response = {
-                'type': 'response',
+            return {
                 'request_id': request_id,
                 'success': True,
                 'data': result
             }
         except Exception as e:
             self.logger.log_message("error", f"Error executing command {command}: {e}")
-            response = {
-                'type': 'response',
+            return {
                 'request_id': request_id,
                 'success': False,
                 'error': str(e)
             }
 
-        if self.websocket:
-            await self.websocket.send(json.dumps(response))
-
     async def _execute_command(self, command: str, params: Dict[str, Any]) -> Any:
-        """Execute a command and return result."""
+        """Execute a command and return result.
+
+        Only the commands that use the event loop run on it. Every other handler
+        blocks on SQLite, the camera or ffmpeg, so it runs in a worker thread:
+        the commands of a batch overlap, and preview frames keep going out while
+        a slow camera command runs.
+        """
+        if command == 'refresh_state':
+            await self._send_state_update()
+            return {'success': True}
+
+        elif command == 'camera_get_preview_stats':
+            return {'stats': self.get_frame_stats()}
+
+        return await asyncio.to_thread(self._execute_blocking_command, command, params)
+
+    def _execute_blocking_command(self, command: str, params: Dict[str, Any]) -> Any:
+        """Execute a command that does not need the event loop (runs in a worker thread)."""
         from . import db as _db
 
         # Map commands to functions
@@ -200,10 +389,6 @@ class WebSocketClient:
                 return {'success': success}
             return {'success': False}
 
-        elif command == 'refresh_state':
-            await self._send_state_update()
-            return {'success': True}
-
         # Camera commands
         elif command == 'camera_initialize':
             if not _db.camera_manager:
@@ -266,8 +451,18 @@ class WebSocketClient:
         elif command == 'camera_start_preview':
             if not _db.camera_manager:
                 return {'success': False, 'message': 'Camera manager not available'}
-            fps = params.get('fps', 10)
-            success = _db.camera_manager.start_preview(params.get('camera_index', 0), fps)
+            success = _db.camera_manager.start_preview(
+                camera_index=params.get('camera_index', 0),
+                fps=params.get('fps', 10),
+                width=params.get('width'),
+                height=params.get('height'),
+                quality=params.get('quality'),
+                grayscale=params.get('grayscale', False),
+                roi=params.get('roi'),
+                adaptive=params.get('adaptive', True),
+                min_fps=params.get('min_fps', DEFAULT_MIN_FPS),
+                min_quality=params.get('min_quality', DEFAULT_MIN_QUALITY)
+            )
             return {'success': success}
 
         elif command == 'camera_stop_preview':
@@ -304,8 +499,8 @@ class WebSocketClient:
             return
 
         try:
-            # Collect current state
-            state_data = {}
+            # Collect current state; capabilities tell the LMS it may send batch frames
+            state_data = {'capabilities': ['batch']}
 
             # Get settings
             if self.settings_manager:
@@ -338,34 +533,39 @@ class WebSocketClient:
         if self.websocket:
             await self.websocket.close()
 
-    def send_camera_frame(self, camera_index: int, frame_base64: str):
-        """Send camera frame to server (non-blocking).
+    def send_camera_frame(self, camera_index: int, frame: bytes):
+        """Send camera frame to server as a binary frame message (non-blocking).
+
+        Only the latest frame per camera is kept; a frame still waiting when the
+        next one arrives is dropped.
 
         Args:
             camera_index: Camera index
-            frame_base64: Base64 encoded JPEG frame
+            frame: JPEG-encoded frame bytes
         """
         if not self.websocket or not self.running:
             return
 
-        # Send frame asynchronously without blocking
-        message = {
-            'type': 'camera_frame',
-            'camera_index': camera_index,
-            'frame': frame_base64
-        }
-
-        # Use portal to send from non-async thread
-        async def send_frame():
+        sender = self._frame_senders.get(camera_index)
+        if sender is None:
+            sender = self._frame_senders[camera_index] = CameraFrameSender(self, camera_index)
             try:
-                if self.websocket:
-                    await self.websocket.send(json.dumps(message))
-            except Exception as e:
-                # Silently fail for frame transmission errors
-                pass
-
-        try:
-            if self.portal:
-                self.portal.start_task_soon(send_frame)
-        except Exception:
-            pass  # Silently fail if portal unavailable
+                if self.portal:
+                    self.portal.start_task_soon(sender.run)
+            except Exception:
+                pass  # Silently fail if portal unavailable
+        sender.offer(frame)
+
+    def get_frame_interval(self, camera_index: int) -> float:
+        """Shortest useful interval between preview frames for a camera (seconds)."""
+        sender = self._frame_senders.get(camera_index)
+        return sender.min_interval if sender else 0.0
+
+    def get_frame_stats(self) -> Dict[int, Dict[str, Any]]:
+        """Preview frame sender stats per camera."""
+        return {index: sender.get_stats() for index, sender in self._frame_senders.items()}
+
+    def get_camera_frame_stats(self, camera_index: int) -> Optional[Dict[str, Any]]:
+        """Preview frame sender stats for one camera, or None if it has not sent yet."""
+        sender = self._frame_senders.get(camera_index)
+        return sender.get_stats() if sender else None
@@ -1,3 +1,4 @@
+import { Channel } from '@tauri-apps/api/core';
 import { pyInvoke } from 'tauri-plugin-pytauri-api';
 
 // 星期映射
@@ -455,16 +456,35 @@ export async function checkScheduleConflict(dayOfWeek, startTime, endTime, weeks
   }
 }
 
+/**
+ * 批量检查课程表冲突（entries 为空时检查当前课程表）
+ */
+export async function checkScheduleConflictsBulk(entries = null, includeExisting = false) {
+  try {
+    const result = await pyInvoke('check_schedule_conflicts_bulk', {
+      entries,
+      include_existing: includeExisting
+    });
+    return result;
+  } catch (error) {
+    console.error('Failed to check schedule conflicts:', error);
+    return { has_conflict: false, conflicts: [] };
+  }
+}
+
 /**
  * 导出课程表数据
  */
-export async function exportScheduleData(format = 'json', includeCourses = true, includeSchedule = true, includeSettings = false) {
+export async function exportScheduleData(format = 'json', includeCourses = true, includeSchedule = true, includeSettings = false, outputPath = null, compress = false) {
   try {
+    // 指定 outputPath 时由后端直接流式写入文件，返回的 data 为空
     const result = await pyInvoke('export_schedule_data', {
       format,
       include_courses: includeCourses,
       include_schedule: includeSchedule,
-      include_settings: includeSettings
+      include_settings: includeSettings,
+      output_path: outputPath,
+      compress
     });
     return result;
   } catch (error) {
@@ -475,17 +495,24 @@ export async function exportScheduleData(format = 'json', includeCourses = true,
 
 /**
  * 导入课程表数据
+ * onProgress 可选，接收 { stage, done, total }（stage: conflicts / courses / schedule / done）
  */
-export async function importScheduleData(format, data, replaceExisting = false) {
+export async function importScheduleData(format, data, replaceExisting = false, onProgress = null) {
   try {
+    let channel = null;
+    if (onProgress) {
+      channel = new Channel();
+      channel.onmessage = onProgress;
+    }
     const result = await pyInvoke('import_schedule_data', {
       format,
       data,
-      replace_existing: replaceExisting
+      replace_existing: replaceExisting,
+      channel_id: channel ? channel.toJSON() : null
     });
     return result;
   } catch (error) {
     console.error('Failed to import schedule data:', error);
-    return { success: false, message: '导入失败', courses_imported: 0, schedule_imported: 0 };
+    return { success: false, message: '导入失败', courses_imported: 0, schedule_imported: 0, skipped: 0, conflicts: 0 };
   }
 }
\ No newline at end of file